@@ -5,9 +5,11 @@ from langgraph.checkpoint.sqlite import SqliteSaver
 
 from crm_agent.agent.state import AgentState, Route
 from crm_agent.agent.router import RouterLLM
-from crm_agent.agent.vanna_client import VannaClient
+from crm_agent.agent.vanna_pool import get_vanna_client
 from crm_agent.agent.sql_executor import SQLExecutor
+from crm_agent.agent.t2sql_service import answer_question
 from crm_agent.agent.tools_rag import RagTool
+from crm_agent.core.sqlite_tuning import apply_pragmas
 
 
 CHROMA_DIR = os.getenv("CHROMA_DIR", "/home/hafdaoui/Documents/Proplens/crm_agent/data/chroma")
@@ -27,19 +29,14 @@ def node_route(state: AgentState) -> AgentState:
 
 
 def node_t2sql(state: AgentState) -> AgentState:
-    vc = VannaClient(chroma_dir=CHROMA_DIR)
-    result = vc.ask(state.query)
+    result = answer_question(state.query, lambda: get_vanna_client(CHROMA_DIR), executor)
     if result["error"]:
         state.error = result["error"]
-        return state
-    exec_res = executor.execute(result["sql"])
-    if exec_res["error"]:
-        state.error = exec_res["error"]
-        state.sql = result["sql"]
+        state.sql = result["sql"] or None
         return state
     state.sql = result["sql"]
-    state.rows = exec_res["rows"]
-    state.columns = exec_res["columns"]
+    state.rows = result["rows"]
+    state.columns = result["columns"]
     return state
 
 
@@ -113,6 +110,7 @@ def build_graph(sqlite_path: str = "/home/hafdaoui/Documents/Proplens/crm_agent/
     # Create SQLite connection for checkpointer (required for langgraph v1.0+)
     # check_same_thread=False allows usage across multiple requests
     conn = sqlite3.connect(sqlite_path, check_same_thread=False)
+    apply_pragmas(conn)  # same WAL/busy_timeout tuning as the Django database
     checkpointer = SqliteSaver(conn)
 
     return sg.compile(checkpointer=checkpointer)
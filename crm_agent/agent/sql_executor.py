@@ -1,13 +1,51 @@
-from typing import Dict, Any, Optional, Tuple
-from django.db import connection
+from contextlib import contextmanager
+from datetime import date
+from typing import Dict, Any, Optional, Sequence, Tuple
+from django.core import signing
+from django.db import connections, transaction, DEFAULT_DB_ALIAS
 import logging
+import os
 import re
+import time
 
 logger = logging.getLogger(__name__)
 
+# Database alias for generated SQL (see app/db_config.py)
+READONLY_ALIAS = "readonly"
+
+CURSOR_SALT = "crm_agent.sql_executor.cursor"
+
+
+class QueryTimeout(Exception):
+    pass
+
 
 class SQLExecutor:
-    """Safe SQL executor with validation - only SELECT queries allowed."""
+    """Safe SQL executor with validation - only SELECT queries allowed.
+
+    Queries run on the read-only alias so analytics never hold the read/write
+    connection; falls back to the default database if that alias isn't configured.
+
+    Results are bounded: rows are fetched in batches of T2SQL_FETCH_SIZE up to
+    T2SQL_MAX_ROWS (then "truncated" is set), and the whole query, fetches
+    included, must finish within T2SQL_TIMEOUT_MS (SQLite progress handler,
+    PostgreSQL statement_timeout plus a server-side cursor). A truncated result
+    carries "next_cursor", a signed token for `execute_cursor` that re-runs the
+    query with LIMIT/OFFSET; pages are only stable if the SQL has an ORDER BY.
+    """
+
+    def __init__(
+        self,
+        using: Optional[str] = None,
+        max_rows: Optional[int] = None,
+        timeout_ms: Optional[int] = None,
+        fetch_size: Optional[int] = None,
+    ):
+        using = using or READONLY_ALIAS
+        self.using = using if using in connections.settings else DEFAULT_DB_ALIAS
+        self.max_rows = max_rows or int(os.getenv("T2SQL_MAX_ROWS", "1000"))
+        self.timeout_ms = int(os.getenv("T2SQL_TIMEOUT_MS", "5000")) if timeout_ms is None else timeout_ms
+        self.fetch_size = fetch_size or int(os.getenv("T2SQL_FETCH_SIZE", "200"))
     
     # Dangerous SQL keywords to block
     DANGEROUS_KEYWORDS = [
@@ -28,9 +66,9 @@ class SQLExecutor:
         if not sql_upper.startswith('SELECT'):
             return False, "Only SELECT queries are allowed"
         
-        # Check for dangerous keywords
+        # Check for dangerous keywords (whole words, so created_at/updated_at pass)
         for keyword in self.DANGEROUS_KEYWORDS:
-            if keyword in sql_upper:
+            if re.search(rf"\b{keyword}\b", sql_upper):
                 return False, f"Dangerous keyword '{keyword}' is not allowed"
         
         # Check for multiple statements (semicolon injection)
@@ -39,15 +77,54 @@ class SQLExecutor:
         
         return True, None
     
-    def execute(self, sql: str) -> Dict[str, Any]:
+    @staticmethod
+    def _result(rows=None, columns=None, error=None, truncated=False, next_cursor=None) -> Dict[str, Any]:
+        rows = rows or []
+        return {
+            "rows": rows,
+            "row_count": len(rows),
+            "columns": columns or [],
+            "truncated": truncated,
+            "next_cursor": next_cursor,
+            "error": error,
+        }
+
+    @contextmanager
+    def _time_limit(self, conn, deadline: float):
+        """Abort the statement in the database once `deadline` (time.monotonic()) passes."""
+        if self.timeout_ms <= 0:
+            yield
+        elif conn.vendor == "sqlite":
+            # Called every N VM instructions; a truthy return interrupts the query
+            conn.connection.set_progress_handler(lambda: time.monotonic() > deadline, 10_000)
+            try:
+                yield
+            finally:
+                conn.connection.set_progress_handler(None, 0)
+        else:
+            if conn.vendor == "postgresql":
+                # Transaction-local, so pooled connections get their default back. A plain
+                # cursor: the server-side one only DECLAREs its statement.
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT set_config('statement_timeout', %s, true)", [str(self.timeout_ms)])
+            yield
+
+    def execute(self, sql: str, params: Optional[Sequence[Any]] = None, offset: int = 0) -> Dict[str, Any]:
         """
         Execute validated SQL query safely.
+
+        Args:
+            sql: SELECT statement, with %s placeholders when params are given
+            params: Values bound to the placeholders (see agent/sql_templates.py)
+            offset: Rows to skip (continuation pages, see execute_cursor)
         
         Returns:
             {
-                "rows": List[Dict],
+                "rows": List[Dict],           # at most max_rows
                 "row_count": int,
                 "columns": List[str],
+                "truncated": bool,            # more rows were available
+                "next_cursor": Optional[str], # signed token for the next page
                 "error": Optional[str]
             }
         """
@@ -55,42 +132,59 @@ class SQLExecutor:
         is_valid, error = self.validate_sql(sql)
         if not is_valid:
             logger.warning(f"SQL validation failed: {error}")
-            return {
-                "rows": [],
-                "row_count": 0,
-                "columns": [],
-                "error": error
-            }
-        
+            return self._result(error=error)
+
+        statement = sql.strip().rstrip(";")
+        if offset:
+            # Ints from a signed cursor; formatted in so the %s placeholders stay as they were
+            statement = f"SELECT * FROM ({statement}) AS t2sql_page LIMIT {self.max_rows + 1} OFFSET {int(offset)}"
+
+        conn = connections[self.using]
+        deadline = time.monotonic() + self.timeout_ms / 1000.0 if self.timeout_ms > 0 else float("inf")
         try:
-            with connection.cursor() as cursor:
-                cursor.execute(sql)
-                
-                # Get column names
-                columns = [col[0] for col in cursor.description] if cursor.description else []
-                
-                # Fetch all rows
-                rows_data = cursor.fetchall()
-                
-                # Convert to list of dicts
-                rows = [dict(zip(columns, row)) for row in rows_data]
-                
-                logger.info(f"SQL executed successfully: {len(rows)} rows returned")
-                
-                return {
-                    "rows": rows,
-                    "row_count": len(rows),
-                    "columns": columns,
-                    "error": None
-                }
-                
+            # chunked_cursor is server-side on PostgreSQL, so rows past the cap are never sent
+            with transaction.atomic(using=self.using), conn.chunked_cursor() as cursor:
+                with self._time_limit(conn, deadline):
+                    cursor.execute(statement, params)
+                    
+                    # Get column names
+                    columns = [col[0] for col in cursor.description] if cursor.description else []
+                    
+                    # Fetch one row past the cap to know whether the result was cut
+                    rows_data = []
+                    while len(rows_data) <= self.max_rows:
+                        batch = cursor.fetchmany(min(self.fetch_size, self.max_rows + 1 - len(rows_data)))
+                        if not batch:
+                            break
+                        rows_data.extend(batch)
+                        if time.monotonic() > deadline:
+                            raise QueryTimeout()
         except Exception as e:
-            error_msg = str(e)
+            if isinstance(e, QueryTimeout) or time.monotonic() > deadline:
+                error_msg = f"Query exceeded the {self.timeout_ms} ms time limit"
+            else:
+                error_msg = str(e)
             logger.error(f"SQL execution error: {error_msg}")
-            return {
-                "rows": [],
-                "row_count": 0,
-                "columns": [],
-                "error": error_msg
-            }
+            return self._result(error=error_msg)
 
+        truncated = len(rows_data) > self.max_rows
+        rows = [dict(zip(columns, row)) for row in rows_data[:self.max_rows]]
+        next_cursor = self.make_cursor(sql, params, offset + len(rows)) if truncated else None
+        logger.info(f"SQL executed successfully: {len(rows)} rows returned{' (truncated)' if truncated else ''}")
+        return self._result(rows, columns, truncated=truncated, next_cursor=next_cursor)
+
+    @staticmethod
+    def make_cursor(sql: str, params: Optional[Sequence[Any]], offset: int) -> str:
+        """Signed continuation token; signing keeps clients from submitting their own SQL."""
+        params = [p.isoformat() if isinstance(p, date) else p for p in params] if params else None
+        return signing.dumps({"sql": sql, "params": params, "offset": offset}, salt=CURSOR_SALT, compress=True)
+
+    def execute_cursor(self, token: str) -> Dict[str, Any]:
+        """
+        Fetch the page a `next_cursor` points at.
+
+        Raises:
+            signing.BadSignature: Tampered, malformed or expired (T2SQL_CURSOR_MAX_AGE seconds) token
+        """
+        payload = signing.loads(token, salt=CURSOR_SALT, max_age=int(os.getenv("T2SQL_CURSOR_MAX_AGE", "3600")))
+        return self.execute(payload["sql"], payload["params"], offset=payload["offset"])
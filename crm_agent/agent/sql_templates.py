@@ -0,0 +1,263 @@
+"""
+Rule-based fast path for the analytics questions T2SQL sees most: lead counts,
+optionally filtered by status, project and a date range, and grouped by status
+and/or project (the shapes seeded in VannaSeeder.get_training_examples).
+
+`parse_question` consumes the phrases it understands (count cue, group-by,
+statuses, known project names, date ranges) and only answers when every
+remaining word is filler. Anything else ("budget over 1M", "list", "campaigns")
+returns None and the question goes to Vanna, so a constraint is never silently
+dropped. SQL is parameterized (%s placeholders) for SQLExecutor.execute.
+
+Date ranges need a column cue: "contacted"/"spoken to" → last_conversation_date,
+"created"/"added" → created_at, and a cue without a range ("how many leads were
+contacted") falls back. "new" always means the New status. "status" and
+"project" are only accepted inside a group-by or right after a status / project
+name ("in FollowUp status", "the Beachgate project").
+"""
+import re
+import threading
+from calendar import monthrange
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from coreapp.models import ChangeCounter, Lead
+from coreapp.normalization import project_key
+from crm_agent.core.services import canonical_status
+
+TABLE = Lead._meta.db_table
+
+_COUNT = re.compile(r"\b(?:how many|count(?: of)?|number of|total(?: number of)?|tally of)\b")
+_SUBJECT = re.compile(r"\bleads?\b")
+
+_GROUP_FIELDS = {"status": "status", "statuses": "status", "project": "project_enquired", "projects": "project_enquired"}
+_GROUP = re.compile(
+    r"\b(?:by|per|for each|for every|in each|across|grouped by|broken down by|split by|breakdown by)\s+"
+    r"(status(?:es)?|projects?)(?:\s+(?:and|&)\s+(status(?:es)?|projects?))?\b"
+)
+
+_STATUS = re.compile(r"\b(new|connected|qualified|disqualified|follow[\s-]?ups?)(?:\s+status)?\b")
+
+_MONTHS = {
+    name: i for i, names in enumerate(
+        [("january", "jan"), ("february", "feb"), ("march", "mar"), ("april", "apr"), ("may",),
+         ("june", "jun"), ("july", "jul"), ("august", "aug"), ("september", "sep", "sept"),
+         ("october", "oct"), ("november", "nov"), ("december", "dec")], start=1)
+    for name in names
+}
+_MONTH_NAMES = "|".join(sorted(_MONTHS, key=len, reverse=True))
+_ISO = r"(\d{4}-\d{2}-\d{2})"
+_IN_MONTH = re.compile(rf"\b(?:in|during)\s+({_MONTH_NAMES})\s+(\d{{4}})\b")
+_IN_YEAR = re.compile(r"\b(?:in|during)\s+(\d{4})\b")
+_LAST_N = re.compile(r"\b(?:in\s+)?(?:the\s+)?(?:last|past)\s+(\d+)\s+(days?|weeks?|months?)\b")
+_RELATIVE = re.compile(r"\b(today|this week|this month|this year|last week|last month|last year)\b")
+_BETWEEN = re.compile(rf"\bbetween\s+{_ISO}\s+and\s+{_ISO}\b")
+_SINCE = re.compile(rf"\b(?:since|after|from)\s+{_ISO}\b")
+_BEFORE = re.compile(rf"\b(?:before|until)\s+{_ISO}\b")
+
+_DATE_COLUMNS = (
+    (re.compile(r"\b(?:last contacted|contacted|sp(?:oke|oken|eak) to|talk(?:ed)? to|reached|conversations?|followed up)\b"),
+     "last_conversation_date"),
+    (re.compile(r"\b(?:created|added|registered|received|came in|imported)\b"), "created_at"),
+)
+
+FILLER = frozenset("""
+    a about all am an and any are as asking at be been currently did do does enquired enquiring far
+    for from get give got had has have i in interested is it lead leads me now of on our overall
+    or please right s show so tell that the there these those to total us we
+    were what which who whose with
+""".split())
+
+
+def normalize(question: str) -> str:
+    """Lower-case, punctuation to spaces ('How many leads?' → 'how many leads')."""
+    return " ".join(re.sub(r"[^a-z0-9\-&]+", " ", question.lower()).split())
+
+
+def _months_before(day: date, months: int) -> date:
+    month = day.month - 1 - months
+    year, month = day.year + month // 12, month % 12 + 1
+    return date(year, month, min(day.day, monthrange(year, month)[1]))
+
+
+def _month_range(year: int, month: int) -> Tuple[date, date]:
+    """[first day, first day of next month)."""
+    start = date(year, month, 1)
+    return start, date(year + month // 12, month % 12 + 1, 1)
+
+
+def _relative_range(phrase: str, today: date) -> Tuple[date, date]:
+    tomorrow = today + timedelta(days=1)
+    if phrase == "today":
+        return today, tomorrow
+    if phrase == "this week":
+        return today - timedelta(days=today.weekday()), tomorrow
+    if phrase == "last week":
+        start = today - timedelta(days=today.weekday() + 7)
+        return start, start + timedelta(days=7)
+    if phrase == "this month":
+        return today.replace(day=1), tomorrow
+    if phrase == "last month":
+        start = _months_before(today.replace(day=1), 1)
+        return start, today.replace(day=1)
+    if phrase == "this year":
+        return date(today.year, 1, 1), tomorrow
+    return date(today.year - 1, 1, 1), date(today.year, 1, 1)  # last year
+
+
+def _consume(pattern: re.Pattern, text: str) -> Tuple[List[re.Match], str]:
+    matches = list(pattern.finditer(text))
+    return matches, pattern.sub(" ", text)
+
+
+def _date_range(text: str, today: date) -> Tuple[Optional[Tuple[Optional[date], Optional[date]]], str]:
+    """([start, end) with either side open, remaining text); (None, text) if no date phrase."""
+    found = []
+    matches, text = _consume(_IN_MONTH, text)
+    found += [_month_range(int(m.group(2)), _MONTHS[m.group(1)]) for m in matches]
+    matches, text = _consume(_IN_YEAR, text)
+    found += [(date(int(m.group(1)), 1, 1), date(int(m.group(1)) + 1, 1, 1)) for m in matches]
+    matches, text = _consume(_LAST_N, text)
+    for m in matches:
+        n, unit = int(m.group(1)), m.group(2).rstrip("s")
+        start = _months_before(today, n) if unit == "month" else today - timedelta(days=n * (7 if unit == "week" else 1))
+        found.append((start, None))
+    matches, text = _consume(_RELATIVE, text)
+    found += [_relative_range(m.group(1), today) for m in matches]
+    matches, text = _consume(_BETWEEN, text)
+    found += [(date.fromisoformat(m.group(1)), date.fromisoformat(m.group(2)) + timedelta(days=1)) for m in matches]
+    matches, text = _consume(_SINCE, text)
+    found += [(date.fromisoformat(m.group(1)), None) for m in matches]
+    matches, text = _consume(_BEFORE, text)
+    found += [(None, date.fromisoformat(m.group(1))) for m in matches]
+    if len(found) > 1:
+        raise ValueError("several date ranges")
+    return (found[0] if found else None), text
+
+
+def _projects(text: str, projects: Iterable[str]) -> Tuple[List[str], str]:
+    """Known project names mentioned in the text, by full name or a unique first word."""
+    # Matched in normalize()d form; the SQL parameter is the stored project_key
+    keys = {normalize(p): project_key(p) for p in projects if normalize(p)}
+    first_words: Dict[str, List[str]] = {}
+    for name, key in keys.items():
+        first_words.setdefault(name.split()[0], []).append(key)
+    found = []
+    for name in sorted(keys, key=len, reverse=True):
+        pattern = re.compile(rf"\b{re.escape(name)}(?:\s+project)?\b")
+        if pattern.search(text):
+            found.append(keys[name])
+            text = pattern.sub(" ", text)
+    for word, owners in first_words.items():
+        pattern = re.compile(rf"\b{re.escape(word)}(?:\s+project)?\b")
+        if len(owners) == 1 and len(word) >= 4 and word not in FILLER and owners[0] not in found and pattern.search(text):
+            found.append(owners[0])
+            text = pattern.sub(" ", text)
+    return found, text
+
+
+def parse_question(question: str, projects: Iterable[str] = (), today: Optional[date] = None) -> Optional[Dict[str, Any]]:
+    """
+    Parse a lead-count question into parameterized SQL.
+
+    Args:
+        question: Natural language question
+        projects: Known project names (see known_projects); only these are recognized
+        today: Reference day for relative ranges (defaults to date.today())
+
+    Returns:
+        {"intent": "count" | "count_by_status" | "count_by_project" | "count_by_status_project",
+         "sql": str, "params": list} or None when the question is outside the grammar
+    """
+    text = normalize(question)
+    if not _COUNT.search(text) or not _SUBJECT.search(text):
+        return None
+    text = _COUNT.sub(" ", text)
+
+    group_by = []
+    matches, text = _consume(_GROUP, text)
+    for m in matches:
+        for word in m.groups():
+            if word and _GROUP_FIELDS[word] not in group_by:
+                group_by.append(_GROUP_FIELDS[word])
+
+    project_keys, text = _projects(text, projects)
+
+    statuses = []
+    matches, text = _consume(_STATUS, text)
+    for m in matches:
+        word = m.group(1)
+        if word.startswith("follow"):
+            word = re.sub(r"[\s-]", "", word).rstrip("s")
+        status = canonical_status(word)
+        if status and status not in statuses:
+            statuses.append(status)
+
+    try:
+        date_range, text = _date_range(text, today or date.today())
+    except ValueError:
+        return None
+    date_column = None
+    for pattern, column in _DATE_COLUMNS:
+        if pattern.search(text):
+            if date_column is not None:
+                return None  # both "created" and "contacted"
+            date_column = column
+            text = pattern.sub(" ", text)
+    if date_range is not None and date_column is None:
+        return None  # "leads in March": created or contacted?
+    if date_column is not None and date_range is None:
+        return None  # "leads we contacted": a filter the templates can't express
+
+    if any(word not in FILLER for word in text.split()):
+        return None
+    if len(project_keys) > 1 and "project_enquired" not in group_by:
+        return None  # "beachgate vs emaar" without a breakdown is ambiguous
+
+    where, params = [], []
+    for column, values in (("status", statuses), ("project_key", project_keys)):
+        if len(values) == 1:
+            where.append(f"{column} = %s")
+            params.append(values[0])
+        elif values:
+            where.append(f"{column} IN ({', '.join(['%s'] * len(values))})")
+            params.extend(values)
+    if date_range is not None:
+        start, end = date_range
+        if start is not None:
+            where.append(f"{date_column} >= %s")
+            params.append(start)
+        if end is not None:
+            where.append(f"{date_column} < %s")
+            params.append(end)
+
+    if group_by:
+        columns = ", ".join(group_by)
+        sql = f"SELECT {columns}, COUNT(*) AS count FROM {TABLE}"
+    else:
+        sql = f"SELECT COUNT(*) AS total_leads FROM {TABLE}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    if group_by:
+        sql += f" GROUP BY {columns} ORDER BY count DESC"
+
+    if group_by:
+        intent = "count_by_" + "_".join("project" if c == "project_enquired" else c for c in group_by)
+    else:
+        intent = "count"
+    return {"intent": intent, "sql": sql, "params": params}
+
+
+_projects_cache: Tuple[Optional[int], List[str]] = (None, [])
+_projects_lock = threading.Lock()
+
+
+def known_projects() -> List[str]:
+    """Distinct project names in the lead table, reloaded when leads change."""
+    global _projects_cache
+    revision = ChangeCounter.current(Lead.REVISION_COUNTER)
+    with _projects_lock:
+        if _projects_cache[0] != revision:
+            names = Lead.objects.exclude(project_key="").values_list("project_enquired", flat=True).distinct()
+            _projects_cache = (revision, list(names))
+        return _projects_cache[1]
@@ -0,0 +1,329 @@
+"""
+Question → SQL → rows pipeline shared by POST /t2sql/query and the agent's t2sql node.
+
+Repeat questions skip Vanna: the question is normalized (case, whitespace,
+trailing punctuation) and looked up in `SQLCacheEntry` under the current
+`schema_version`, a hash of the corpus VannaSeeder trains on, so a migration
+that changes the Lead table or edited examples start a fresh cache. Cached SQL
+still runs through SQLExecutor. A pair is stored only after it executed without
+error, and an entry whose SQL no longer compiles against the schema (unknown
+column or table, syntax error) is dropped; timeouts and other runtime errors keep it.
+
+Paraphrases ("number of connected leads" for "how many leads are connected")
+go through a semantic tier: the question is embedded with the shared MiniLM
+model and compared with the stored question embeddings. A neighbour is reused
+only when cosine similarity reaches T2SQL_SEMANTIC_THRESHOLD (0.92 by default)
+and the two questions agree on their literals: the same numbers and lead
+statuses, and every string literal of the cached SQL appears in the new
+question. Otherwise "connected" vs "new" leads, which embed almost identically,
+would share SQL.
+
+Before any of that, counts and group-bys over status, project and date ranges
+are answered by the rule-based parser in agent/sql_templates.py with
+parameterized SQL ("cache": "template"); T2SQL_TEMPLATES=0 turns it off.
+`STATS` records which path answered and how long it took (GET /t2sql/stats).
+
+Set T2SQL_CACHE=0 to always generate, T2SQL_SEMANTIC_CACHE=0 for exact matches only.
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from datetime import date
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+import numpy as np
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from coreapp.models import ChangeCounter, Lead, SQLCacheEntry
+from crm_agent.agent.sql_executor import SQLExecutor
+from crm_agent.agent.sql_templates import known_projects, parse_question
+from crm_agent.agent.vanna_client import VannaClient
+from crm_agent.core.embeddings import get_embedder
+from crm_agent.core.index_eval import percentile
+from crm_agent.ingestion.vanna_seed import VannaSeeder
+
+logger = logging.getLogger(__name__)
+
+# Values of the "cache" field in responses
+CACHE_TEMPLATE = "template"
+CACHE_EXACT = "exact"
+CACHE_SEMANTIC = "semantic"
+CACHE_MISS = "miss"
+CACHE_OFF = "off"
+
+STATUS_WORDS = frozenset(value.lower() for value, _ in Lead.STATUS_CHOICES)
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+_SQL_STRING = re.compile(r"'((?:[^']|'')*)'")
+# SQLite / PostgreSQL errors meaning the SQL itself is stale, not that this run failed
+_STALE_SQL_ERROR = re.compile(
+    r"no such (?:column|table|function)|does not exist|syntax error|ambiguous column",
+    re.IGNORECASE,
+)
+
+
+def _flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+def cache_enabled() -> bool:
+    return _flag("T2SQL_CACHE", "1")
+
+
+def templates_enabled() -> bool:
+    return _flag("T2SQL_TEMPLATES", "1")
+
+
+def semantic_enabled() -> bool:
+    return cache_enabled() and _flag("T2SQL_SEMANTIC_CACHE", "1")
+
+
+def semantic_threshold() -> float:
+    return float(os.getenv("T2SQL_SEMANTIC_THRESHOLD", "0.92"))
+
+
+def normalize_question(question: str) -> str:
+    """'  How many Connected leads? ' → 'how many connected leads'."""
+    return " ".join(question.lower().split()).rstrip(" ?.!")
+
+
+def question_hash(question: str) -> str:
+    return hashlib.sha256(normalize_question(question).encode()).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _schema_version(vendor: str) -> str:
+    # The corpus is derived from model definitions, fixed for the life of the process
+    return VannaSeeder().schema_version()
+
+
+def schema_version() -> str:
+    return _schema_version(connection.vendor)
+
+
+def _literals(question: str) -> Tuple[Set[str], Set[str]]:
+    """(numbers, lead statuses) mentioned in the question."""
+    text = normalize_question(question)
+    return set(_NUMBER.findall(text)), set(re.findall(r"[a-z]+", text)) & STATUS_WORDS
+
+
+def literals_match(question: str, cached_question: str, cached_sql: str) -> bool:
+    """True if SQL written for `cached_question` can answer `question` verbatim."""
+    if _literals(question) != _literals(cached_question):
+        return False
+    text = normalize_question(question)
+    for literal in _SQL_STRING.findall(cached_sql):
+        value = literal.replace("''", "'").strip("%").lower()
+        if value and value not in text:
+            return False
+    return True
+
+
+def embed_question(question: str) -> Optional[np.ndarray]:
+    """Normalized float32 embedding, or None if the model can't be loaded."""
+    try:
+        return np.asarray(get_embedder().embed([normalize_question(question)])[0], dtype=np.float32)
+    except Exception as e:
+        logger.warning(f"Semantic SQL cache unavailable: {e}")
+        return None
+
+
+class _SemanticIndex:
+    """Embedding matrix of the cached questions for one schema version.
+
+    Reloaded when the SQLCacheEntry change counter moves (entries stored or dropped).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = (None, None)  # (revision, schema version)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.matrix = np.empty((0, 0), dtype=np.float32)
+
+    def _refresh(self, version: str) -> None:
+        state = (ChangeCounter.current(SQLCacheEntry.REVISION_COUNTER), version)
+        if state == self._state:
+            return
+        rows = (
+            SQLCacheEntry.objects.filter(schema_version=version, embedding__isnull=False)
+            .values_list("id", "embedding")
+        )
+        ids, vectors = [], []
+        for pk, blob in rows:
+            ids.append(pk)
+            vectors.append(np.frombuffer(bytes(blob), dtype=np.float32))
+        dims = {len(v) for v in vectors}
+        if len(dims) > 1:
+            # Embedding model changed; keep the most recent dimension
+            keep = len(vectors[-1])
+            ids, vectors = zip(*[(i, v) for i, v in zip(ids, vectors) if len(v) == keep])
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.matrix = np.vstack(vectors) if vectors else np.empty((0, 0), dtype=np.float32)
+        self._state = state
+
+    def nearest(self, embedding: np.ndarray, version: str) -> Tuple[Optional[int], float]:
+        """(entry id, cosine similarity) of the closest cached question."""
+        with self._lock:
+            self._refresh(version)
+            if not len(self.ids) or self.matrix.shape[1] != len(embedding):
+                return None, 0.0
+            scores = self.matrix @ embedding
+            best = int(np.argmax(scores))
+            return int(self.ids[best]), float(scores[best])
+
+
+_semantic_index = _SemanticIndex()
+
+
+def semantic_lookup(question: str, embedding: np.ndarray, version: str) -> Optional[SQLCacheEntry]:
+    """Closest cached pair that passes the similarity threshold and literal checks."""
+    pk, score = _semantic_index.nearest(embedding, version)
+    if pk is None or score < semantic_threshold():
+        return None
+    entry = SQLCacheEntry.objects.filter(pk=pk).first()
+    if entry is None or not literals_match(question, entry.question, entry.sql):
+        return None
+    logger.info(f"Semantic SQL cache hit ({score:.3f}): '{question[:50]}' ~ '{entry.question[:50]}'")
+    return entry
+
+
+class PipelineStats:
+    """Answers per path ("template", "exact", "semantic", "miss", "off") with latency
+    percentiles over the most recent `window` answers of each path."""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self.window = window
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts = Counter()
+            self.latencies: Dict[str, deque] = {}
+
+    def record(self, source: str, elapsed_ms: float) -> None:
+        with self._lock:
+            self.counts[source] += 1
+            self.latencies.setdefault(source, deque(maxlen=self.window)).append(elapsed_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            total = sum(self.counts.values())
+            return {
+                "questions": total,
+                "template_coverage": round(self.counts[CACHE_TEMPLATE] / total, 4) if total else 0.0,
+                "sources": {
+                    source: {
+                        "count": count,
+                        "share": round(count / total, 4),
+                        "p50_ms": round(percentile(self.latencies[source], 50), 2),
+                        "p95_ms": round(percentile(self.latencies[source], 95), 2),
+                    }
+                    for source, count in self.counts.most_common()
+                },
+            }
+
+
+STATS = PipelineStats()
+
+
+def _response(question: str, sql: str, summary: str, cache: str, exec_result: Optional[Dict] = None, error: Optional[str] = None, params=None) -> Dict[str, Any]:
+    exec_result = exec_result or {}
+    return {
+        "question": question,
+        "sql": sql,
+        "params": [p.isoformat() if isinstance(p, date) else p for p in params or []],
+        "rows": exec_result.get("rows", []),
+        "row_count": exec_result.get("row_count", 0),
+        "columns": exec_result.get("columns", []),
+        "truncated": exec_result.get("truncated", False),
+        "next_cursor": exec_result.get("next_cursor"),
+        "summary": summary,
+        "cache": cache,
+        "error": error,
+    }
+
+
+def answer_question(
+    question: str,
+    get_client: Callable[[], VannaClient],
+    executor: Optional[SQLExecutor] = None,
+) -> Dict[str, Any]:
+    """
+    Answer `question` from a template, the cache or Vanna, then execute the SQL read-only.
+
+    `get_client` is only called on a cache miss, so hits never build a Vanna client.
+
+    Returns:
+        {"question", "sql", "params", "rows", "row_count", "columns", "truncated",
+         "next_cursor", "summary",
+         "cache": "template" | "exact" | "semantic" | "miss" | "off", "error"}
+    """
+    started = time.perf_counter()
+    response = _answer(question, get_client, executor or SQLExecutor())
+    STATS.record(response["cache"], (time.perf_counter() - started) * 1000.0)
+    return response
+
+
+def _answer(question: str, get_client: Callable[[], VannaClient], executor: SQLExecutor) -> Dict[str, Any]:
+    if templates_enabled():
+        parsed = parse_question(question, known_projects())
+        if parsed is not None:
+            exec_result = executor.execute(parsed["sql"], parsed["params"] or None)
+            if not exec_result["error"]:
+                summary = f"Answered by the {parsed['intent']} template"
+                return _response(question, parsed["sql"], summary, CACHE_TEMPLATE, exec_result, params=parsed["params"])
+            logger.warning(f"Template SQL failed ({exec_result['error']}), falling back: {parsed['sql']}")
+
+    use_cache = cache_enabled()
+    entry, embedding = None, None
+    if use_cache:
+        key, version = question_hash(question), schema_version()
+        entry = SQLCacheEntry.objects.filter(question_hash=key, schema_version=version).first()
+        cache = CACHE_EXACT
+        if entry is None and semantic_enabled():
+            embedding = embed_question(question)
+            if embedding is not None:
+                entry = semantic_lookup(question, embedding, version)
+                cache = CACHE_SEMANTIC
+
+    if entry is not None:
+        sql, summary = entry.sql, entry.summary
+    else:
+        result = get_client().ask(question)
+        cache = CACHE_MISS if use_cache else CACHE_OFF
+        if result["error"]:
+            return _response(question, "", "", cache, error=result["error"])
+        sql, summary = result["sql"], result["summary"]
+
+    exec_result = executor.execute(sql)
+    if exec_result["error"]:
+        if entry is not None and _STALE_SQL_ERROR.search(exec_result["error"]):
+            logger.warning(f"Dropping cached SQL that no longer executes: {sql}")
+            entry.delete()
+            ChangeCounter.bump(SQLCacheEntry.REVISION_COUNTER)
+        return _response(question, sql, summary, cache, error=exec_result["error"])
+
+    if entry is not None:
+        SQLCacheEntry.objects.filter(pk=entry.pk).update(hits=F("hits") + 1, last_used_at=timezone.now())
+    if use_cache and cache != CACHE_EXACT:
+        # New phrasing (generated or semantic match) becomes an exact entry of its own
+        _, created = SQLCacheEntry.objects.get_or_create(
+            question_hash=key,
+            schema_version=version,
+            defaults={
+                "question": question,
+                "sql": sql,
+                "summary": summary,
+                "embedding": embedding.tobytes() if embedding is not None else None,
+            },
+        )
+        if created:
+            ChangeCounter.bump(SQLCacheEntry.REVISION_COUNTER)
+    return _response(question, sql, summary, cache, exec_result)
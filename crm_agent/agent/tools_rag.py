@@ -90,9 +90,8 @@ class RagTool:
         for m in matches:
             distance = m.get("distance", 0)
             # Convert distance to similarity (0-1 scale, where 1 is most similar)
-            # Cosine distance ranges from 0 (identical) to 2 (opposite)
-            # Normalize to 0-1 where 1 is best match
-            similarity = max(0.0, min(1.0, 1.0 - (distance / 2.0)))
+            # using the collection's distance function (l2 by default, or cosine/ip)
+            similarity = self.store.similarity(distance)
 
             project_name = m.get("metadata", {}).get("project_name")
 
@@ -0,0 +1,48 @@
+"""
+Process-wide VannaClient shared by /t2sql, the LangGraph agent and seeding.
+
+Constructing a VannaClient opens a ChromaDB client, loads its embedding
+function and builds an OpenAI client, so one instance is kept per configuration
+(chroma_dir, API key, model) and reused across requests and graph runs.
+
+Training data lives in ChromaDB and may be reseeded by another process (the
+seed_vanna_on_startup command, POST /t2sql/seed on another worker). Seeding
+calls `invalidate()`, which bumps the TRAINING_COUNTER `ChangeCounter`; clients
+built at an older generation are rebuilt on their next use.
+"""
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+from coreapp.models import ChangeCounter
+from crm_agent.agent.vanna_client import VannaClient
+
+logger = logging.getLogger(__name__)
+
+TRAINING_COUNTER = "vanna_training"
+
+_clients: Dict[Tuple[str, Optional[str], Optional[str]], Tuple[int, VannaClient]] = {}
+_lock = threading.Lock()
+
+
+def get_vanna_client(chroma_dir: str, groq_api_key: Optional[str] = None, model: Optional[str] = None) -> VannaClient:
+    """Shared client for this configuration, rebuilt after the training data changed."""
+    key = (chroma_dir, groq_api_key, model)
+    generation = ChangeCounter.current(TRAINING_COUNTER)
+    with _lock:
+        cached = _clients.get(key)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+        kwargs = {"model": model} if model else {}
+        client = VannaClient(chroma_dir=chroma_dir, groq_api_key=groq_api_key, **kwargs)
+        _clients[key] = (generation, client)
+        logger.info(f"VannaClient built for {chroma_dir} (training generation {generation})")
+        return client
+
+
+def invalidate() -> int:
+    """Mark the training data as changed in every process; returns the new generation."""
+    generation = ChangeCounter.bump(TRAINING_COUNTER)
+    with _lock:
+        _clients.clear()
+    return generation
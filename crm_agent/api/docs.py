@@ -4,13 +4,16 @@ from ninja.errors import HttpError
 from dotenv import load_dotenv
 
 import os
+import asyncio
 import hashlib
+import threading
 from typing import Optional
 
 from pypdf import PdfReader
 
 from crm_agent.core.pipelines.document_ingestion import DocumentIngestor
-from crm_agent.core.vector_store import ChromaStore
+from crm_agent.core.vector_store import ChromaStore, AsyncChromaStore
+from crm_agent.core.schemas import BatchSearchQuery
 
 load_dotenv()
 
@@ -20,11 +23,33 @@ CHROMA_DIR = os.getenv("CHROMA_DIR", "/home/hafdaoui/Documents/Proplens/crm_agen
 BROCHURES_DIR = os.getenv("BROCHURES_DIR", "/home/hafdaoui/Documents/Proplens/crm_agent/data/brochures")
 EMBED_MODEL = os.getenv("EMBED_MODEL", "all-MiniLM-L6-v2")
 OCR_LANG = os.getenv("OCR_LANG", "eng")
+CHROMA_STORE_WORKERS = int(os.getenv("CHROMA_STORE_WORKERS", "4"))
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "1"))
 
 os.makedirs(CHROMA_DIR, exist_ok=True)
 os.makedirs(BROCHURES_DIR, exist_ok=True)
 
 
+_async_store: Optional[AsyncChromaStore] = None
+_async_store_lock = threading.Lock()
+
+
+def _build_async_store() -> AsyncChromaStore:
+    global _async_store
+    with _async_store_lock:
+        if _async_store is None:
+            store = ChromaStore(persist_dir=CHROMA_DIR, collection="brochures", embed_model=EMBED_MODEL)
+            _async_store = AsyncChromaStore(store, max_workers=CHROMA_STORE_WORKERS, embed_workers=EMBED_WORKERS)
+    return _async_store
+
+
+async def _get_async_store() -> AsyncChromaStore:
+    """Shared store for async views; first call loads the model off the event loop."""
+    if _async_store is not None:
+        return _async_store
+    return await asyncio.to_thread(_build_async_store)
+
+
 def _sha256_file(path: str) -> str:
     h = hashlib.sha256()
     with open(path, "rb") as f:
@@ -54,10 +79,10 @@ def upload_brochures(request, files: list[UploadedFile] = File(...), project: st
 
     - Computes document_id = sha256(file).
     - If force=False and file already exists on disk, reuse; otherwise overwrite.
-    - Ingests pages → chunks → embeddings → Chroma upsert.
+    - Ingests pages → chunks → near-duplicate filter → embeddings → Chroma upsert.
     """
     ing = DocumentIngestor(persist_dir=CHROMA_DIR, embed_model=EMBED_MODEL, ocr_lang=OCR_LANG)
-    total_ins, total_pages, total_ocr = 0, 0, 0
+    total_ins, total_pages, total_ocr, total_near_dups = 0, 0, 0, 0
     results = []
 
     for f in files:
@@ -104,6 +129,7 @@ def upload_brochures(request, files: list[UploadedFile] = File(...), project: st
         total_ins += res["inserted_chunks"]
         total_pages += res["pages_processed"]
         total_ocr += res["ocr_pages"]
+        total_near_dups += res["near_duplicates_skipped"]
         results.append(res)
 
     return {
@@ -111,29 +137,62 @@ def upload_brochures(request, files: list[UploadedFile] = File(...), project: st
         "inserted_chunks": total_ins,
         "pages_processed": total_pages,
         "ocr_pages": total_ocr,
+        "near_duplicates_skipped": total_near_dups,
     }
 
 
+def _parse_fields(fields: Optional[str]) -> Optional[list[str]]:
+    if fields is None or not fields.strip():
+        return None
+    return [f.strip() for f in fields.split(",") if f.strip()]
+
+
 @router.get("/docs/search")
-def search_docs(request, q: str = Query(...), k: int = Query(4)):
+async def search_docs(request, q: str = Query(...), k: int = Query(4), fields: Optional[str] = Query(None), snippet: int = Query(0, ge=0, le=1000)):
     """Semantic search over ingested brochures. k defaults to 4 if not provided.
     
     Optional query params:
     - project: filter by project name (omit to search all projects)
+    - fields: comma-separated subset of text,metadata,distance (omit for all)
+    - snippet: add a snippet of up to N chars around the best-matching sentence
     """
     # Get project from raw query params to avoid Django Ninja parsing issues
     project = request.GET.get("project", "").strip()
     project_filter = project if project else None
-    store = ChromaStore(persist_dir=CHROMA_DIR, collection="brochures", embed_model=EMBED_MODEL)
-    hits = store.search(q, k=k, project_name=project_filter)
+    store = await _get_async_store()
+    try:
+        hits = await store.search(q, k=k, project_name=project_filter, fields=_parse_fields(fields), snippet_chars=snippet)
+    except ValueError as exc:
+        raise HttpError(400, str(exc))
     return {"matches": hits}
 
 
+@router.post("/docs/search/batch")
+async def search_docs_batch(request, payload: BatchSearchQuery):
+    """Run several semantic searches in one round trip.
+
+    All queries are embedded in a single model call; results are returned
+    in the same order as `items`. `fields` and `snippet_chars` apply to every item.
+    """
+    store = await _get_async_store()
+    queries = [{"q": it.q, "k": it.k, "project": it.project.strip() or None} for it in payload.items]
+    try:
+        hits = await store.search_batch(queries, fields=payload.fields, snippet_chars=payload.snippet_chars)
+    except ValueError as exc:
+        raise HttpError(400, str(exc))
+    return {
+        "results": [
+            {"q": it.q, "project": it.project.strip() or None, "matches": matches}
+            for it, matches in zip(payload.items, hits)
+        ]
+    }
+
+
 @router.get("/docs/count")
-def count_docs(request):
+async def count_docs(request):
     """Debug endpoint: check how many chunks are in ChromaDB."""
-    store = ChromaStore(persist_dir=CHROMA_DIR, collection="brochures", embed_model=EMBED_MODEL)
-    count = store.collection.count()
+    store = await _get_async_store()
+    count = await store.count()
     return {"total_chunks": count}
 
 
@@ -1,34 +1,70 @@
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from ninja import Router, File
 from ninja.files import UploadedFile
 from ninja.errors import HttpError
-from typing import List
+from typing import Dict, Iterator, List
+import json
 
+from coreapp.models import Lead
 from crm_agent.core.schemas import ImportResult, ShortlistFilters
-from crm_agent.ingestion.crm_loader import load_excel_to_db
-from crm_agent.core.services import shortlist_leads
+from crm_agent.ingestion.crm_loader import load_leads_file, READERS
+from crm_agent.core.services import lead_facets, shortlist_leads
+from crm_agent.core.summary_search import search_summaries
+from crm_agent.core.lead_index import get_lead_index
 
 router = Router(tags=["leads"])
 
+LEAD_FIELDS = ("id", "name", "email")
+STREAM_CHUNK_SIZE = 2000
+
 @router.post("/leads/import", response=ImportResult)
-def import_leads(request, file: UploadedFile = File(...)):
+def import_leads(request, file: UploadedFile = File(...), mode: str = "insert"):
+    """Import a CRM export (.xlsx, .csv or .parquet).
+
+    mode=insert adds new leads and skips crm_ids already present;
+    mode=upsert also updates leads whose fields changed since the last import.
+    """
     import tempfile, os
-    # Basic validation: only accept .xlsx files
+    if mode not in ("insert", "upsert"):
+        raise HttpError(400, "mode must be 'insert' or 'upsert'.")
+    # Basic validation: only accept spreadsheet/columnar exports
     filename = getattr(file, "name", "").lower()
-    if not filename.endswith(".xlsx"):
-        raise HttpError(400, "Please upload an .xlsx Excel file (not doc/docx/pdf).")
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp:
+    suffix = os.path.splitext(filename)[1]
+    if suffix not in READERS:
+        raise HttpError(400, "Please upload an .xlsx, .csv or .parquet file (not doc/docx/pdf).")
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
         for chunk in file.chunks():
             tmp.write(chunk)
         temp_path = tmp.name
     try:
-        inserted = load_excel_to_db(temp_path)
-        return {"inserted": inserted}
+        return load_leads_file(temp_path, upsert=(mode == "upsert"))
+    except ValueError as exc:
+        raise HttpError(400, str(exc))
     finally:
         try:
             os.remove(temp_path)
         except Exception:
             pass
 
+def _filters(payload: ShortlistFilters) -> dict:
+    return dict(
+        project_enquired=payload.project_enquired,
+        budget_min=payload.budget_min,
+        budget_max=payload.budget_max,
+        unit_types=payload.unit_type,
+        status=payload.status,
+        date_from=payload.date_from,
+        date_to=payload.date_to,
+        summary_query=payload.summary_query,
+    )
+
+
+def _index_for(filters: dict):
+    # The in-memory index has no summaries; full-text filters go to the database
+    return None if filters.get("summary_query") else get_lead_index()
+
 @router.post("/leads/shortlist")
 def shortlist(request, payload: ShortlistFilters):
     selected = [
@@ -40,19 +76,128 @@ def shortlist(request, payload: ShortlistFilters):
             payload.status,
             payload.date_from,
             payload.date_to,
+            payload.summary_query,
         ] if v not in (None, [], "")
     ]
     if len(selected) < 2:
         raise HttpError(400, "Provide at least two filters.")
 
-    qs = shortlist_leads(
-        project_enquired=payload.project_enquired,
-        budget_min=payload.budget_min,
-        budget_max=payload.budget_max,
-        unit_types=payload.unit_type,
-        status=payload.status,
-        date_from=payload.date_from,
-        date_to=payload.date_to,
-    )
-    leads = list(qs.values("id", "name", "email"))
-    return {"count": len(leads), "leads": leads}
\ No newline at end of file
+    filters = _filters(payload)
+    index = _index_for(filters)
+    if index is not None:
+        return _shortlist_from_index(request, index.shortlist(**filters), payload)
+
+    qs = shortlist_leads(**filters)
+    if payload.count_only:
+        return {"count": qs.count()}
+
+    # Keyset pagination on the primary key: each page is an index range scan,
+    # no OFFSET, and stable while new leads are imported
+    page = qs.order_by("id")
+    if payload.after_id is not None:
+        page = page.filter(id__gt=payload.after_id)
+
+    if payload.stream:
+        return _ndjson_response(request, _row_chunks(page))
+
+    leads = list(page.values(*LEAD_FIELDS)[:payload.limit + 1])
+    has_more = len(leads) > payload.limit
+    leads = leads[:payload.limit]
+    return {
+        "count": qs.count(),  # every match; leads holds this page
+        "leads": leads,
+        "next_after_id": leads[-1]["id"] if has_more else None,
+    }
+
+
+@router.post("/leads/facets")
+def facets(request, payload: ShortlistFilters):
+    """Lead counts by status, project, unit type and budget band for the given filters.
+
+    Any number of filters (including none) is accepted; paging fields are ignored.
+    Computed by one GROUP BY query, or from the in-memory index when LEAD_INDEX=1.
+    """
+    filters = _filters(payload)
+    index = _index_for(filters)
+    if index is not None:
+        return index.facets(**filters)
+    return lead_facets(shortlist_leads(**filters))
+
+def _row_chunks(qs) -> Iterator[List[Dict]]:
+    """Lead rows of an id-ordered queryset, one keyset query per chunk."""
+    after_id = None
+    while True:
+        page = qs if after_id is None else qs.filter(id__gt=after_id)
+        rows = list(page.values(*LEAD_FIELDS)[:STREAM_CHUNK_SIZE])
+        if rows:
+            yield rows
+        if len(rows) < STREAM_CHUNK_SIZE:
+            return
+        after_id = rows[-1]["id"]
+
+
+def _id_chunks(ids) -> Iterator[List[Dict]]:
+    """Lead rows for already-filtered ids, fetched in id order, a chunk at a time."""
+    for start in range(0, len(ids), STREAM_CHUNK_SIZE):
+        chunk = ids[start:start + STREAM_CHUNK_SIZE].tolist()
+        yield list(Lead.objects.filter(id__in=chunk).order_by("id").values(*LEAD_FIELDS))
+
+
+def _ndjson_response(request, chunks: Iterator[List[Dict]]) -> StreamingHttpResponse:
+    """Stream rows as NDJSON, fetching one chunk of rows at a time.
+
+    Under ASGI the body is an async generator that runs each chunk query through
+    sync_to_async; Django would otherwise buffer a sync iterator whole before sending.
+    """
+    def encode(rows):
+        return "".join(json.dumps(row) + "\n" for row in rows)
+
+    if isinstance(request, ASGIRequest):
+        async def body():
+            fetch = sync_to_async(next)
+            while True:
+                rows = await fetch(chunks, None)
+                if rows is None:
+                    return
+                yield encode(rows)
+        content = body()
+    else:
+        content = (encode(rows) for rows in chunks)
+    return StreamingHttpResponse(content, content_type="application/x-ndjson")
+
+
+def _shortlist_from_index(request, ids, payload: ShortlistFilters):
+    """Same responses as the database path, with filtering done by the in-memory LeadIndex."""
+    total = len(ids)
+    if payload.count_only:
+        return {"count": total}
+    if payload.after_id is not None:
+        ids = ids[ids > payload.after_id]
+    if payload.stream:
+        return _ndjson_response(request, _id_chunks(ids))
+    page = ids[:payload.limit]
+    leads = [row for rows in _id_chunks(page) for row in rows]
+    return {
+        "count": total,
+        "leads": leads,
+        "next_after_id": int(page[-1]) if len(ids) > payload.limit else None,
+    }
+
+
+@router.get("/leads/search")
+def search_leads(request, q: str, limit: int = 20, offset: int = 0):
+    """Full-text search over last conversation summaries, best match first.
+
+    Every word of `q` must appear (stemmed, case-insensitive). Page with
+    offset; next_offset is null on the last page.
+    """
+    if not q.strip():
+        raise HttpError(400, "q is required.")
+    if not 1 <= limit <= 100 or offset < 0:
+        raise HttpError(400, "limit must be 1-100 and offset >= 0.")
+    hits = search_summaries(q, limit=limit + 1, offset=offset)
+    return {
+        "query": q,
+        "results": hits[:limit],
+        "next_offset": offset + limit if len(hits) > limit else None,
+    }
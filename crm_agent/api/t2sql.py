@@ -1,12 +1,14 @@
 from ninja import Router
 from ninja.errors import HttpError
+from django.core import signing
 from dotenv import load_dotenv
 import os
 import logging
 
-from crm_agent.core.schemas import T2SQLQuery
-from crm_agent.agent.vanna_client import VannaClient
+from crm_agent.core.schemas import T2SQLPage, T2SQLQuery
 from crm_agent.agent.sql_executor import SQLExecutor
+from crm_agent.agent.vanna_pool import get_vanna_client, invalidate
+from crm_agent.agent.t2sql_service import STATS, answer_question
 
 load_dotenv()
 
@@ -28,60 +30,40 @@ def query_t2sql(request, payload: T2SQLQuery):
     - "How many leads total?"
     - "Show all Connected leads"
     - "Count leads by project"
+    
+    `cache` in the response says where the SQL came from: "template" (rule-based
+    parser, no LLM), "exact"/"semantic" (cache), "miss"/"off" (generated by Vanna).
+    
+    At most T2SQL_MAX_ROWS rows are returned; when more exist `truncated` is true
+    and `next_cursor` can be passed to /t2sql/next.
     """
     if not payload.question or not payload.question.strip():
         raise HttpError(400, "Question is required")
     
     try:
-        # Initialize Vanna client
-        vanna_client = VannaClient(
-            chroma_dir=CHROMA_DIR,
-            groq_api_key=GROQ_API_KEY,
-            model=GROQ_MODEL
+        # Common counts come from templates and repeat questions from the SQL cache
+        # (see agent/t2sql_service.py); the shared Vanna client is only built on a miss
+        return answer_question(
+            payload.question,
+            lambda: get_vanna_client(CHROMA_DIR, GROQ_API_KEY, GROQ_MODEL),
         )
         
-        # Generate SQL from question
-        result = vanna_client.ask(payload.question)
-        
-        if result["error"]:
-            return {
-                "question": payload.question,
-                "sql": "",
-                "rows": [],
-                "row_count": 0,
-                "summary": "",
-                "error": result["error"]
-            }
-        
-        # Execute SQL safely
-        executor = SQLExecutor()
-        exec_result = executor.execute(result["sql"])
-        
-        if exec_result["error"]:
-            return {
-                "question": payload.question,
-                "sql": result["sql"],
-                "rows": [],
-                "row_count": 0,
-                "summary": result["summary"],
-                "error": exec_result["error"]
-            }
-        
-        return {
-            "question": payload.question,
-            "sql": result["sql"],
-            "rows": exec_result["rows"],
-            "row_count": exec_result["row_count"],
-            "columns": exec_result["columns"],
-            "summary": result["summary"],
-            "error": None
-        }
-        
     except Exception as e:
         logger.error(f"T2SQL error: {str(e)}")
         raise HttpError(500, f"Internal error: {str(e)}")
 
 
+@router.post("/t2sql/next")
+def next_page(request, payload: T2SQLPage):
+    """
+    Continue a truncated result: the next T2SQL_MAX_ROWS rows of the same query.
+    """
+    try:
+        return SQLExecutor().execute_cursor(payload.cursor)
+    except signing.BadSignature:
+        raise HttpError(400, "Invalid or expired cursor")
+
+
 @router.post("/t2sql/seed")
 def seed_vanna(request):
     """
@@ -89,15 +71,13 @@ def seed_vanna(request):
     Run this once after deployment or when schema changes.
     """
     try:
-        vanna_client = VannaClient(
-            chroma_dir=CHROMA_DIR,
-            groq_api_key=GROQ_API_KEY,
-            model=GROQ_MODEL
-        )
+        vanna_client = get_vanna_client(CHROMA_DIR, GROQ_API_KEY, GROQ_MODEL)
         
         from crm_agent.ingestion.vanna_seed import VannaSeeder
         seeder = VannaSeeder(vanna_client)
         result = seeder.seed()
+        # Other workers rebuild their clients against the new training data
+        invalidate()
         
         return {
             "message": "Vanna seeded successfully",
@@ -109,3 +89,10 @@ def seed_vanna(request):
         logger.error(f"Vanna seeding error: {str(e)}")
         raise HttpError(500, f"Seeding error: {str(e)}")
 
+
+@router.get("/t2sql/stats")
+def t2sql_stats(request):
+    """
+    Answers per path since process start: template coverage and latency percentiles.
+    """
+    return STATS.snapshot()
@@ -14,6 +14,8 @@ from pathlib import Path
 import os
 from dotenv import load_dotenv
 
+from app.db_config import READONLY_ALIAS, database_config, readonly_config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -81,12 +83,12 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# SQLite file by default; set DATABASE_URL for PostgreSQL (see app/db_config.py).
+# 'readonly' is where SQLExecutor runs generated SQL.
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(os.getenv('DATABASE_URL', ''), BASE_DIR / 'db.sqlite3'),
 }
+DATABASES[READONLY_ALIAS] = readonly_config(DATABASES['default'], os.getenv('READONLY_DATABASE_URL', ''))
 
 
 # Password validation
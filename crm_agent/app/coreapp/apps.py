@@ -4,3 +4,18 @@ from django.apps import AppConfig
 class CoreappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'coreapp'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_migrate
+        from crm_agent.core.sqlite_tuning import configure_connection
+
+        connection_created.connect(configure_connection, dispatch_uid="coreapp.sqlite_tuning")
+        post_migrate.connect(_restore_fts_triggers, sender=self, dispatch_uid="coreapp.fts_triggers")
+
+
+def _restore_fts_triggers(sender, using="default", **kwargs):
+    # SQLite table rebuilds (AlterField on Lead, ...) drop the FTS sync triggers
+    from crm_agent.core.summary_search import ensure_fts_triggers
+
+    ensure_fts_triggers(using)
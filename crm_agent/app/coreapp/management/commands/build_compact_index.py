@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from crm_agent.core.vector_store import ChromaStore
+from crm_agent.core.index_snapshot import load_vectors, read_snapshot
+from crm_agent.core.compact_index import CompactIndex, DTYPES
+import os
+
+class Command(BaseCommand):
+    help = 'Build a compact (PCA + float16/int8) brochure vector index from Chroma or a snapshot'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Directory to write the index to')
+        parser.add_argument('--pca', type=int, default=0, help='Target dimensions (0 = keep all)')
+        parser.add_argument('--dtype', choices=DTYPES, default='int8')
+        parser.add_argument('--snapshot', help='Read vectors from an export_index snapshot instead of Chroma')
+        parser.add_argument('--collection', default='brochures')
+
+    def handle(self, *args, **options):
+        if options['snapshot']:
+            data = read_snapshot(options['snapshot'])
+        else:
+            chroma_dir = os.getenv("CHROMA_DIR", "/tmp/chroma")
+            embed_model = os.getenv("EMBED_MODEL", "all-MiniLM-L6-v2")
+            store = ChromaStore(persist_dir=chroma_dir, collection=options['collection'], embed_model=embed_model)
+            data = load_vectors(store)
+        if not data['ids']:
+            raise CommandError('No vectors to index')
+
+        index = CompactIndex.build(data, pca_dim=options['pca'] or None, dtype=options['dtype'])
+        index.save(options['output'])
+        full_mb = data['embeddings'].nbytes / (1024 * 1024)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✓ Indexed {len(data["ids"])} chunks to {options["output"]}: '
+                f'{index.codes.shape[1]}-d {options["dtype"]}, {index.nbytes / (1024 * 1024):.1f} MB '
+                f'scanned per query (float32: {full_mb:.1f} MB)'
+            )
+        )
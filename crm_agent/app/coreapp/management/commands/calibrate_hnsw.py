@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand, CommandError
+from crm_agent.core.vector_store import ChromaStore, hnsw_metadata
+from crm_agent.core.index_snapshot import load_vectors
+from crm_agent.core.index_eval import exact_top_k, recall_at_k, timed, summarize
+import chromadb
+from chromadb.config import Settings
+import json
+import os
+import random
+import uuid
+
+import numpy as np
+
+class Command(BaseCommand):
+    help = 'Sweep HNSW search ef over a held-out query set and report recall@k vs p50/p99 latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', help='Text file with one held-out query per line (default: sample chunk openings)')
+        parser.add_argument('--sample', type=int, default=200, help='Number of sampled queries when --queries is not given')
+        parser.add_argument('--k', type=int, default=4)
+        parser.add_argument('--ef', default='10,20,40,80,160,320', help='Comma-separated search ef values to try')
+        parser.add_argument('--space', default=None, help='Distance function (default: CHROMA_HNSW_SPACE or the collection\'s)')
+        parser.add_argument('--m', type=int, default=None, help='HNSW M (default: CHROMA_HNSW_M or Chroma default)')
+        parser.add_argument('--construction-ef', type=int, default=None)
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+        parser.add_argument('--collection', default='brochures')
+
+    def handle(self, *args, **options):
+        chroma_dir = os.getenv("CHROMA_DIR", "/tmp/chroma")
+        embed_model = os.getenv("EMBED_MODEL", "all-MiniLM-L6-v2")
+        store = ChromaStore(persist_dir=chroma_dir, collection=options['collection'], embed_model=embed_model)
+        data = load_vectors(store)
+        if not data['ids']:
+            raise CommandError('Collection is empty')
+
+        if options['queries']:
+            with open(options['queries'], encoding='utf-8') as f:
+                queries = [line.strip() for line in f if line.strip()]
+        else:
+            rng = random.Random(0)
+            texts = rng.sample(data['documents'], min(options['sample'], len(data['documents'])))
+            queries = [" ".join(t.split()[:12]) for t in texts]
+        k = options['k']
+        query_vectors = np.asarray(store.embedder.embed(queries), dtype=np.float32)
+
+        # Ground truth: exact nearest neighbours (all spaces rank unit vectors identically)
+        truth = exact_top_k(data['embeddings'], query_vectors, k)
+        expected = [[data['ids'][i] for i in row] for row in truth]
+
+        build = {
+            "space": options['space'] or store.hnsw.get("hnsw:space") or store.space,
+            "m": options['m'] or store.hnsw.get("hnsw:M"),
+            "construction_ef": options['construction_ef'] or store.hnsw.get("hnsw:construction_ef"),
+        }
+        client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False))
+        report = []
+        for ef in [int(e) for e in options['ef'].split(',')]:
+            name = f"calibrate_{uuid.uuid4().hex[:12]}"
+            collection = client.create_collection(name, metadata=hnsw_metadata(search_ef=ef, **build))
+            try:
+                for start in range(0, len(data['ids']), 1000):
+                    collection.add(
+                        ids=data['ids'][start:start + 1000],
+                        embeddings=data['embeddings'][start:start + 1000].tolist(),
+                    )
+                recalls, latencies = [], []
+                for vector, want in zip(query_vectors.tolist(), expected):
+                    res, ms = timed(collection.query, query_embeddings=[vector], n_results=k, include=["distances"])
+                    recalls.append(recall_at_k(res["ids"][0], want))
+                    latencies.append(ms)
+                report.append({"ef": ef, **summarize(recalls, latencies)})
+            finally:
+                client.delete_collection(name)
+
+        if options['json']:
+            self.stdout.write(json.dumps({"queries": len(queries), "k": k, "build": build, "results": report}, indent=2))
+            return
+        self.stdout.write(
+            f'{len(queries)} queries over {len(data["ids"])} chunks, k={k}, '
+            f'space={build["space"]} M={build["m"] or "default"} construction_ef={build["construction_ef"] or "default"}\n'
+        )
+        self.stdout.write(f'{"search_ef":>10}{"recall@k":>10}{"p50 ms":>10}{"p99 ms":>10}')
+        for row in report:
+            self.stdout.write(f'{row["ef"]:>10}{row["recall"]:>10.3f}{row["p50_ms"]:>10.3f}{row["p99_ms"]:>10.3f}')
+        self.stdout.write('\nSet CHROMA_HNSW_SEARCH_EF to the smallest ef that meets your recall target.')
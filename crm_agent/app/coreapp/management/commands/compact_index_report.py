@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+from crm_agent.core.vector_store import ChromaStore
+from crm_agent.core.index_snapshot import load_vectors
+from crm_agent.core.compact_index import CompactIndex, DTYPES
+from crm_agent.core.index_eval import recall_at_k, timed, summarize
+import json
+import os
+import random
+
+class Command(BaseCommand):
+    help = 'Compare compact index settings (PCA dims x storage dtype) against ChromaStore results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', help='Text file with one query per line (default: sample chunk openings)')
+        parser.add_argument('--sample', type=int, default=100, help='Number of sampled queries when --queries is not given')
+        parser.add_argument('--k', type=int, default=4)
+        parser.add_argument('--pca', default='0,192,128,64', help='Comma-separated dimensions (0 = no PCA)')
+        parser.add_argument('--dtype', default=','.join(DTYPES), help='Comma-separated storage dtypes')
+        parser.add_argument('--rescore', type=int, default=4, help='Candidates re-scored in float32 = k * rescore')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+        parser.add_argument('--collection', default='brochures')
+
+    def handle(self, *args, **options):
+        chroma_dir = os.getenv("CHROMA_DIR", "/tmp/chroma")
+        embed_model = os.getenv("EMBED_MODEL", "all-MiniLM-L6-v2")
+        store = ChromaStore(persist_dir=chroma_dir, collection=options['collection'], embed_model=embed_model)
+        data = load_vectors(store)
+        if not data['ids']:
+            raise CommandError('Collection is empty')
+
+        if options['queries']:
+            with open(options['queries'], encoding='utf-8') as f:
+                queries = [line.strip() for line in f if line.strip()]
+        else:
+            rng = random.Random(0)
+            texts = rng.sample(data['documents'], min(options['sample'], len(data['documents'])))
+            queries = [" ".join(t.split()[:12]) for t in texts]
+        k = options['k']
+        embeddings = store.embedder.embed(queries)
+
+        # Reference: what the Chroma collection returns today
+        baseline, chroma_ms = [], []
+        for emb in embeddings:
+            hits, ms = timed(store.search_by_embedding, emb, k=k, fields=["distance"])
+            baseline.append([h["id"] for h in hits])
+            chroma_ms.append(ms)
+        report = [{"setting": "chroma", **summarize([1.0] * len(queries), chroma_ms),
+                   "mb": round(data['embeddings'].nbytes / (1024 * 1024), 2)}]
+
+        for pca in [int(p) for p in options['pca'].split(',')]:
+            for dtype in [d.strip() for d in options['dtype'].split(',')]:
+                index = CompactIndex.build(data, pca_dim=pca or None, dtype=dtype)
+                recalls, latencies = [], []
+                for emb, expected in zip(embeddings, baseline):
+                    hits, ms = timed(index.search_by_embedding, emb, k=k, rescore=options['rescore'])
+                    recalls.append(recall_at_k([h["id"] for h in hits], expected))
+                    latencies.append(ms)
+                report.append({"setting": f"pca={pca or index.full.shape[1]} {dtype}",
+                               **summarize(recalls, latencies),
+                               "mb": round(index.nbytes / (1024 * 1024), 2)})
+
+        if options['json']:
+            self.stdout.write(json.dumps({"queries": len(queries), "k": k, "results": report}, indent=2))
+            return
+        self.stdout.write(f'{len(queries)} queries, recall@{k} vs ChromaStore results\n')
+        self.stdout.write(f'{"setting":<22}{"recall":>8}{"p50 ms":>10}{"p99 ms":>10}{"MB":>10}')
+        for row in report:
+            self.stdout.write(
+                f'{row["setting"]:<22}{row["recall"]:>8.3f}{row["p50_ms"]:>10.3f}{row["p99_ms"]:>10.3f}{row["mb"]:>10.2f}'
+            )
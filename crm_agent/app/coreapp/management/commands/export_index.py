@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from crm_agent.core.vector_store import ChromaStore
+from crm_agent.core.index_snapshot import export_snapshot
+import os
+
+class Command(BaseCommand):
+    help = 'Export the brochure vector index to a compressed snapshot file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Snapshot file to write (e.g. /data/brochures.npz)')
+        parser.add_argument('--collection', default='brochures')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        chroma_dir = os.getenv("CHROMA_DIR", "/tmp/chroma")
+        embed_model = os.getenv("EMBED_MODEL", "all-MiniLM-L6-v2")
+        store = ChromaStore(persist_dir=chroma_dir, collection=options['collection'], embed_model=embed_model)
+        if store.count() == 0:
+            raise CommandError(f'Collection "{options["collection"]}" in {chroma_dir} is empty')
+
+        header = export_snapshot(store, options['output'], batch_size=options['batch_size'])
+        size_mb = os.path.getsize(options['output']) / (1024 * 1024)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✓ Exported {header["count"]} chunks (dim={header["dim"]}) to {options["output"]} ({size_mb:.1f} MB)'
+            )
+        )
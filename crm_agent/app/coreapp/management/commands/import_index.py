@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from crm_agent.core.vector_store import ChromaStore
+from crm_agent.core.index_snapshot import import_snapshot
+import os
+import time
+
+class Command(BaseCommand):
+    help = 'Restore the brochure vector index from a snapshot written by export_index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('snapshot', help='Snapshot file to read')
+        parser.add_argument('--collection', default='brochures')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--replace', action='store_true', help='Drop the existing collection first')
+        parser.add_argument('--if-empty', action='store_true', help='Do nothing if the collection already has chunks')
+        parser.add_argument('--force', action='store_true', help='Import even if the embedding model differs')
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['snapshot']):
+            raise CommandError(f'Snapshot not found: {options["snapshot"]}')
+
+        chroma_dir = os.getenv("CHROMA_DIR", "/tmp/chroma")
+        embed_model = os.getenv("EMBED_MODEL", "all-MiniLM-L6-v2")
+        os.makedirs(chroma_dir, exist_ok=True)
+        store = ChromaStore(persist_dir=chroma_dir, collection=options['collection'], embed_model=embed_model)
+
+        if options['if_empty'] and store.count() > 0:
+            self.stdout.write(self.style.WARNING(f'⚠ Index already has {store.count()} chunks, skipping import'))
+            return
+
+        started = time.perf_counter()
+        try:
+            result = import_snapshot(
+                store,
+                options['snapshot'],
+                batch_size=options['batch_size'],
+                replace=options['replace'],
+                force=options['force'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✓ Imported {result["inserted"]} chunks in {time.perf_counter() - started:.1f}s '
+                f'(snapshot v{result["header"]["version"]}, model {result["header"]["embed_model"]})'
+            )
+        )
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from crm_agent.ingestion.crm_loader import load_leads_file, DEFAULT_BATCH_SIZE
+import os
+import time
+
+class Command(BaseCommand):
+    help = 'Import leads from a CRM export (.xlsx, .csv or .parquet), streaming in fixed-size batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CRM export file')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--upsert', action='store_true', help='Update existing leads matched on Lead ID')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'File not found: {path}')
+
+        started = time.perf_counter()
+
+        def report(done):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'  {done:,} rows ({done / elapsed:,.0f} rows/s)')
+
+        try:
+            counts = load_leads_file(path, batch_size=options['batch_size'], progress=report, upsert=options['upsert'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✓ Imported leads in {time.perf_counter() - started:.1f}s: '
+                f'{counts["inserted"]:,} inserted, {counts["updated"]:,} updated, {counts["unchanged"]:,} unchanged'
+            )
+        )
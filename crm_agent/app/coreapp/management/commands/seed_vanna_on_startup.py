@@ -1,5 +1,5 @@
 from django.core.management.base import BaseCommand
-from crm_agent.agent.vanna_client import VannaClient
+from crm_agent.agent.vanna_pool import get_vanna_client, invalidate
 from crm_agent.ingestion.vanna_seed import VannaSeeder
 import os
 
@@ -11,9 +11,10 @@ class Command(BaseCommand):
             chroma_dir = os.getenv("CHROMA_DIR", "/tmp/chroma")
             os.makedirs(chroma_dir, exist_ok=True)
             
-            vanna_client = VannaClient(chroma_dir=chroma_dir)
+            vanna_client = get_vanna_client(chroma_dir)
             seeder = VannaSeeder(vanna_client)
             result = seeder.seed()
+            invalidate()
             
             self.stdout.write(
                 self.style.SUCCESS(
@@ -0,0 +1,49 @@
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def dedupe_crm_ids(apps, schema_editor):
+    """Blank crm_id → NULL, then fold repeated imports of the same CRM lead into
+    the oldest row (messages and threads are re-pointed before deleting)."""
+    Lead = apps.get_model('coreapp', 'Lead')
+    Message = apps.get_model('coreapp', 'Message')
+    Thread = apps.get_model('coreapp', 'Thread')
+
+    Lead.objects.filter(crm_id='').update(crm_id=None)
+
+    dupes = (
+        Lead.objects.exclude(crm_id__isnull=True)
+        .values('crm_id')
+        .annotate(n=Count('id'), keep=Min('id'))
+        .filter(n__gt=1)
+    )
+    for row in dupes:
+        extra = Lead.objects.filter(crm_id=row['crm_id']).exclude(id=row['keep'])
+        Message.objects.filter(lead__in=extra).update(lead_id=row['keep'])
+        Thread.objects.filter(lead__in=extra).update(lead_id=row['keep'])
+        extra.delete()
+
+
+def restore_blank_crm_ids(apps, schema_editor):
+    Lead = apps.get_model('coreapp', 'Lead')
+    Lead.objects.filter(crm_id__isnull=True).update(crm_id='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coreapp', '0003_campaign_message_thread_threadmessage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='lead',
+            name='crm_id',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.RunPython(dedupe_crm_ids, restore_blank_crm_ids),
+        migrations.AddConstraint(
+            model_name='lead',
+            constraint=models.UniqueConstraint(fields=('crm_id',), name='coreapp_lead_crm_id_uniq'),
+        ),
+    ]
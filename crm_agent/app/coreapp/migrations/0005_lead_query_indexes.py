@@ -0,0 +1,33 @@
+# Generated by Django 5.1.2 on 2026-10-19 05:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coreapp', '0004_lead_crm_id_unique'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['status', 'last_conversation_date'], name='lead_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['project_enquired', 'status'], name='lead_project_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['budget_min'], name='lead_budget_min_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['budget_max'], name='lead_budget_max_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['last_conversation_date'], name='lead_last_conv_date_idx'),
+        ),
+    ]
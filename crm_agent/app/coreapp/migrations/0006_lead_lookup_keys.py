@@ -0,0 +1,80 @@
+import re
+
+from django.db import migrations, models
+
+# Frozen copy of the coreapp.normalization key functions as of this migration, so
+# later changes to them don't alter what this backfill writes
+_BEDROOMS = re.compile(r"^(\d+)\s*(?:bed(?:room)?s?|br|bhk|b/r|bd|bdr)$")
+_STUDIO = {"studio", "0br", "0 bed", "0 bedroom", "st", "studio apartment"}
+_WORD_NUMBERS = {"one": "1", "two": "2", "three": "3", "four": "4", "five": "5", "six": "6"}
+
+
+def _fold(value):
+    if value is None:
+        return ""
+    return " ".join(str(value).split()).casefold()
+
+
+def project_key(value):
+    return _fold(value)
+
+
+def unit_type_key(value):
+    text = _fold(value).replace("-", " ").replace("_", " ")
+    if not text:
+        return ""
+    words = text.split()
+    if words[0] in _WORD_NUMBERS:
+        words[0] = _WORD_NUMBERS[words[0]]
+    text = " ".join(words)
+    if text in _STUDIO:
+        return "studio"
+    match = _BEDROOMS.match(text)
+    if match:
+        n = int(match.group(1))
+        return "studio" if n == 0 else f"{n}br"
+    return text
+
+
+def backfill_lookup_keys(apps, schema_editor):
+    """Fill the normalized keys for leads imported before they existed."""
+    Lead = apps.get_model('coreapp', 'Lead')
+    batch = []
+    for lead in Lead.objects.only('id', 'project_enquired', 'unit_type').iterator(chunk_size=2000):
+        lead.project_key = project_key(lead.project_enquired)
+        lead.unit_type_key = unit_type_key(lead.unit_type)
+        batch.append(lead)
+        if len(batch) >= 2000:
+            Lead.objects.bulk_update(batch, ['project_key', 'unit_type_key'])
+            batch = []
+    if batch:
+        Lead.objects.bulk_update(batch, ['project_key', 'unit_type_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coreapp', '0005_lead_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='project_key',
+            field=models.CharField(blank=True, editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='unit_type_key',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.RunPython(backfill_lookup_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['project_key', 'status'], name='lead_project_key_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['unit_type_key'], name='lead_unit_type_key_idx'),
+        ),
+    ]
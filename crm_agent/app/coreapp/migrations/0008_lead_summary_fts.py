@@ -0,0 +1,66 @@
+from django.db import migrations
+
+# External-content FTS5 table over Lead.last_conversation_summary, kept in sync by
+# triggers so bulk imports, upserts and ORM updates all stay searchable.
+# SQLite only; other backends fall back to LIKE matching (crm_agent.core.summary_search).
+# Table rebuilds by later migrations drop the triggers; coreapp recreates them on
+# post_migrate (summary_search.ensure_fts_triggers).
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS coreapp_lead_fts USING fts5(
+        last_conversation_summary,
+        content='coreapp_lead',
+        content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS coreapp_lead_fts_ai AFTER INSERT ON coreapp_lead BEGIN
+        INSERT INTO coreapp_lead_fts(rowid, last_conversation_summary)
+        VALUES (new.id, new.last_conversation_summary);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS coreapp_lead_fts_ad AFTER DELETE ON coreapp_lead BEGIN
+        INSERT INTO coreapp_lead_fts(coreapp_lead_fts, rowid, last_conversation_summary)
+        VALUES ('delete', old.id, old.last_conversation_summary);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS coreapp_lead_fts_au AFTER UPDATE OF last_conversation_summary ON coreapp_lead BEGIN
+        INSERT INTO coreapp_lead_fts(coreapp_lead_fts, rowid, last_conversation_summary)
+        VALUES ('delete', old.id, old.last_conversation_summary);
+        INSERT INTO coreapp_lead_fts(rowid, last_conversation_summary)
+        VALUES (new.id, new.last_conversation_summary);
+    END
+    """,
+    # Index summaries of leads imported before this migration
+    "INSERT INTO coreapp_lead_fts(coreapp_lead_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS coreapp_lead_fts_au",
+    "DROP TRIGGER IF EXISTS coreapp_lead_fts_ad",
+    "DROP TRIGGER IF EXISTS coreapp_lead_fts_ai",
+    "DROP TABLE IF EXISTS coreapp_lead_fts",
+]
+
+
+def _run(statements):
+    def apply(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coreapp', '0007_lead_revision_counter'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(CREATE_SQL), _run(DROP_SQL)),
+    ]
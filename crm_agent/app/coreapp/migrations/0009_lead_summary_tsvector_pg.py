@@ -0,0 +1,27 @@
+from django.db import migrations
+
+# PostgreSQL counterpart of the SQLite FTS5 table from 0008: a GIN index over the
+# same expression crm_agent.core.summary_search filters on. No-op on other backends.
+CREATE_SQL = (
+    "CREATE INDEX IF NOT EXISTS coreapp_lead_summary_tsv_idx ON coreapp_lead "
+    "USING GIN (to_tsvector('english', last_conversation_summary))"
+)
+DROP_SQL = "DROP INDEX IF EXISTS coreapp_lead_summary_tsv_idx"
+
+
+def _run(sql):
+    def apply(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(sql)
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coreapp', '0008_lead_summary_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(CREATE_SQL), _run(DROP_SQL)),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.2 on 2026-10-19 06:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coreapp', '0009_lead_summary_tsvector_pg'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SQLCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question_hash', models.CharField(max_length=64)),
+                ('schema_version', models.CharField(max_length=16)),
+                ('question', models.TextField()),
+                ('sql', models.TextField()),
+                ('summary', models.TextField(blank=True)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('question_hash', 'schema_version'), name='sql_cache_question_version_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-19 06:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coreapp', '0010_sql_cache_entry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sqlcacheentry',
+            name='embedding',
+            field=models.BinaryField(null=True),
+        ),
+    ]
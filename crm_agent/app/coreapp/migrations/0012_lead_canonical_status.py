@@ -0,0 +1,31 @@
+import re
+
+from django.db import migrations
+
+# Frozen copy of coreapp.normalization.canonical_status as of this migration
+STATUSES = ("New", "Connected", "Qualified", "Disqualified", "FollowUp")
+_STATUS_KEYS = {status.casefold(): status for status in STATUSES}
+
+
+def canonical_status(value):
+    return _STATUS_KEYS.get(re.sub(r"[\s_-]+", "", str(value).casefold()))
+
+
+def canonicalize_statuses(apps, schema_editor):
+    """Rewrite 'connected' / 'CONNECTED ' etc. to the canonical spelling shortlists match on."""
+    Lead = apps.get_model('coreapp', 'Lead')
+    for status in list(Lead.objects.values_list('status', flat=True).distinct()):
+        canonical = canonical_status(status)
+        if canonical and canonical != status:
+            Lead.objects.filter(status=status).update(status=canonical)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coreapp', '0011_sql_cache_embedding'),
+    ]
+
+    operations = [
+        migrations.RunPython(canonicalize_statuses, migrations.RunPython.noop),
+    ]
@@ -1,19 +1,55 @@
 from django.db import models
 
 # Create your models here.
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from coreapp.normalization import LEAD_STATUSES, canonical_status, project_key, unit_type_key
+
+
+class ChangeCounter(models.Model):
+    """Monotonic revision per data set, bumped on every write so in-process
+    caches (see crm_agent.core.lead_index) can refresh incrementally."""
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    @classmethod
+    def current(cls, name: str) -> int:
+        return cls.objects.filter(name=name).values_list("value", flat=True).first() or 0
+
+    @classmethod
+    def bump(cls, name: str) -> int:
+        """Increment and return the new revision.
+
+        Call it inside the transaction that writes the rows it stamps, so readers
+        never see the new value before those rows are committed.
+        """
+        with transaction.atomic():
+            if not cls.objects.filter(name=name).update(value=F("value") + 1):
+                cls.objects.get_or_create(name=name)
+                cls.objects.filter(name=name).update(value=F("value") + 1)
+            return cls.objects.get(name=name).value
+
+
+class LeadQuerySet(models.QuerySet):
+    def delete(self):
+        # One counter bump per delete, however many rows it removes
+        with transaction.atomic(using=self.db):
+            deleted, per_model = super().delete()
+            if per_model.get(self.model._meta.label):
+                self.model.bump_for_delete()
+        return deleted, per_model
+
 
 class Lead(models.Model):
-    STATUS_CHOICES = [
-        ("New", "New"),
-        ("Connected", "Connected"),
-        ("Qualified", "Qualified"),
-        ("Disqualified", "Disqualified"),
-        ("FollowUp", "FollowUp"),
-    ]
+    REVISION_COUNTER = "lead"
+    # Bumped only by deletes, which leave no row for an incremental refresh to re-read
+    DELETE_COUNTER = "lead_delete"
 
-    # Optional CRM identifier from the spreadsheet
-    crm_id = models.CharField(max_length=64, blank=True)
+    STATUS_CHOICES = [(status, status) for status in LEAD_STATUSES]
+
+    # Optional CRM identifier from the spreadsheet. NULL when absent so the unique
+    # constraint only applies to leads that have one (re-imports upsert on it).
+    crm_id = models.CharField(max_length=64, blank=True, null=True)
     name = models.CharField(max_length=200)
     email = models.EmailField()
     country_code = models.CharField(max_length=10, blank=True)
@@ -26,8 +62,58 @@ class Lead(models.Model):
     last_conversation_summary = models.TextField(blank=True)
     project_enquired = models.CharField(max_length=200, blank=True)
 
+    # Derived lookup keys (see coreapp.normalization); kept in sync on save and import
+    project_key = models.CharField(max_length=200, blank=True, editable=False)
+    unit_type_key = models.CharField(max_length=100, blank=True, editable=False)
+    # ChangeCounter value of the write that last touched this lead
+    revision = models.BigIntegerField(default=0, db_index=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = LeadQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["crm_id"], name="coreapp_lead_crm_id_uniq"),
+        ]
+        # Matched to shortlist filters and the status/project group-bys T2SQL emits
+        indexes = [
+            models.Index(fields=["status", "last_conversation_date"], name="lead_status_date_idx"),
+            models.Index(fields=["project_enquired", "status"], name="lead_project_status_idx"),
+            models.Index(fields=["budget_min"], name="lead_budget_min_idx"),
+            models.Index(fields=["budget_max"], name="lead_budget_max_idx"),
+            models.Index(fields=["last_conversation_date"], name="lead_last_conv_date_idx"),
+            models.Index(fields=["project_key", "status"], name="lead_project_key_status_idx"),
+            models.Index(fields=["unit_type_key"], name="lead_unit_type_key_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Status filters match the stored spelling exactly (indexed), so store it canonical
+        self.status = canonical_status(self.status) or self.status
+        self.project_key = project_key(self.project_enquired)
+        self.unit_type_key = unit_type_key(self.unit_type)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = set(update_fields) | {"project_key", "unit_type_key", "revision"}
+        # The new revision becomes visible together with the row it stamps, so a
+        # refresh that sees the counter also sees the row
+        with transaction.atomic():
+            self.revision = ChangeCounter.bump(self.REVISION_COUNTER)
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            self.bump_for_delete()
+        return result
+
+    @classmethod
+    def bump_for_delete(cls) -> None:
+        """Record a delete; call it inside the delete's transaction. Deleted rows leave
+        nothing to re-read, so LeadIndex rebuilds when the delete counter moves."""
+        ChangeCounter.bump(cls.REVISION_COUNTER)
+        ChangeCounter.bump(cls.DELETE_COUNTER)
+
     def __str__(self) -> str:
         return f"{self.name} <{self.email}>"
 
@@ -101,4 +187,30 @@ class ThreadMessage(models.Model):
         ordering = ["created_at"]
 
     def __str__(self) -> str:
-        return f"{self.role}: {self.content[:50]}..."
\ No newline at end of file
+        return f"{self.role}: {self.content[:50]}..."
+
+
+class SQLCacheEntry(models.Model):
+    """Generated SQL that executed successfully, reused for repeat /t2sql questions
+    (see crm_agent.agent.t2sql_service)."""
+    REVISION_COUNTER = "sql_cache"
+
+    # sha256 of the normalized question; schema_version from VannaSeeder.schema_version()
+    question_hash = models.CharField(max_length=64)
+    schema_version = models.CharField(max_length=16)
+    question = models.TextField()
+    sql = models.TextField()
+    summary = models.TextField(blank=True)
+    # Normalized float32 question embedding for the semantic tier (NULL if none was computed)
+    embedding = models.BinaryField(null=True, editable=False)
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["question_hash", "schema_version"], name="sql_cache_question_version_uniq"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.question[:50]} → {self.sql[:50]}"
@@ -0,0 +1,53 @@
+"""
+Normalized lookup keys for Lead text columns.
+
+Shortlisting matches on these instead of icontains so SQLite can use an index.
+"""
+import re
+from typing import Optional
+
+# Lead.STATUS_CHOICES values; statuses are stored in this exact spelling
+LEAD_STATUSES = ("New", "Connected", "Qualified", "Disqualified", "FollowUp")
+
+# Canonical unit types; anything else is stored case-folded as typed
+STUDIO = "studio"
+UNIT_TYPE_KEYS = (STUDIO, "1br", "2br", "3br", "4br", "5br", "6br", "penthouse", "villa", "townhouse", "duplex")
+
+_BEDROOMS = re.compile(r"^(\d+)\s*(?:bed(?:room)?s?|br|bhk|b/r|bd|bdr)$")
+_STUDIO = {"studio", "0br", "0 bed", "0 bedroom", "st", "studio apartment"}
+_WORD_NUMBERS = {"one": "1", "two": "2", "three": "3", "four": "4", "five": "5", "six": "6"}
+_STATUS_KEYS = {status.casefold(): status for status in LEAD_STATUSES}
+
+
+def _fold(value) -> str:
+    if value is None:
+        return ""
+    return " ".join(str(value).split()).casefold()
+
+
+def project_key(value) -> str:
+    """'  Beachgate  by ADDRESS ' → 'beachgate by address'."""
+    return _fold(value)
+
+
+def unit_type_key(value) -> str:
+    """Map unit type spellings onto one key: '2 bed', '2BR', '2 Bedroom', 'two-bedroom' → '2br'."""
+    text = _fold(value).replace("-", " ").replace("_", " ")
+    if not text:
+        return ""
+    words = text.split()
+    if words[0] in _WORD_NUMBERS:
+        words[0] = _WORD_NUMBERS[words[0]]
+    text = " ".join(words)
+    if text in _STUDIO:
+        return STUDIO
+    match = _BEDROOMS.match(text)
+    if match:
+        n = int(match.group(1))
+        return STUDIO if n == 0 else f"{n}br"
+    return text
+
+
+def canonical_status(value) -> Optional[str]:
+    """' connected' / 'CONNECTED' → 'Connected', 'follow up' → 'FollowUp'; None for unknown statuses."""
+    return _STATUS_KEYS.get(re.sub(r"[\s_-]+", "", _fold(value)))
@@ -1,9 +1,12 @@
 """
 API endpoint tests for CRM Agent.
 """
+import asyncio
 import pytest
 import json
+from django.test import AsyncClient
 from django.urls import reverse
+from crm_agent.api import leads as leads_api
 
 
 class TestHealthAPI:
@@ -75,6 +78,82 @@ class TestLeadsAPI:
         )
         assert response.status_code == 400
 
+    def test_shortlist_keyset_pagination(self, authenticated_client, sample_leads):
+        """Test after_id/limit walk every match exactly once."""
+        filters = {'project_enquired': 'Beachgate by Address', 'status': 'Connected', 'limit': 2}
+        first = authenticated_client.post(
+            '/api/leads/shortlist', data=json.dumps(filters), content_type='application/json'
+        ).json()
+        assert first['count'] == 3
+        assert len(first['leads']) == 2
+        assert first['next_after_id'] == first['leads'][-1]['id']
+
+        second = authenticated_client.post(
+            '/api/leads/shortlist',
+            data=json.dumps({**filters, 'after_id': first['next_after_id']}),
+            content_type='application/json'
+        ).json()
+        assert second['count'] == 3
+        assert len(second['leads']) == 1
+        assert second['next_after_id'] is None
+        ids = [lead['id'] for lead in first['leads'] + second['leads']]
+        assert ids == sorted(lead.id for lead in sample_leads)
+
+    def test_shortlist_stream_ndjson(self, authenticated_client, sample_leads):
+        """Test stream mode returns one JSON object per line."""
+        response = authenticated_client.post(
+            '/api/leads/shortlist',
+            data=json.dumps({'project_enquired': 'Beachgate by Address', 'status': 'Connected', 'stream': True}),
+            content_type='application/json'
+        )
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'application/x-ndjson'
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        assert [json.loads(line)['email'] for line in lines] == [lead.email for lead in sample_leads]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_shortlist_stream_async_client(self, auth_token, sample_leads, monkeypatch):
+        """Test stream mode under ASGI sends each fetched chunk as it arrives."""
+        monkeypatch.setattr(leads_api, 'STREAM_CHUNK_SIZE', 2)
+
+        async def fetch():
+            client = AsyncClient(headers={'Authorization': f'Bearer {auth_token}'})
+            response = await client.post(
+                '/api/leads/shortlist',
+                data={'project_enquired': 'Beachgate by Address', 'status': 'Connected', 'stream': True},
+                content_type='application/json',
+            )
+            assert response.is_async
+            return [chunk async for chunk in response.streaming_content]
+
+        chunks = asyncio.run(fetch())
+        assert len(chunks) == 2
+        lines = b''.join(chunks).decode().splitlines()
+        assert [json.loads(line)['email'] for line in lines] == [lead.email for lead in sample_leads]
+
+    def test_shortlist_count_only(self, authenticated_client, sample_leads):
+        """Test count_only returns the match count without rows."""
+        response = authenticated_client.post(
+            '/api/leads/shortlist',
+            data=json.dumps({'project_enquired': 'Beachgate by Address', 'status': 'Connected', 'count_only': True}),
+            content_type='application/json'
+        )
+        assert response.json() == {'count': 3}
+
+    def test_lead_facets(self, authenticated_client, sample_leads):
+        """Test facets return every histogram for the filtered leads."""
+        response = authenticated_client.post(
+            '/api/leads/facets',
+            data=json.dumps({'status': 'Connected'}),
+            content_type='application/json'
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data['total'] == 3
+        assert data['facets']['project'] == {'beachgate by address': 3}
+        assert data['facets']['unit_type'] == {'2br': 3}
+        assert data['facets']['budget_band'] == {'1M-2M': 3}
+
     def test_shortlist_leads_without_auth(self, api_client):
         """Test shortlist without authentication returns 401."""
         response = api_client.post(
@@ -106,7 +185,39 @@ class TestDocsAPI:
         data = response.json()
         assert 'matches' in data
 
+    def test_docs_search_projection(self, authenticated_client):
+        """Test field selection drops chunk text and adds a snippet."""
+        response = authenticated_client.get('/api/docs/search?q=amenities&k=2&fields=metadata&snippet=80')
+        assert response.status_code == 200
+        for match in response.json()['matches']:
+            assert 'text' not in match
+            assert 'distance' not in match
+            assert len(match['snippet']) <= 80
+
+    def test_docs_search_unknown_field(self, authenticated_client):
+        """Test unknown projection fields are rejected."""
+        response = authenticated_client.get('/api/docs/search?q=amenities&fields=embedding')
+        assert response.status_code == 400
+
+    def test_docs_search_batch(self, authenticated_client):
+        """Test batch search returns one result set per item, in order."""
+        response = authenticated_client.post(
+            '/api/docs/search/batch',
+            data=json.dumps({
+                'items': [
+                    {'q': 'amenities', 'k': 2},
+                    {'q': 'payment plan', 'k': 3, 'project': 'Beachgate by Address'},
+                ]
+            }),
+            content_type='application/json'
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert [r['q'] for r in data['results']] == ['amenities', 'payment plan']
+        assert len(data['results'][0]['matches']) <= 2
+
 
+@pytest.mark.django_db(transaction=True, databases=["default", "readonly"])
 class TestT2SQLAPI:
     """Test Text-to-SQL endpoints."""
 
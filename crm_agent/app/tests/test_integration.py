@@ -104,6 +104,7 @@ class TestDocumentIngestionWorkflow:
             assert 'text' in match or 'metadata' in match
 
 
+@pytest.mark.django_db(transaction=True, databases=["default", "readonly"])
 class TestT2SQLWorkflow:
     """Test Text-to-SQL generation and execution."""
 
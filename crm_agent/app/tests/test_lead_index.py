@@ -0,0 +1,156 @@
+"""
+Unit tests for the in-memory columnar lead index.
+"""
+import datetime
+import threading
+import pandas as pd
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from coreapp.models import ChangeCounter, Lead
+from crm_agent.core.lead_index import LeadIndex
+from crm_agent.core.services import lead_facets, shortlist_leads
+from crm_agent.ingestion import crm_loader
+from crm_agent.ingestion.crm_loader import insert_frames
+
+
+@pytest.fixture
+def varied_leads(db):
+    """Leads spread over projects, unit types, statuses, budgets and dates (some NULL)."""
+    projects = ["Beachgate by Address", "Sky Tower", "Marina Vista"]
+    units = ["2 bed", "3BR", "Studio", "1 Bedroom"]
+    statuses = ["New", "Connected", "Qualified", "FollowUp"]
+    for i in range(40):
+        Lead.objects.create(
+            name=f"Lead {i}",
+            email=f"lead{i}@test.com",
+            project_enquired=projects[i % 3],
+            unit_type=units[i % 4],
+            status=statuses[i % 4],
+            budget_min=None if i % 7 == 0 else 800000 + i * 50000,
+            budget_max=None if i % 9 == 0 else 1200000 + i * 50000,
+            last_conversation_date=None if i % 5 == 0 else datetime.date(2024, 1, 1) + datetime.timedelta(days=i * 4),
+        )
+
+
+FILTER_CASES = [
+    {"project_enquired": "beachgate by address", "status": "connected"},
+    {"budget_min": 1500000, "budget_max": 2500000},
+    {"unit_types": ["2 Bedroom", "studio"], "status": "New"},
+    {"date_from": datetime.date(2024, 2, 1), "date_to": datetime.date(2024, 4, 1)},
+    {"project_enquired": "Sky Tower", "budget_min": 1000000, "date_to": datetime.date(2024, 3, 1)},
+    {"project_enquired": "Unknown", "status": "New"},
+]
+
+
+class TestLeadIndex:
+    """Test vectorized filtering and incremental refresh."""
+
+    @pytest.mark.parametrize("filters", FILTER_CASES)
+    def test_matches_database_shortlist(self, varied_leads, filters):
+        """Test the index returns exactly the ids shortlist_leads does."""
+        index = LeadIndex()
+        index.refresh()
+        expected = list(shortlist_leads(**filters).order_by("id").values_list("id", flat=True))
+        assert index.shortlist(**filters).tolist() == expected
+
+    def test_refresh_is_incremental(self, varied_leads):
+        """Test only leads written since the last refresh are re-read."""
+        index = LeadIndex()
+        assert index.refresh() == 40
+        assert index.refresh() == 0
+
+        lead = Lead.objects.get(name="Lead 1")
+        lead.status = "Disqualified"
+        lead.save()
+        insert_frames(iter([pd.DataFrame({"Lead name": ["New one"], "Email": ["new@test.com"], "Lead status": ["Disqualified"]})]))
+        assert index.refresh() == 2
+        assert len(index) == 41
+        expected = set(Lead.objects.filter(status="Disqualified").values_list("id", flat=True))
+        assert set(index.shortlist(status="disqualified").tolist()) == expected
+
+    def test_delete_triggers_rebuild(self, varied_leads):
+        """Test deleted leads disappear after the next refresh."""
+        index = LeadIndex()
+        index.refresh()
+        Lead.objects.filter(status="New").delete()
+        assert ChangeCounter.current(Lead.REVISION_COUNTER) > index.revision
+        index.refresh()
+        assert len(index) == Lead.objects.count()
+        assert index.shortlist(status="New").tolist() == []
+
+    def test_delete_bumps_once(self, varied_leads):
+        """Test a multi-row delete bumps the delete counter once, an empty one not at all."""
+        before = ChangeCounter.current(Lead.DELETE_COUNTER)
+        assert Lead.objects.filter(status="New").delete()[1]["coreapp.Lead"] == 10
+        assert ChangeCounter.current(Lead.DELETE_COUNTER) == before + 1
+        Lead.objects.filter(status="New").delete()
+        assert ChangeCounter.current(Lead.DELETE_COUNTER) == before + 1
+        Lead.objects.get(name="Lead 1").delete()
+        assert ChangeCounter.current(Lead.DELETE_COUNTER) == before + 2
+
+    def test_delete_and_insert_between_refreshes(self, varied_leads):
+        """Test a delete is noticed even when an insert keeps the row count unchanged."""
+        index = LeadIndex()
+        index.refresh()
+        deleted = Lead.objects.get(name="Lead 3")
+        deleted.delete()
+        Lead.objects.create(name="Replacement", email="r@test.com", status="FollowUp")
+        index.refresh()
+        assert len(index) == 40
+        assert deleted.id not in set(index.shortlist(status="FollowUp").tolist())
+
+    @pytest.mark.skipif(connection.vendor == "sqlite", reason="The in-memory SQLite test database locks tables across connections")
+    @pytest.mark.django_db(transaction=True)
+    def test_refresh_during_import_misses_nothing(self, monkeypatch):
+        """Test a refresh that runs while an import batch is mid-transaction
+        doesn't skip the batch's rows."""
+        Lead.objects.create(name="Existing", email="existing@test.com")
+        index = LeadIndex()
+        index.refresh()
+        stamped, refreshed = threading.Event(), threading.Event()
+        stamp = crm_loader._stamp
+
+        def pausing_stamp(payloads):
+            stamp(payloads)
+            stamped.set()
+            assert refreshed.wait(timeout=10)
+
+        def run_import():
+            try:
+                insert_frames(iter([pd.DataFrame({"Lead name": ["Imported"], "Email": ["imported@test.com"]})]))
+            finally:
+                connection.close()
+
+        monkeypatch.setattr(crm_loader, "_stamp", pausing_stamp)
+        importer = threading.Thread(target=run_import)
+        importer.start()
+        assert stamped.wait(timeout=10)
+        index.refresh()  # counter bumped, rows not committed yet
+        refreshed.set()
+        importer.join(timeout=10)
+
+        index.refresh()
+        assert sorted(index.shortlist().tolist()) == sorted(Lead.objects.values_list("id", flat=True))
+
+
+class TestFacets:
+    """Test one-pass facet histograms."""
+
+    def test_single_grouped_query(self, varied_leads):
+        """Test all four histograms come from one SQL query and add up."""
+        with CaptureQueriesContext(connection) as ctx:
+            result = lead_facets(shortlist_leads())
+        assert len(ctx.captured_queries) == 1
+        assert result["total"] == 40
+        for histogram in result["facets"].values():
+            assert sum(histogram.values()) == 40
+        assert result["facets"]["unit_type"] == {"1br": 10, "2br": 10, "3br": 10, "studio": 10}
+        assert result["facets"]["budget_band"]["unknown"] == 5
+
+    @pytest.mark.parametrize("filters", [{}] + FILTER_CASES)
+    def test_index_matches_database(self, varied_leads, filters):
+        """Test the LeadIndex pass returns the same histograms as SQL."""
+        index = LeadIndex()
+        index.refresh()
+        assert index.facets(**filters) == lead_facets(shortlist_leads(**filters))
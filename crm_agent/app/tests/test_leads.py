@@ -0,0 +1,220 @@
+"""
+Unit tests for lead import and shortlisting services.
+"""
+import datetime
+import importlib
+import numpy as np
+import pandas as pd
+import pytest
+from coreapp.models import Lead
+from coreapp.normalization import canonical_status, project_key, unit_type_key
+from django.apps import apps
+from crm_agent.core.services import shortlist_leads
+from crm_agent.ingestion.crm_loader import frame_to_payloads, insert_frames, load_excel_to_db, load_leads_file
+
+
+class TestExcelTransform:
+    """Test the column-wise CRM export transform."""
+
+    def test_parses_budgets_dates_and_strips_text(self):
+        """Test messy cells are coerced column-wise."""
+        df = pd.DataFrame({
+            " Lead name ": [" Ann ", "Bob"],
+            "Email": ["ann@test.com", "bob@test.com"],
+            "Min. Budget": ["1,200,000", "n/a"],
+            "Max Budget": [1500000, np.nan],
+            "Lead status": [" Connected", None],
+            "Last conversation date": ["2024-03-01", ""],
+            "Phone": [971501234567.0, np.nan],
+        })
+        first, second = frame_to_payloads(df)
+        assert first["name"] == "Ann"
+        assert first["budget_min"] == 1200000.0
+        assert first["budget_max"] == 1500000.0
+        assert first["status"] == "Connected"
+        assert first["last_conversation_date"] == datetime.date(2024, 3, 1)
+        assert first["phone"] == "971501234567"
+        assert second["budget_min"] is None
+        assert second["budget_max"] is None
+        assert second["status"] == "New"
+        assert second["last_conversation_date"] is None
+        assert second["phone"] == ""
+
+    def test_requires_name_and_email_columns(self):
+        """Test exports without name/email columns yield no rows."""
+        assert frame_to_payloads(pd.DataFrame({"Lead name": ["Ann"]})) == []
+
+
+def _write_export(path, rows, status="Connected"):
+    """Write a minimal CRM export with `rows` leads in the format implied by the suffix."""
+    frame = pd.DataFrame({
+        "Lead ID": [f"CRM-{i}" for i in range(rows)],
+        "Lead name": [f"Lead {i}" for i in range(rows)],
+        "Email": [f"lead{i}@test.com" for i in range(rows)],
+        "Project name": ["Beachgate by Address"] * rows,
+        "Unit type": ["2 bed"] * rows,
+        "Min. Budget": ["1,000,000"] * rows,
+        "Max Budget": [1500000] * rows,
+        "Lead status": [status] * rows,
+        "Last conversation date": ["2024-03-01"] * rows,
+    })
+    suffix = str(path).rsplit(".", 1)[-1]
+    if suffix == "csv":
+        frame.to_csv(path, index=False)
+    elif suffix == "parquet":
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_excel(path, index=False, engine="openpyxl")
+    return str(path)
+
+
+class TestStreamingImport:
+    """Test the read-only, batched Excel importer."""
+
+    def test_imports_in_batches_with_progress(self, db, tmp_path):
+        """Test every row lands and progress is reported per batch."""
+        path = _write_export(tmp_path / "leads.xlsx", 25)
+        seen = []
+        counts = load_excel_to_db(path, batch_size=10, progress=seen.append)
+        assert counts["inserted"] == 25
+        assert seen == [10, 20, 25]
+        assert Lead.objects.count() == 25
+        assert Lead.objects.get(crm_id="CRM-7").budget_min == 1000000
+
+    def test_rejects_non_excel_file(self, db, tmp_path):
+        """Test a non-xlsx file raises a clear error."""
+        path = tmp_path / "leads.xlsx"
+        path.write_text("not a workbook")
+        with pytest.raises(ValueError):
+            load_excel_to_db(str(path))
+
+
+class TestColumnarImport:
+    """Test the pyarrow CSV/Parquet fast path."""
+
+    @pytest.mark.parametrize("suffix", ["csv", "parquet"])
+    def test_imports_columnar_exports(self, db, tmp_path, suffix):
+        """Test CSV and Parquet exports map through the same headers as Excel."""
+        path = _write_export(tmp_path / f"leads.{suffix}", 12)
+        seen = []
+        counts = load_leads_file(path, batch_size=5, progress=seen.append)
+        assert counts["inserted"] == 12
+        assert seen[-1] == 12
+        lead = Lead.objects.get(crm_id="CRM-3")
+        assert lead.budget_min == 1000000
+        assert lead.budget_max == 1500000
+        assert lead.last_conversation_date == datetime.date(2024, 3, 1)
+
+    def test_csv_blank_cells_become_defaults(self, db, tmp_path):
+        """Test empty CSV cells are treated like empty Excel cells."""
+        path = tmp_path / "leads.csv"
+        path.write_text("Lead ID,Lead name,Email,Min. Budget,Lead status\nC-1,Ann,ann@t.com,,\n")
+        load_leads_file(str(path))
+        lead = Lead.objects.get(crm_id="C-1")
+        assert lead.budget_min is None
+        assert lead.status == "New"
+
+    def test_rejects_unknown_extension(self, db, tmp_path):
+        """Test unsupported file types raise a clear error."""
+        path = tmp_path / "leads.json"
+        path.write_text("[]")
+        with pytest.raises(ValueError):
+            load_leads_file(str(path))
+
+
+class TestUpsertImport:
+    """Test incremental re-imports keyed on crm_id."""
+
+    def test_reimport_does_not_duplicate(self, db, tmp_path):
+        """Test a second plain import skips leads already present."""
+        path = _write_export(tmp_path / "leads.xlsx", 5)
+        assert load_excel_to_db(path) == {"inserted": 5, "updated": 0, "unchanged": 0}
+        assert load_excel_to_db(path) == {"inserted": 0, "updated": 0, "unchanged": 5}
+        assert Lead.objects.count() == 5
+
+    def test_upsert_counts_changes(self, db, tmp_path):
+        """Test upsert reports inserted, updated and unchanged rows."""
+        load_excel_to_db(_write_export(tmp_path / "day1.xlsx", 3))
+        Lead.objects.filter(crm_id="CRM-2").update(status="New")
+
+        counts = load_excel_to_db(_write_export(tmp_path / "day2.xlsx", 5), upsert=True)
+        assert counts == {"inserted": 2, "updated": 1, "unchanged": 2}
+        assert Lead.objects.count() == 5
+        assert Lead.objects.get(crm_id="CRM-2").status == "Connected"
+
+    def test_leads_without_crm_id_are_inserted(self, db):
+        """Test blank crm_ids become NULL and never conflict."""
+        frame = pd.DataFrame({"Lead ID": ["", None], "Lead name": ["A", "B"], "Email": ["a@t.com", "b@t.com"]})
+        payloads = frame_to_payloads(frame)
+        assert [p["crm_id"] for p in payloads] == [None, None]
+
+
+class TestLookupKeys:
+    """Test normalized project/unit-type keys used for indexed shortlisting."""
+
+    @pytest.mark.parametrize("raw", ["2 bed", "2BR", "2 Bedroom", " two-bedroom ", "2 beds", "2BHK"])
+    def test_unit_type_variants_share_a_key(self, raw):
+        """Test common bedroom spellings fold to one canonical key."""
+        assert unit_type_key(raw) == "2br"
+
+    def test_studio_and_unknown_unit_types(self):
+        """Test studios are canonical and other values are case-folded as typed."""
+        assert unit_type_key("Studio") == "studio"
+        assert unit_type_key("0 bed") == "studio"
+        assert unit_type_key("  Sky  Villa ") == "sky villa"
+        assert unit_type_key(None) == ""
+
+    def test_project_key_is_case_and_space_folded(self):
+        """Test project names compare regardless of case or spacing."""
+        assert project_key("  Beachgate  by ADDRESS ") == "beachgate by address"
+
+    def test_keys_filled_on_save_and_import(self, db, tmp_path):
+        """Test both Lead.save and the bulk importer populate the keys."""
+        lead = Lead.objects.create(name="A", email="a@t.com", project_enquired="Beachgate by Address", unit_type="2 Bedroom")
+        assert (lead.project_key, lead.unit_type_key) == ("beachgate by address", "2br")
+        load_excel_to_db(_write_export(tmp_path / "leads.xlsx", 2))
+        imported = Lead.objects.get(crm_id="CRM-1")
+        assert (imported.project_key, imported.unit_type_key) == ("beachgate by address", "2br")
+
+    def test_shortlist_matches_normalized_keys(self, db):
+        """Test shortlist project/unit-type filters ignore case and spelling."""
+        Lead.objects.create(name="A", email="a@t.com", project_enquired="Beachgate by Address", unit_type="2 bed")
+        Lead.objects.create(name="B", email="b@t.com", project_enquired="Beachgate by Address", unit_type="3BR")
+        Lead.objects.create(name="C", email="c@t.com", project_enquired="Other Tower", unit_type="2BR")
+        qs = shortlist_leads(project_enquired="beachgate BY address", unit_types=["2 Bedroom"])
+        assert list(qs.values_list("name", flat=True)) == ["A"]
+
+
+class TestStatusCanonicalization:
+    """Test statuses are stored in the spelling exact status filters match."""
+
+    def test_canonical_status(self):
+        """Test case, spacing and separators fold onto STATUS_CHOICES values."""
+        assert canonical_status(" connected") == "Connected"
+        assert canonical_status("CONNECTED") == "Connected"
+        assert canonical_status("follow-up") == "FollowUp"
+        assert canonical_status("Hot") is None
+        assert canonical_status(None) is None
+
+    def test_save_and_import_store_canonical_status(self, db):
+        """Test Lead.save and the importer canonicalize, so status shortlists find every row."""
+        Lead.objects.create(name="A", email="a@t.com", status="connected")
+        frame = pd.DataFrame({
+            "Lead name": ["B", "C", "D"],
+            "Email": ["b@t.com", "c@t.com", "d@t.com"],
+            "Lead status": ["CONNECTED", "Follow up", "Hot"],
+        })
+        insert_frames(iter([frame]))
+        assert sorted(Lead.objects.values_list("status", flat=True)) == ["Connected", "Connected", "FollowUp", "Hot"]
+        assert shortlist_leads(status="Connected").count() == 2
+        assert shortlist_leads(status="hot").count() == 1
+
+    def test_migration_backfills_existing_rows(self, db):
+        """Test the data migration rewrites statuses stored before canonicalization."""
+        Lead.objects.create(name="A", email="a@t.com", status="Connected")
+        Lead.objects.create(name="B", email="b@t.com", status="New")
+        Lead.objects.filter(name="A").update(status="connected ")
+        Lead.objects.filter(name="B").update(status="Hot")
+        migration = importlib.import_module("coreapp.migrations.0012_lead_canonical_status")
+        migration.canonicalize_statuses(apps, None)
+        assert dict(Lead.objects.values_list("name", "status")) == {"A": "Connected", "B": "Hot"}
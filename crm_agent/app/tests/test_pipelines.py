@@ -0,0 +1,94 @@
+"""
+Unit tests for ingestion pipeline helpers.
+"""
+import pytest
+from crm_agent.core import vector_store
+from crm_agent.core.pipelines import document_ingestion
+from crm_agent.core.pipelines.dedup import MinHashDeduper
+from crm_agent.core.pipelines.document_ingestion import DocumentIngestor
+
+
+DISCLAIMER = (
+    "All rights reserved. Prices are subject to change without notice. Images are for "
+    "illustration purposes only and do not form part of any contract, offer or warranty. "
+    "Please contact the sales team for the latest availability and payment plan details."
+)
+
+FLOOR_PLANS = "Beachgate two bedroom units span 1,200 sq ft with a sea-facing balcony and a private storage room."
+AMENITIES = "Residents get an infinity pool, a fully equipped gym, a kids play area and covered parking."
+
+
+class FakeEmbedder:
+    def embed(self, texts):
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+class PageChunker:
+    """One chunk per page, so tests control chunk text exactly."""
+
+    def chunk(self, pages, project_name, source):
+        return [
+            {"text": p["text"], "metadata": {"project_name": project_name, "page": p["page"], "source": source}}
+            for p in pages
+        ]
+
+
+@pytest.fixture
+def ingestor(tmp_path, monkeypatch):
+    """DocumentIngestor over a temporary Chroma dir; `pdf_path` names a fake PDF whose pages are its texts."""
+    monkeypatch.setattr(vector_store, "get_embedder", lambda model: FakeEmbedder())
+    monkeypatch.setattr(document_ingestion, "get_embedder", lambda model: FakeEmbedder())
+    monkeypatch.setattr(document_ingestion, "TextChunker", PageChunker)
+    ingestor = DocumentIngestor(persist_dir=str(tmp_path / "chroma"), near_dup_threshold=0.7)
+    pdfs = {}
+    ingestor.extractor.extract_pages = lambda path: [
+        {"page": i, "text": text, "has_ocr": False} for i, text in enumerate(pdfs[path], start=1)
+    ]
+    ingestor.pdfs = pdfs
+    return ingestor
+
+
+class TestMinHashDeduper:
+    """Test near-duplicate detection used at brochure ingest."""
+
+    def test_detects_near_duplicate(self):
+        """Test a lightly edited chunk matches the original."""
+        deduper = MinHashDeduper(threshold=0.7)
+        deduper.add("a", DISCLAIMER)
+        matches = deduper.query(DISCLAIMER.replace("latest", "current"))
+        assert [key for key, _ in matches] == ["a"]
+
+    def test_ignores_unrelated_text(self):
+        """Test distinct content is not flagged."""
+        deduper = MinHashDeduper(threshold=0.8)
+        deduper.add("a", DISCLAIMER)
+        assert deduper.query("Beachgate offers a pool, a gym and sea views from every two bedroom unit.") == []
+
+    def test_rejects_invalid_threshold(self):
+        """Test threshold must be a Jaccard similarity."""
+        with pytest.raises(ValueError):
+            MinHashDeduper(threshold=1.5)
+
+
+class TestIngestNearDuplicates:
+    """Test near-duplicate chunks are skipped per project at ingest."""
+
+    def test_skips_near_duplicates_within_project_only(self, ingestor):
+        """Test a repeated disclaimer is skipped in its project but kept for another one and on re-ingest."""
+        ingestor.pdfs.update({
+            "v1.pdf": [FLOOR_PLANS, DISCLAIMER],
+            "v2.pdf": [DISCLAIMER.replace("latest", "current"), AMENITIES],
+            "emaar.pdf": [DISCLAIMER],
+        })
+        first = ingestor.ingest_pdf("v1.pdf", "Beachgate")
+        assert (first["inserted_chunks"], first["near_duplicates_skipped"]) == (2, 0)
+
+        second = ingestor.ingest_pdf("v2.pdf", "Beachgate")
+        assert (second["inserted_chunks"], second["near_duplicates_skipped"]) == (1, 1)
+
+        other = ingestor.ingest_pdf("emaar.pdf", "Emaar Creek")
+        assert (other["inserted_chunks"], other["near_duplicates_skipped"]) == (1, 0)
+
+        again = ingestor.ingest_pdf("v1.pdf", "Beachgate")
+        assert (again["inserted_chunks"], again["near_duplicates_skipped"]) == (2, 0)
+        assert ingestor.store.count() == 4
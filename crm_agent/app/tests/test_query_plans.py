@@ -0,0 +1,86 @@
+"""
+EXPLAIN QUERY PLAN checks for the Lead hot paths (SQLite only).
+"""
+import datetime
+import pytest
+from django.db import connection
+from django.db.models import Count
+from coreapp.models import Lead
+from crm_agent.core.services import shortlist_leads
+
+pytestmark = pytest.mark.skipif(connection.vendor != "sqlite", reason="EXPLAIN QUERY PLAN is SQLite syntax")
+
+
+def _plan(queryset_or_sql, params=()):
+    """Return the query plan detail lines for a queryset or raw SQL."""
+    if isinstance(queryset_or_sql, str):
+        sql = queryset_or_sql
+    else:
+        sql, params = queryset_or_sql.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def _assert_uses_index(plan, *names):
+    """Assert the plan reads coreapp_lead through one of `names` and never full-scans it."""
+    lead_steps = [step for step in plan if "coreapp_lead" in step]
+    assert lead_steps, plan
+    for step in lead_steps:
+        assert step.startswith("SEARCH") or "INDEX" in step, plan
+    assert any(name in step for step in lead_steps for name in names), plan
+
+
+class TestShortlistPlans:
+    """Test shortlist filter combinations are served by an index."""
+
+    def test_status_and_date_range(self, db):
+        """Test status + date window uses the composite status/date index."""
+        qs = shortlist_leads(status="connected", date_from=datetime.date(2024, 1, 1), date_to=datetime.date(2024, 6, 30))
+        _assert_uses_index(_plan(qs), "lead_status_date_idx")
+
+    def test_status_alone(self, db):
+        """Test a case-insensitive status filter still hits the index."""
+        _assert_uses_index(_plan(shortlist_leads(status="QUALIFIED")), "lead_status_date_idx")
+
+    def test_budget_range(self, db):
+        """Test budget overlap filters use a budget index."""
+        qs = shortlist_leads(budget_min=1_000_000, budget_max=2_000_000)
+        _assert_uses_index(_plan(qs), "lead_budget_min_idx", "lead_budget_max_idx")
+
+    def test_project_and_status(self, db):
+        """Test a project filter is an equality lookup on the normalized key."""
+        qs = shortlist_leads(project_enquired="Beachgate by Address", status="Connected")
+        _assert_uses_index(_plan(qs), "lead_project_key_status_idx")
+
+    def test_unit_types(self, db):
+        """Test unit-type variants become an IN lookup on the unit type key."""
+        qs = shortlist_leads(unit_types=["2 bed", "3BR"])
+        _assert_uses_index(_plan(qs), "lead_unit_type_key_idx")
+
+    def test_date_range(self, db):
+        """Test a date window uses the last conversation date index."""
+        qs = shortlist_leads(date_from=datetime.date(2024, 1, 1), date_to=datetime.date(2024, 6, 30))
+        _assert_uses_index(_plan(qs), "lead_last_conv_date_idx", "lead_status_date_idx")
+
+
+class TestAnalyticsPlans:
+    """Test the status/project aggregations T2SQL produces avoid table scans."""
+
+    def test_group_by_status(self, db):
+        """Test counting leads per status walks the status index."""
+        qs = Lead.objects.values("status").annotate(n=Count("id"))
+        _assert_uses_index(_plan(qs), "lead_status_date_idx")
+
+    def test_group_by_project_and_status(self, db):
+        """Test the project/status breakdown is covered by its composite index."""
+        sql = (
+            "SELECT project_enquired, status, COUNT(*) FROM coreapp_lead "
+            "GROUP BY project_enquired, status"
+        )
+        _assert_uses_index(_plan(sql), "lead_project_status_idx")
+
+    def test_project_status_filter(self, db):
+        """Test an exact project + status lookup uses the composite index."""
+        sql = "SELECT COUNT(*) FROM coreapp_lead WHERE project_enquired = %s AND status = %s"
+        _assert_uses_index(_plan(sql, ["Beachgate by Address", "Connected"]), "lead_project_status_idx")
@@ -0,0 +1,48 @@
+"""
+Unit tests for search result snippets.
+"""
+from crm_agent.core.snippets import extract_snippet
+
+LONG_SENTENCE = (
+    "The tower offers " + "spacious layouts and bright interiors " * 6
+    + "with a rooftop pool " + "overlooking the marina and the old town " * 6
+)
+
+
+class TestExtractSnippet:
+    """Test sentence choice and the length cap."""
+
+    def test_short_text_is_returned_whole(self):
+        """Test text within the limit comes back unchanged, whatever the query."""
+        assert extract_snippet("  Sea view.  ", "parking", max_chars=50) == "Sea view."
+        assert extract_snippet("", "pool") == ""
+        assert extract_snippet("Sea view.", "pool", max_chars=0) == ""
+
+    def test_best_matching_sentence(self):
+        """Test the sentence with the most query terms wins and is padded with the next ones."""
+        text = "Prices start at 2M. The gym and pool are on level 3. Parking is free. Handover is 2026."
+        assert extract_snippet(text, "pool gym", max_chars=50) == "The gym and pool are on level 3. Parking is free."
+
+    def test_no_match_falls_back_to_first_sentence(self):
+        """Test a query with no matching term returns the opening sentences."""
+        text = "Prices start at 2M. The gym is on level 3. Parking is free."
+        assert extract_snippet(text, "helipad", max_chars=40) == "Prices start at 2M."
+
+    def test_long_sentence_window_respects_cap(self):
+        """Test a cut sentence stays within max_chars including its ellipses."""
+        for limit in (7, 20, 60, 120):
+            snippet = extract_snippet(LONG_SENTENCE, "rooftop pool", max_chars=limit)
+            assert len(snippet) <= limit
+        snippet = extract_snippet(LONG_SENTENCE, "rooftop pool", max_chars=60)
+        assert snippet.startswith("...") and snippet.endswith("...")
+        assert "rooftop pool" in snippet
+        assert len(extract_snippet(LONG_SENTENCE, "pool", max_chars=4)) == 4
+
+    def test_match_at_start_or_end(self):
+        """Test a window at either end of a sentence only gets an ellipsis on the cut side."""
+        start = extract_snippet(LONG_SENTENCE, "tower", max_chars=60)
+        assert start.startswith("The tower") and start.endswith("...")
+        assert len(start) <= 60
+        end = extract_snippet(LONG_SENTENCE + "near the beach", "beach", max_chars=60)
+        assert end.startswith("...") and end.endswith("near the beach")
+        assert len(end) <= 60
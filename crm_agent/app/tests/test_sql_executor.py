@@ -0,0 +1,114 @@
+"""
+Unit tests for the read-only SQL executor.
+"""
+from datetime import date
+
+import pytest
+from django.core import signing
+from django.db import DatabaseError, connections
+from django.db.utils import ConnectionHandler
+from app.db_config import readonly_config, sqlite_config
+from coreapp.models import Lead
+from crm_agent.agent.sql_executor import SQLExecutor
+
+
+class TestReadOnlyExecutor:
+    """Test generated SQL runs on the read-only alias."""
+
+    # transaction=True: the mirror is a second connection and only sees committed rows
+    @pytest.mark.django_db(transaction=True, databases=["default", "readonly"])
+    def test_defaults_to_readonly_alias(self):
+        """Test the executor targets 'readonly' and sees committed lead data."""
+        Lead.objects.create(name="Ann", email="ann@test.com", status="Connected")
+        executor = SQLExecutor()
+        assert executor.using == "readonly"
+        result = executor.execute("SELECT name FROM coreapp_lead WHERE status = 'Connected'")
+        assert result["error"] is None
+        assert result["rows"] == [{"name": "Ann"}]
+
+    def test_unknown_alias_falls_back_to_default(self):
+        """Test a missing alias degrades to the default database."""
+        assert SQLExecutor(using="replica-not-configured").using == "default"
+
+    def test_sqlite_readonly_connection_refuses_writes(self, tmp_path, django_db_blocker):
+        """Test mode=ro + query_only block writes even if validation were bypassed."""
+        default = sqlite_config(tmp_path / "crm.sqlite3")
+        handler = ConnectionHandler({"default": default, "readonly": readonly_config(default)})
+        with django_db_blocker.unblock():
+            try:
+                with handler["default"].cursor() as cursor:
+                    cursor.execute("CREATE TABLE t (x INTEGER)")
+                    cursor.execute("INSERT INTO t VALUES (1)")
+                with handler["readonly"].cursor() as cursor:
+                    cursor.execute("SELECT COUNT(*) FROM t")
+                    assert cursor.fetchone()[0] == 1
+                    cursor.execute("PRAGMA query_only")
+                    assert cursor.fetchone()[0] == 1
+                    with pytest.raises(DatabaseError):
+                        cursor.execute("INSERT INTO t VALUES (2)")
+            finally:
+                handler.close_all()
+
+
+@pytest.mark.django_db(transaction=True, databases=["default", "readonly"])
+class TestBoundedExecutor:
+    """Test row caps, continuation cursors and the time limit."""
+
+    ENDLESS_SQL = (
+        "SELECT COUNT(*) AS n FROM (WITH RECURSIVE c(x) AS "
+        "(SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT x FROM c) AS endless"
+    )
+
+    @pytest.fixture
+    def leads(self):
+        Lead.objects.bulk_create(
+            Lead(name=f"Lead {i}", email=f"lead{i}@test.com", status="Connected", last_conversation_date=date(2024, 3, 1 + i))
+            for i in range(7)
+        )
+
+    def test_row_cap_sets_truncated_and_cursor(self, leads):
+        """Test results stop at max_rows and say more rows exist."""
+        result = SQLExecutor(max_rows=3, fetch_size=2).execute("SELECT name FROM coreapp_lead ORDER BY id")
+        assert result["row_count"] == 3
+        assert result["truncated"] is True
+        assert result["next_cursor"]
+        assert [r["name"] for r in result["rows"]] == ["Lead 0", "Lead 1", "Lead 2"]
+
+    def test_cursor_pages_through_all_rows(self, leads):
+        """Test following next_cursor returns every row exactly once."""
+        executor = SQLExecutor(max_rows=3)
+        result = executor.execute(
+            "SELECT name FROM coreapp_lead WHERE last_conversation_date >= %s ORDER BY id",
+            [date(2024, 3, 1)],
+        )
+        names = [r["name"] for r in result["rows"]]
+        while result["next_cursor"]:
+            result = executor.execute_cursor(result["next_cursor"])
+            assert result["error"] is None
+            names += [r["name"] for r in result["rows"]]
+        assert names == [f"Lead {i}" for i in range(7)]
+        assert result["truncated"] is False
+
+    def test_exact_fit_is_not_truncated(self, leads):
+        """Test a result of exactly max_rows rows has no continuation."""
+        result = SQLExecutor(max_rows=7).execute("SELECT id FROM coreapp_lead")
+        assert result["row_count"] == 7
+        assert result["truncated"] is False and result["next_cursor"] is None
+
+    def test_tampered_cursor_is_rejected(self, leads):
+        """Test clients can't smuggle their own SQL through a cursor."""
+        token = SQLExecutor(max_rows=1).execute("SELECT id FROM coreapp_lead")["next_cursor"]
+        with pytest.raises(signing.BadSignature):
+            SQLExecutor().execute_cursor(token[:-2] + "xx")
+
+    def test_timeout_interrupts_long_query(self):
+        """Test a runaway query is cancelled and the connection stays usable."""
+        executor = SQLExecutor(timeout_ms=200)
+        result = executor.execute(self.ENDLESS_SQL)
+        assert result["error"] == "Query exceeded the 200 ms time limit"
+        assert executor.execute("SELECT 1 AS one")["rows"] == [{"one": 1}]
+        if connections[executor.using].vendor == "postgresql":
+            # statement_timeout was transaction-local
+            with connections[executor.using].cursor() as cursor:
+                cursor.execute("SHOW statement_timeout")
+                assert cursor.fetchone()[0] == "0"
@@ -0,0 +1,132 @@
+"""
+Unit tests for the rule-based T2SQL fast path.
+"""
+from datetime import date
+
+import pytest
+from coreapp.models import Lead
+from crm_agent.agent import sql_templates, t2sql_service
+from crm_agent.agent.sql_executor import SQLExecutor
+from crm_agent.agent.sql_templates import parse_question
+
+PROJECTS = ["Beachgate by Address", "DLF West Park", "Emaar Creek"]
+TODAY = date(2024, 4, 15)
+
+
+def parse(question):
+    return parse_question(question, PROJECTS, today=TODAY)
+
+
+class FailingVanna:
+    """Vanna must not be reached for template questions."""
+
+    def ask(self, question):
+        raise AssertionError(f"LLM called for {question!r}")
+
+
+class TestParseQuestion:
+    """Test the intent grammar."""
+
+    @pytest.mark.parametrize("question", [
+        "How many leads total?",
+        "How many leads do we have",
+        "What's the total number of leads?",
+        "count all leads",
+    ])
+    def test_total_count(self, question):
+        """Test phrasings of the plain lead count."""
+        assert parse(question) == {"intent": "count", "sql": "SELECT COUNT(*) AS total_leads FROM coreapp_lead", "params": []}
+
+    def test_group_by_status_and_project(self):
+        """Test group-by phrases map to columns in order."""
+        assert parse("How many leads by status?")["intent"] == "count_by_status"
+        assert parse("number of leads per project")["intent"] == "count_by_project"
+        parsed = parse("count of leads broken down by status and project")
+        assert parsed["intent"] == "count_by_status_project"
+        assert "GROUP BY status, project_enquired" in parsed["sql"]
+
+    def test_status_and_project_filters_are_parameters(self):
+        """Test statuses and known projects become bound parameters."""
+        parsed = parse("Number of connected leads for Beachgate")
+        assert parsed["sql"].endswith("WHERE status = %s AND project_key = %s")
+        assert parsed["params"] == ["Connected", "beachgate by address"]
+        assert parse("how many follow-up leads")["params"] == ["FollowUp"]
+        assert parse("how many qualified or disqualified leads")["params"] == ["Qualified", "Disqualified"]
+        assert parse("how many leads are in FollowUp status")["params"] == ["FollowUp"]
+        assert parse("how many leads for the Beachgate project")["params"] == ["beachgate by address"]
+
+    def test_date_ranges_need_a_column(self):
+        """Test date phrases resolve against the cued column and ambiguous ones fall back."""
+        parsed = parse("how many leads were contacted in March 2024")
+        assert "last_conversation_date >= %s AND last_conversation_date < %s" in parsed["sql"]
+        assert parsed["params"] == [date(2024, 3, 1), date(2024, 4, 1)]
+        assert parse("how many leads were created in the last 30 days")["params"] == [date(2024, 3, 16)]
+        assert parse("leads added last month count")["params"] == [date(2024, 3, 1), date(2024, 4, 1)]
+        assert parse("How many leads in March 2024") is None
+
+    @pytest.mark.parametrize("question", [
+        "Show all Connected leads",
+        "How many leads have a budget over 1 million",
+        "Count leads by unit type",
+        "How many campaigns did we send",
+        "How many leads for Marina Heights",
+        "How many leads for Beachgate and Emaar",
+        "how many leads were contacted",
+        "how many leads have we spoken to",
+        "how many leads have been followed up",
+        "how many leads were contacted by status",
+        "how many leads have a project",
+        "how many leads have a status",
+    ])
+    def test_outside_grammar_falls_back(self, question):
+        """Test anything the grammar can't fully account for is left to Vanna."""
+        assert parse(question) is None
+
+
+@pytest.mark.django_db(transaction=True, databases=["default", "readonly"])
+class TestTemplatePipeline:
+    """Test template answers through answer_question."""
+
+    @pytest.fixture(autouse=True)
+    def leads(self, monkeypatch):
+        # The database is flushed between tests, so the lead counter restarts
+        monkeypatch.setattr(sql_templates, "_projects_cache", (None, []))
+        Lead.objects.create(name="Ann", email="ann@test.com", status="Connected", project_enquired="Beachgate by Address")
+        Lead.objects.create(name="Bob", email="bob@test.com", status="Connected", project_enquired="Emaar Creek")
+        Lead.objects.create(name="Cy", email="cy@test.com", status="New", project_enquired="Beachgate by Address")
+        t2sql_service.STATS.reset()
+
+    def test_template_answers_without_llm(self):
+        """Test a parsed question executes its parameterized SQL and skips Vanna."""
+        result = t2sql_service.answer_question("How many connected leads for beachgate?", FailingVanna)
+        assert result["cache"] == "template"
+        assert result["error"] is None
+        assert result["rows"] == [{"total_leads": 1}]
+        assert result["params"] == ["Connected", "beachgate by address"]
+
+    def test_group_by_rows(self):
+        """Test a group-by template returns one row per status."""
+        result = t2sql_service.answer_question("Count leads by status", FailingVanna)
+        assert result["rows"] == [{"status": "Connected", "count": 2}, {"status": "New", "count": 1}]
+
+    def test_stats_report_coverage(self, monkeypatch):
+        """Test stats count template answers against fallbacks."""
+        monkeypatch.setenv("T2SQL_CACHE", "0")
+
+        class Vanna:
+            def ask(self, question):
+                return {"sql": "SELECT name FROM coreapp_lead", "summary": "", "confidence": 0.8, "error": None}
+
+        t2sql_service.answer_question("How many leads?", FailingVanna)
+        t2sql_service.answer_question("List lead names", Vanna)
+        stats = t2sql_service.STATS.snapshot()
+        assert stats["questions"] == 2
+        assert stats["template_coverage"] == 0.5
+        assert set(stats["sources"]) == {"template", "off"}
+        assert stats["sources"]["template"]["p50_ms"] >= 0
+
+    def test_executor_allows_created_at_columns(self):
+        """Test keyword validation matches whole words only."""
+        executor = SQLExecutor()
+        assert executor.validate_sql("SELECT COUNT(*) FROM coreapp_lead WHERE created_at >= '2024-01-01'") == (True, None)
+        assert executor.validate_sql("SELECT 1; DROP TABLE coreapp_lead")[0] is False
@@ -0,0 +1,46 @@
+"""
+Unit tests for the SQLite connection tuning hook.
+"""
+import sqlite3
+import pytest
+from django.db import connection
+from crm_agent.core.sqlite_tuning import apply_pragmas, pragma_statements, pragmas_from_env
+
+
+class TestSqliteTuning:
+    """Test pragma configuration and the connection hooks."""
+
+    def test_env_overrides_and_disables(self, monkeypatch):
+        """Test SQLITE_<NAME> overrides one pragma and an empty value skips it."""
+        monkeypatch.setenv("SQLITE_BUSY_TIMEOUT", "250")
+        monkeypatch.setenv("SQLITE_MMAP_SIZE", "")
+        pragmas = pragmas_from_env()
+        assert pragmas["busy_timeout"] == "250"
+        assert "mmap_size" not in pragmas
+        assert pragma_statements(pragmas)[0] == "PRAGMA busy_timeout=250"
+
+        monkeypatch.setenv("SQLITE_TUNING", "0")
+        assert pragmas_from_env() == {}
+
+    def test_rejects_unsafe_values(self, monkeypatch):
+        """Test pragma values are limited to integers and keywords."""
+        monkeypatch.setenv("SQLITE_SYNCHRONOUS", "OFF; DROP TABLE coreapp_lead")
+        with pytest.raises(ValueError):
+            pragmas_from_env()
+
+    def test_raw_connection_gets_wal(self, tmp_path):
+        """Test apply_pragmas (used for the checkpoint DB) switches a file database to WAL."""
+        conn = sqlite3.connect(tmp_path / "graph.sqlite3")
+        apply_pragmas(conn)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        conn.close()
+
+    @pytest.mark.skipif(connection.vendor != "sqlite", reason="SQLite only")
+    def test_django_connections_are_tuned(self, db):
+        """Test the connection_created hook ran on the Django connection."""
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            assert cursor.fetchone()[0] == 5000
+            cursor.execute("PRAGMA temp_store")
+            assert cursor.fetchone()[0] == 2  # MEMORY
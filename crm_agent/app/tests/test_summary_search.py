@@ -0,0 +1,88 @@
+"""
+Unit tests for full-text search over conversation summaries.
+"""
+import pandas as pd
+import pytest
+from django.core.management.sql import emit_post_migrate_signal
+from django.db import connection
+from coreapp.models import Lead
+from crm_agent.core.services import shortlist_leads
+from crm_agent.core.summary_search import FTS_TRIGGERS, search_summaries, to_fts_query
+from crm_agent.ingestion.crm_loader import insert_frames
+
+
+@pytest.fixture
+def summarized_leads(db):
+    """Leads with distinct conversation summaries."""
+    summaries = [
+        "Wants a sea view apartment, asked twice about the sea view from the balcony",
+        "Asked about payment plans and post-handover installments",
+        "Prefers a high floor with a sea view; budget flexible",
+        "Only interested in villas near schools",
+    ]
+    return [
+        Lead.objects.create(name=f"Lead {i}", email=f"lead{i}@test.com", status="Connected", last_conversation_summary=text)
+        for i, text in enumerate(summaries)
+    ]
+
+
+class TestSummarySearch:
+    """Test the FTS5 index, its triggers and ranked search."""
+
+    def test_query_is_quoted(self):
+        """Test user input cannot inject FTS5 operators."""
+        assert to_fts_query('sea-view OR "x" NEAR(') == '"sea" "view" "or" "x" "near"'
+
+    def test_ranked_search(self, summarized_leads):
+        """Test matching leads come back best match first with snippets."""
+        hits = search_summaries("sea view")
+        assert [h["name"] for h in hits] == ["Lead 0", "Lead 2"]
+        assert hits[0]["score"] >= hits[1]["score"]
+        assert "[sea]" in hits[0]["snippet"]
+
+    def test_stemming_and_pagination(self, summarized_leads):
+        """Test stemmed terms match and offset pages through results."""
+        assert [h["name"] for h in search_summaries("payment plan")] == ["Lead 1"]
+        assert [h["name"] for h in search_summaries("sea view", limit=1, offset=1)] == ["Lead 2"]
+
+    def test_index_follows_updates_imports_and_deletes(self, summarized_leads):
+        """Test triggers keep the FTS table in sync with coreapp_lead."""
+        villa = summarized_leads[3]
+        villa.last_conversation_summary = "Now wants a sea view villa"
+        villa.save()
+        insert_frames(iter([pd.DataFrame({
+            "Lead name": ["Imported"], "Email": ["imp@test.com"],
+            "Last conversation summary": ["Sea view penthouse enquiry"],
+        })]))
+        summarized_leads[0].delete()
+        names = {h["name"] for h in search_summaries("sea view")}
+        assert names == {"Lead 2", "Lead 3", "Imported"}
+        assert search_summaries("schools") == []
+
+    def test_shortlist_summary_filter(self, summarized_leads):
+        """Test summary_query combines with the other shortlist filters."""
+        qs = shortlist_leads(status="Connected", summary_query="sea view")
+        assert sorted(qs.values_list("name", flat=True)) == ["Lead 0", "Lead 2"]
+
+    @pytest.mark.skipif(connection.vendor != "sqlite", reason="FTS5 is SQLite only")
+    def test_shortlist_uses_fts_table(self, summarized_leads):
+        """Test the summary filter is answered by the FTS table, not a LIKE scan."""
+        sql = str(shortlist_leads(summary_query="sea view").query)
+        assert "coreapp_lead_fts" in sql
+        assert "LIKE" not in sql
+
+    @pytest.mark.skipif(connection.vendor != "sqlite", reason="FTS5 is SQLite only")
+    @pytest.mark.django_db(transaction=True)
+    def test_triggers_restored_after_table_rebuild(self):
+        """Test post_migrate recreates triggers a migration's table rebuild dropped."""
+        Lead.objects.create(name="Before", email="b@test.com", last_conversation_summary="Sea view duplex")
+        with connection.schema_editor() as editor:
+            editor._remake_table(Lead)  # what AlterField on Lead does on SQLite
+        Lead.objects.create(name="Between", email="m@test.com", last_conversation_summary="Sea view loft")
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+            assert not set(FTS_TRIGGERS) & {name for (name,) in cursor.fetchall()}
+
+        emit_post_migrate_signal(verbosity=0, interactive=False, db="default")
+        Lead.objects.create(name="After", email="a@test.com", last_conversation_summary="Sea view villa")
+        assert {h["name"] for h in search_summaries("sea view")} == {"Before", "Between", "After"}
@@ -0,0 +1,204 @@
+"""
+Unit tests for the NL→SQL cache in the T2SQL pipeline.
+"""
+import zlib
+
+import numpy as np
+import pytest
+from coreapp.models import Lead, SQLCacheEntry
+from crm_agent.agent import t2sql_service
+from crm_agent.agent.sql_executor import SQLExecutor
+from crm_agent.agent.t2sql_service import answer_question, literals_match, normalize_question
+from crm_agent.ingestion.vanna_seed import VannaSeeder
+
+COUNT_SQL = "SELECT COUNT(*) AS total FROM coreapp_lead"
+ENDLESS_SQL = (
+    "SELECT COUNT(*) AS n FROM (WITH RECURSIVE c(x) AS "
+    "(SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT x FROM c) AS endless"
+)
+
+
+class FakeVanna:
+    """Returns fixed SQL and counts generations instead of calling Groq."""
+
+    def __init__(self, sql=COUNT_SQL):
+        self.sql = sql
+        self.calls = 0
+
+    def ask(self, question):
+        self.calls += 1
+        return {"sql": self.sql, "summary": "Counted leads", "confidence": 0.8, "error": None}
+
+
+class FakeEmbedder:
+    """Bag of content words hashed into 64 dims: paraphrases with the same
+    content words embed identically (MiniLM can't be downloaded in tests)."""
+    STOPWORDS = {"how", "many", "number", "of", "are", "there", "the", "count", "leads", "do", "we", "have", "total"}
+
+    def embed(self, texts):
+        vectors = []
+        for text in texts:
+            vec = np.zeros(64, dtype=np.float32)
+            for word in text.split():
+                if word not in self.STOPWORDS:
+                    vec[zlib.crc32(word.encode()) % 64] += 1
+            vec[63] += 0.01  # keep stopword-only questions non-zero
+            vectors.append((vec / np.linalg.norm(vec)).tolist())
+        return vectors
+
+
+@pytest.fixture(autouse=True)
+def fake_embedder(monkeypatch):
+    monkeypatch.setattr(t2sql_service, "get_embedder", lambda: FakeEmbedder())
+    # These questions are template-shaped; exercise the cache tiers behind the parser
+    monkeypatch.setenv("T2SQL_TEMPLATES", "0")
+    # The database is flushed between tests, so the change counter restarts
+    monkeypatch.setattr(t2sql_service, "_semantic_index", t2sql_service._SemanticIndex())
+
+
+@pytest.fixture
+def leads(db):
+    Lead.objects.create(name="Ann", email="ann@test.com", status="Connected")
+    Lead.objects.create(name="Bob", email="bob@test.com", status="New")
+
+
+class TestQuestionKey:
+    """Test question normalization and the schema version."""
+
+    def test_normalize_question(self):
+        """Test case, whitespace and trailing punctuation are ignored."""
+        assert normalize_question("  How many  Connected leads?? ") == "how many connected leads"
+        assert normalize_question("How many connected leads") == "how many connected leads"
+
+    @pytest.mark.django_db
+    def test_schema_version_tracks_training_corpus(self, monkeypatch):
+        """Test the version is stable and changes with the examples."""
+        seeder = VannaSeeder()
+        version = seeder.schema_version()
+        assert version == VannaSeeder().schema_version()
+        examples = seeder.get_training_examples() + [("New question", COUNT_SQL)]
+        monkeypatch.setattr(seeder, "get_training_examples", lambda: examples)
+        assert seeder.schema_version() != version
+
+
+@pytest.mark.django_db(transaction=True, databases=["default", "readonly"])
+class TestExactCache:
+    """Test cache hits, misses and invalidation."""
+
+    def test_second_ask_is_served_from_cache(self, leads):
+        """Test a repeat (differently formatted) question skips Vanna."""
+        vanna = FakeVanna()
+        first = answer_question("How many leads?", lambda: vanna)
+        assert first["cache"] == "miss"
+        assert first["rows"] == [{"total": 2}]
+
+        second = answer_question("how many   LEADS", lambda: vanna)
+        assert second["cache"] == "exact"
+        assert second["rows"] == [{"total": 2}]
+        assert second["summary"] == "Counted leads"
+        assert vanna.calls == 1
+        assert SQLCacheEntry.objects.get().hits == 1
+
+    def test_failed_sql_is_not_cached(self, leads):
+        """Test SQL that errors on execution never enters the cache."""
+        vanna = FakeVanna(sql="SELECT missing_column FROM coreapp_lead")
+        result = answer_question("Show missing column", lambda: vanna)
+        assert result["error"]
+        assert not SQLCacheEntry.objects.exists()
+
+    def test_schema_change_invalidates(self, leads, monkeypatch):
+        """Test entries from another schema version are not reused."""
+        vanna = FakeVanna()
+        answer_question("How many leads?", lambda: vanna)
+        monkeypatch.setattr(t2sql_service, "schema_version", lambda: "migrated")
+        assert answer_question("How many leads?", lambda: vanna)["cache"] == "miss"
+        assert vanna.calls == 2
+
+    def test_stale_entry_is_dropped(self, leads):
+        """Test a cached query that stops executing is removed."""
+        SQLCacheEntry.objects.create(
+            question_hash=t2sql_service.question_hash("Old question"),
+            schema_version=t2sql_service.schema_version(),
+            question="Old question",
+            sql="SELECT dropped_column FROM coreapp_lead",
+        )
+        result = answer_question("Old question", lambda: FakeVanna())
+        assert result["cache"] == "exact" and result["error"]
+        assert not SQLCacheEntry.objects.exists()
+
+    def test_timeout_keeps_entry(self, leads):
+        """Test a cached query that only ran out of time is not dropped."""
+        SQLCacheEntry.objects.create(
+            question_hash=t2sql_service.question_hash("Endless question"),
+            schema_version=t2sql_service.schema_version(),
+            question="Endless question",
+            sql=ENDLESS_SQL,
+        )
+        result = answer_question("Endless question", lambda: FakeVanna(), executor=SQLExecutor(timeout_ms=100))
+        assert result["cache"] == "exact"
+        assert result["error"] == "Query exceeded the 100 ms time limit"
+        assert SQLCacheEntry.objects.filter(question="Endless question").exists()
+
+    def test_cache_can_be_disabled(self, leads, monkeypatch):
+        """Test T2SQL_CACHE=0 always generates and stores nothing."""
+        monkeypatch.setenv("T2SQL_CACHE", "0")
+        vanna = FakeVanna()
+        answer_question("How many leads?", lambda: vanna)
+        assert answer_question("How many leads?", lambda: vanna)["cache"] == "off"
+        assert vanna.calls == 2
+        assert not SQLCacheEntry.objects.exists()
+
+
+class TestLiteralGuard:
+    """Test literal checks that keep paraphrase matches safe."""
+
+    def test_status_and_numbers_must_agree(self):
+        """Test different statuses or numbers never share SQL."""
+        sql = "SELECT COUNT(*) FROM coreapp_lead WHERE status = 'Connected'"
+        assert literals_match("number of connected leads", "How many leads are connected?", sql)
+        assert not literals_match("number of new leads", "How many leads are connected?", sql)
+        assert not literals_match("top 10 leads by budget", "top 5 leads by budget", "SELECT * FROM coreapp_lead LIMIT 5")
+
+    def test_sql_string_literals_must_appear_in_question(self):
+        """Test a cached project filter is only reused for the same project."""
+        sql = "SELECT * FROM coreapp_lead WHERE project_enquired LIKE '%Beachgate%'"
+        assert literals_match("leads interested in beachgate", "Leads enquired about Beachgate project", sql)
+        assert not literals_match("leads interested in marina", "Leads enquired about Beachgate project", sql)
+
+
+@pytest.mark.django_db(transaction=True, databases=["default", "readonly"])
+class TestSemanticCache:
+    """Test nearest-neighbour reuse of validated SQL."""
+
+    CONNECTED_SQL = "SELECT COUNT(*) AS total FROM coreapp_lead WHERE status = 'Connected'"
+
+    def test_paraphrase_reuses_sql(self, leads):
+        """Test a paraphrase is answered without Vanna and stored as its own entry."""
+        vanna = FakeVanna(sql=self.CONNECTED_SQL)
+        assert answer_question("How many leads are connected?", lambda: vanna)["cache"] == "miss"
+        result = answer_question("Number of connected leads", lambda: vanna)
+        assert result["cache"] == "semantic"
+        assert result["rows"] == [{"total": 1}]
+        assert vanna.calls == 1
+        assert SQLCacheEntry.objects.count() == 2
+        assert answer_question("number of connected leads?", lambda: vanna)["cache"] == "exact"
+
+    def test_status_mismatch_falls_back_to_generation(self, leads, monkeypatch):
+        """Test a near neighbour about another status is not reused."""
+        monkeypatch.setenv("T2SQL_SEMANTIC_THRESHOLD", "-1")
+        vanna = FakeVanna(sql=self.CONNECTED_SQL)
+        answer_question("How many leads are connected?", lambda: vanna)
+        assert answer_question("How many leads are new?", lambda: vanna)["cache"] == "miss"
+        assert vanna.calls == 2
+
+    def test_below_threshold_generates(self, leads):
+        """Test unrelated questions don't match."""
+        vanna = FakeVanna()
+        answer_question("How many leads?", lambda: vanna)
+        assert answer_question("Show leads with email addresses", lambda: vanna)["cache"] == "miss"
+
+    def test_failed_sql_is_not_indexed(self, leads):
+        """Test only executed pairs become semantic neighbours."""
+        answer_question("How many leads are connected?", lambda: FakeVanna(sql="SELECT nope FROM coreapp_lead"))
+        vanna = FakeVanna(sql=self.CONNECTED_SQL)
+        assert answer_question("Number of connected leads", lambda: vanna)["cache"] == "miss"
@@ -0,0 +1,68 @@
+"""
+Unit tests for the shared VannaClient pool.
+"""
+import threading
+
+import pytest
+from crm_agent.agent import vanna_pool
+
+
+class FakeVannaClient:
+    """Stands in for VannaClient (which needs GROQ_API_KEY and ChromaDB)."""
+    built = 0
+
+    def __init__(self, chroma_dir, groq_api_key=None, model="default"):
+        FakeVannaClient.built += 1
+        self.chroma_dir = chroma_dir
+        self.model = model
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    FakeVannaClient.built = 0
+    monkeypatch.setattr(vanna_pool, "VannaClient", FakeVannaClient)
+    monkeypatch.setattr(vanna_pool, "_clients", {})
+    return FakeVannaClient
+
+
+@pytest.mark.django_db
+class TestVannaPool:
+    """Test client reuse and invalidation."""
+
+    def test_reuses_client_per_configuration(self, fake_client):
+        """Test repeated calls share one client and a new model builds another."""
+        first = vanna_pool.get_vanna_client("/tmp/chroma", "key", "model-a")
+        assert vanna_pool.get_vanna_client("/tmp/chroma", "key", "model-a") is first
+        other = vanna_pool.get_vanna_client("/tmp/chroma", "key", "model-b")
+        assert other is not first and other.model == "model-b"
+        assert fake_client.built == 2
+
+    def test_invalidate_rebuilds_after_training_change(self, fake_client):
+        """Test seeding bumps the generation so the next call gets a fresh client."""
+        first = vanna_pool.get_vanna_client("/tmp/chroma")
+        assert vanna_pool.invalidate() == 1
+        second = vanna_pool.get_vanna_client("/tmp/chroma")
+        assert second is not first
+        assert vanna_pool.get_vanna_client("/tmp/chroma") is second
+
+    def test_generation_bumped_elsewhere_is_picked_up(self, fake_client):
+        """Test a counter bump from another process invalidates the cached client."""
+        from coreapp.models import ChangeCounter
+        first = vanna_pool.get_vanna_client("/tmp/chroma")
+        ChangeCounter.bump(vanna_pool.TRAINING_COUNTER)
+        assert vanna_pool.get_vanna_client("/tmp/chroma") is not first
+
+    def test_concurrent_first_use_builds_once(self, fake_client, monkeypatch):
+        """Test threads racing on an empty pool share a single construction."""
+        monkeypatch.setattr(vanna_pool.ChangeCounter, "current", classmethod(lambda cls, name: 0))
+        clients = []
+        threads = [
+            threading.Thread(target=lambda: clients.append(vanna_pool.get_vanna_client("/tmp/chroma")))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert fake_client.built == 1
+        assert all(c is clients[0] for c in clients)
@@ -0,0 +1,90 @@
+"""
+Unit tests for the compact in-process vector index.
+"""
+import numpy as np
+import pytest
+from crm_agent.core.compact_index import CompactIndex
+from crm_agent.core.index_eval import exact_top_k, recall_at_k
+
+
+@pytest.fixture
+def corpus():
+    """Provide 500 unit vectors split across two projects."""
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(500, 32)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return {
+        "embeddings": vectors,
+        "ids": [f"chunk-{i}" for i in range(500)],
+        "documents": [f"text {i}" for i in range(500)],
+        "metadatas": [{"project_name": "Beachgate" if i % 2 else "West Park", "page": i} for i in range(500)],
+    }
+
+
+@pytest.fixture
+def offset_corpus():
+    """Provide low-rank unit vectors sharing a common direction, like sentence
+    embeddings (a far-from-zero mean), with 50 queries from the same distribution."""
+    rng = np.random.default_rng(1)
+    basis = rng.normal(size=(16, 64))
+    offset = rng.normal(size=64) * 2.4
+
+    def sample(n):
+        vectors = rng.normal(size=(n, 16)) @ basis + offset + rng.normal(size=(n, 64)) * 0.3
+        return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+    vectors = sample(2000)
+    data = {
+        "embeddings": vectors,
+        "ids": [f"chunk-{i}" for i in range(2000)],
+        "documents": [""] * 2000,
+        "metadatas": [{}] * 2000,
+    }
+    return data, sample(50)
+
+
+class TestCompactIndex:
+    """Test PCA/quantized storage with exact re-scoring."""
+
+    @pytest.mark.parametrize("dtype", ["float32", "float16", "int8"])
+    def test_exact_match_ranks_first(self, corpus, dtype):
+        """Test a stored vector finds itself at distance ~0."""
+        index = CompactIndex.build(corpus, pca_dim=16, dtype=dtype)
+        hits = index.search_by_embedding(corpus["embeddings"][42], k=3)
+        assert hits[0]["id"] == "chunk-42"
+        assert hits[0]["distance"] == pytest.approx(0.0, abs=1e-5)
+
+    def test_int8_is_smaller(self, corpus):
+        """Test int8 codes take a quarter of float32 storage."""
+        assert CompactIndex.build(corpus, dtype="int8").nbytes * 4 == corpus["embeddings"].nbytes
+
+    def test_project_filter(self, corpus):
+        """Test results are restricted to the requested project."""
+        index = CompactIndex.build(corpus, dtype="int8")
+        hits = index.search_by_embedding(corpus["embeddings"][0], k=5, project_name="Beachgate")
+        assert len(hits) == 5
+        assert all(h["metadata"]["project_name"] == "Beachgate" for h in hits)
+        assert index.search_by_embedding(corpus["embeddings"][0], k=5, project_name="Unknown") == []
+
+    def test_save_and_load(self, corpus, tmp_path):
+        """Test a saved index returns the same results after loading."""
+        index = CompactIndex.build(corpus, pca_dim=8, dtype="int8")
+        index.save(str(tmp_path))
+        loaded = CompactIndex.load(str(tmp_path))
+        query = corpus["embeddings"][7]
+        assert [h["id"] for h in loaded.search_by_embedding(query, k=4)] == \
+            [h["id"] for h in index.search_by_embedding(query, k=4)]
+
+    @pytest.mark.parametrize("dtype", ["float32", "float16", "int8"])
+    def test_approximate_ranking_recall(self, offset_corpus, dtype):
+        """Test PCA candidates with little re-scoring slack recover the exact top-10."""
+        data, queries = offset_corpus
+        index = CompactIndex.build(data, pca_dim=16, dtype=dtype)
+        truth = exact_top_k(data["embeddings"], queries, k=10)
+        recalls = [
+            recall_at_k(
+                [h["id"] for h in index.search_by_embedding(query, k=10, rescore=2)],
+                [data["ids"][i] for i in expected],
+            )
+            for query, expected in zip(queries, truth)
+        ]
+        assert np.mean(recalls) >= 0.85
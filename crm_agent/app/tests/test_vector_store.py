@@ -0,0 +1,205 @@
+"""
+Unit tests for the Chroma store wrappers.
+"""
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+from crm_agent.core import vector_store
+from crm_agent.core.index_snapshot import export_snapshot, import_snapshot
+from crm_agent.core.vector_store import AsyncChromaStore, ChromaStore, hnsw_metadata, hnsw_metadata_from_env
+
+
+@pytest.fixture
+def make_store(tmp_path, monkeypatch):
+    """Build ChromaStores under tmp_path without loading MiniLM."""
+    monkeypatch.setattr(vector_store, "get_embedder", lambda model: None)
+
+    def make(name, hnsw=None):
+        return ChromaStore(persist_dir=str(tmp_path / name), hnsw=hnsw or {})
+    return make
+
+
+def chunks(count=20, dim=8):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(count, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return [
+        {"id": f"chunk-{i}", "text": f"text {i}", "metadata": {"page": i}, "embedding": vectors[i].tolist()}
+        for i in range(count)
+    ]
+
+
+def segment_search_ef(store):
+    """search ef of the collection's HNSW segment (what queries actually use)."""
+    segments = store.client._server._sysdb.get_segments(collection=store.collection.id)
+    return next(s["metadata"]["hnsw:search_ef"] for s in segments if s["type"].startswith("urn:chroma:segment/vector"))
+
+
+class TestHnswSettings:
+    """Test HNSW collection metadata and distance conversion."""
+
+    def test_hnsw_metadata_drops_unset_values(self, monkeypatch):
+        """Test only configured values become collection metadata."""
+        assert hnsw_metadata() == {}
+        assert hnsw_metadata(space="cosine", search_ef=64) == {"hnsw:space": "cosine", "hnsw:search_ef": 64}
+        monkeypatch.setenv("CHROMA_HNSW_M", "32")
+        monkeypatch.setenv("CHROMA_HNSW_SPACE", "")
+        assert hnsw_metadata_from_env() == {"hnsw:M": 32}
+
+    def test_search_ef_is_applied_to_existing_collection(self, make_store):
+        """Test a changed search ef rebuilds the HNSW index and keeps the chunks and space."""
+        make_store("index", hnsw={"hnsw:space": "cosine", "hnsw:M": 16}).upsert(chunks())
+        store = make_store("index", hnsw={"hnsw:search_ef": 64})
+        assert segment_search_ef(store) == 64
+        assert store.collection.metadata["hnsw:M"] == 16
+        assert store.space == "cosine"
+        assert store.count() == 20
+        assert store.collection.get(ids=["chunk-3"])["documents"] == ["text 3"]
+        vectors = np.array([c["embedding"] for c in chunks()])
+        hit = store.search_by_embedding(vectors[0].tolist(), k=20)[-1]
+        assert hit["distance"] == pytest.approx(1.0 - (vectors @ vectors[0]).min(), abs=1e-5)
+
+        store.reset()
+        assert store.space == "cosine"
+        assert segment_search_ef(store) == 64
+
+    def test_similarity(self, make_store):
+        """Test distances map to 0-1 similarity for the collection's space."""
+        l2 = make_store("l2")
+        cosine = make_store("cosine", hnsw={"hnsw:space": "cosine"})
+        assert l2.space == "l2"
+        assert l2.similarity(0.5) == pytest.approx(0.75)
+        assert cosine.similarity(0.5) == pytest.approx(0.5)
+        assert cosine.similarity(1.5) == 0.0
+        assert l2.similarity(-0.01) == 1.0
+        assert l2.similarity(None) == 0.0
+
+
+class BlockingStore:
+    """ChromaStore stand-in that records the worker thread of each call and can
+    hold store calls until `release` is set."""
+
+    def __init__(self, block=False):
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+        self.threads = {}
+        self.counted = 0
+        self.embedder = self
+
+    def embed(self, texts):
+        self.threads["embed"] = threading.current_thread().name
+        return [[float(len(t))] for t in texts]
+
+    def search_by_embedding(self, embedding, k=4, **kwargs):
+        self.threads["search"] = threading.current_thread().name
+        assert self.release.wait(timeout=5)
+        return [{"id": "chunk-1", "distance": 0.1}]
+
+    def count(self):
+        assert self.release.wait(timeout=5)
+        self.counted += 1
+        return self.counted
+
+
+class TestAsyncChromaStore:
+    """Test executor placement, cancellation and shutdown."""
+
+    def test_work_runs_on_dedicated_pools(self):
+        """Test embedding and Chroma calls run on their own named threads."""
+        store = BlockingStore()
+        async_store = AsyncChromaStore(store)
+
+        hits = asyncio.run(async_store.search("sea view"))
+        async_store.close()
+        assert hits == [{"id": "chunk-1", "distance": 0.1}]
+        assert store.threads["embed"].startswith("chroma-embed")
+        assert store.threads["search"].startswith("chroma-store")
+
+    def test_event_loop_is_not_blocked(self):
+        """Test other coroutines keep running while a search blocks its worker."""
+        store = BlockingStore(block=True)
+        async_store = AsyncChromaStore(store)
+
+        async def ticker():
+            for _ in range(5):
+                await asyncio.sleep(0.01)
+            store.release.set()  # only reachable if the loop kept running
+
+        async def main():
+            return await asyncio.gather(async_store.search("sea view"), ticker())
+
+        hits, _ = asyncio.run(main())
+        async_store.close()
+        assert hits[0]["id"] == "chunk-1"
+
+    def test_cancelled_caller_drops_queued_job(self):
+        """Test cancelling a caller queued behind a busy pool never runs its job."""
+        store = BlockingStore(block=True)
+        async_store = AsyncChromaStore(store, max_workers=1)
+
+        async def main():
+            running = asyncio.ensure_future(async_store.count())
+            queued = asyncio.ensure_future(async_store.count())
+            await asyncio.sleep(0.01)
+            queued.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await queued
+            store.release.set()
+            return await running
+
+        assert asyncio.run(main()) == 1
+        async_store.close()
+        assert store.counted == 1
+
+    def test_close_cancels_pending_jobs(self):
+        """Test close() cancels jobs that haven't started and refuses new ones."""
+        store = BlockingStore(block=True)
+        async_store = AsyncChromaStore(store, max_workers=1)
+
+        async def main():
+            running = asyncio.ensure_future(async_store.count())
+            queued = asyncio.ensure_future(async_store.count())
+            await asyncio.sleep(0.01)
+            async_store.close()
+            with pytest.raises(asyncio.CancelledError):
+                await queued
+            store.release.set()
+            assert await running == 1  # already started, finishes in the background
+            with pytest.raises(RuntimeError):
+                await async_store.count()
+
+        asyncio.run(main())
+        assert store.counted == 1
+
+
+class TestSnapshotImport:
+    """Test snapshots keep the collection's HNSW settings."""
+
+    def test_cosine_round_trip(self, make_store, tmp_path):
+        """Test an import into a new or replaced collection restores the cosine space."""
+        source = make_store("source", hnsw={"hnsw:space": "cosine"})
+        source.upsert(chunks())
+        path = str(tmp_path / "index.npz")
+        export_snapshot(source, path)
+        query = chunks()[3]["embedding"]
+        expected = source.search_by_embedding(query, k=3)
+
+        def same_hits(store):
+            hits = store.search_by_embedding(query, k=3)
+            return [h["id"] for h in hits] == [h["id"] for h in expected] and \
+                [h["distance"] for h in hits] == pytest.approx([h["distance"] for h in expected], abs=1e-6)
+
+        fresh = make_store("fresh")
+        import_snapshot(fresh, path)
+        assert fresh.space == "cosine"
+        assert same_hits(fresh)
+
+        replaced = make_store("replaced")
+        replaced.upsert(chunks(count=5))
+        import_snapshot(replaced, path, replace=True)
+        assert replaced.space == "cosine"
+        assert replaced.count() == 20
+        assert same_hits(replaced)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark: CRM export → Lead objects, per-row (iterrows) vs column-wise transform.
+
+Usage (from crm_agent directory):
+    python benchmarks/bench_lead_loader.py --rows 500000
+    python benchmarks/bench_lead_loader.py --rows 500000 --workbook /tmp/leads_500k.xlsx
+
+Without --workbook the synthetic export is built in memory, so only the transform
+(the part that changed) is timed. With --workbook the file is written once if
+missing and read back through pandas/openpyxl before transforming.
+"""
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+script_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(script_dir.parent.parent))
+sys.path.insert(0, str(script_dir.parent / "app"))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+
+import django
+django.setup()
+
+import numpy as np
+import pandas as pd
+from coreapp.models import Lead
+from crm_agent.ingestion.crm_loader import HEADER_MAP, frame_to_payloads
+
+
+def synthetic_export(rows: int, seed: int = 0) -> pd.DataFrame:
+    """CRM-export-shaped frame with the messiness of real files (commas, blanks, padding)."""
+    rng = np.random.default_rng(seed)
+    budgets = rng.integers(500_000, 5_000_000, size=rows)
+    budget_text = pd.Series(budgets).map("{:,}".format)
+    budget_text[rng.random(rows) < 0.05] = ""
+    dates = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 600, size=rows), unit="D")
+    return pd.DataFrame({
+        "Lead ID": [f"CRM-{i:07d}" for i in range(rows)],
+        "Lead name": [f" Lead {i} " for i in range(rows)],
+        "Email": [f"lead{i}@example.com" for i in range(rows)],
+        "Country code": rng.choice(["+971", "+91", "+44"], size=rows),
+        "Phone": rng.integers(500_000_000, 599_999_999, size=rows).astype(str),
+        "Project name": rng.choice(["Beachgate by Address", "DLF West Park", "Emaar Creek"], size=rows),
+        "Unit type": rng.choice(["1 bed", "2 bed", "3 bed", "Studio"], size=rows),
+        "Min. Budget": budget_text,
+        "Max Budget": budgets * 1.2,
+        "Lead status": rng.choice(["New ", "Connected", " Qualified", "FollowUp"], size=rows),
+        "Last conversation date": pd.Series(dates).dt.strftime("%Y-%m-%d"),
+        "Last conversation summary": rng.choice(["Asked about payment plan", "Wants sea view", ""], size=rows),
+    })
+
+
+def _to_number(v):
+    try:
+        if pd.isna(v):
+            return None
+        return float(str(v).replace(",", "").strip())
+    except Exception:
+        return None
+
+
+def _to_date(v):
+    try:
+        if pd.isna(v) or v == "":
+            return None
+        return pd.to_datetime(v, errors="coerce").date()
+    except Exception:
+        return None
+
+
+def legacy_rows(df: pd.DataFrame):
+    """The original per-row transform, kept here as the baseline."""
+    df = df.rename(columns={c: c.strip() for c in df.columns})
+    rows = []
+    for _, r in df.iterrows():
+        payload = {}
+        for src, dst in HEADER_MAP.items():
+            if src not in df.columns:
+                continue
+            val = r.get(src)
+            if dst in ("budget_min", "budget_max"):
+                val = _to_number(val)
+            elif dst == "last_conversation_date":
+                val = _to_date(val)
+            elif isinstance(val, str):
+                val = val.strip()
+            payload[dst] = val
+        if "name" in payload and "email" in payload:
+            rows.append(Lead(**payload))
+    return rows
+
+
+def vectorized_rows(df: pd.DataFrame):
+    return [Lead(**p) for p in frame_to_payloads(df)]
+
+
+def run(label: str, fn, df: pd.DataFrame) -> float:
+    started = time.perf_counter()
+    rows = fn(df)
+    elapsed = time.perf_counter() - started
+    rate = len(rows) / elapsed if elapsed else float("inf")
+    print(f"{label:<12} {len(rows):>9,} rows  {elapsed:>8.2f}s  {rate:>12,.0f} rows/s")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--workbook", help="Write/read the synthetic export as .xlsx at this path")
+    parser.add_argument("--skip-legacy", action="store_true", help="Only time the column-wise transform")
+    args = parser.parse_args()
+
+    df = synthetic_export(args.rows)
+    if args.workbook:
+        if not os.path.exists(args.workbook):
+            print(f"Writing {args.rows:,}-row workbook to {args.workbook} ...")
+            df.to_excel(args.workbook, index=False, engine="openpyxl")
+        started = time.perf_counter()
+        df = pd.read_excel(args.workbook, engine="openpyxl")
+        print(f"read_excel   {len(df):>9,} rows  {time.perf_counter() - started:>8.2f}s")
+
+    before = None if args.skip_legacy else run("iterrows", legacy_rows, df)
+    after = run("column-wise", vectorized_rows, df)
+    if before:
+        print(f"speedup: {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark: concurrent SQLite readers and writers, default pragmas vs tuned.
+
+Writers insert small transactions (like campaign message batches); readers run
+T2SQL-style aggregates over the lead table. Each worker is a separate process
+with its own connection, as under gunicorn. Run once with SQLite's defaults
+(rollback journal, synchronous=FULL) and once with crm_agent.core.sqlite_tuning.
+
+Usage (from crm_agent directory):
+    python benchmarks/bench_sqlite_concurrency.py --readers 4 --writers 2 --seconds 10
+"""
+import argparse
+import multiprocessing as mp
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+script_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(script_dir.parent.parent))
+
+from crm_agent.core.sqlite_tuning import DEFAULT_PRAGMAS, apply_pragmas
+
+STATUSES = ["New", "Connected", "Qualified", "FollowUp"]
+PROJECTS = ["Beachgate by Address", "DLF West Park", "Emaar Creek"]
+READ_SQL = "SELECT status, project_enquired, COUNT(*), AVG(budget_max) FROM lead GROUP BY status, project_enquired"
+
+
+def create_db(path: str, leads: int) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE lead (id INTEGER PRIMARY KEY, status TEXT, project_enquired TEXT, budget_max REAL)"
+    )
+    conn.execute("CREATE TABLE message (id INTEGER PRIMARY KEY, lead_id INTEGER, body TEXT)")
+    rng = random.Random(0)
+    conn.executemany(
+        "INSERT INTO lead (status, project_enquired, budget_max) VALUES (?, ?, ?)",
+        ((rng.choice(STATUSES), rng.choice(PROJECTS), rng.uniform(5e5, 5e6)) for _ in range(leads)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def worker(role: str, path: str, tuned: bool, seconds: float, batch: int, results) -> None:
+    # Python's default 5s timeout is Django's default too
+    conn = sqlite3.connect(path, timeout=5.0, isolation_level=None)
+    if tuned:
+        apply_pragmas(conn, DEFAULT_PRAGMAS)
+    ops = errors = 0
+    rng = random.Random(os.getpid())
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        try:
+            if role == "writer":
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    "INSERT INTO message (lead_id, body) VALUES (?, ?)",
+                    ((rng.randint(1, 1000), "x" * 200) for _ in range(batch)),
+                )
+                conn.execute("COMMIT")
+            else:
+                conn.execute(READ_SQL).fetchall()
+            ops += 1
+        except sqlite3.OperationalError:
+            errors += 1
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+    conn.close()
+    results.put((role, ops, errors))
+
+
+def run(label: str, tuned: bool, args) -> None:
+    path = os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    create_db(path, args.leads)
+    if tuned:
+        # journal_mode is persistent; switch once before workers start
+        conn = sqlite3.connect(path)
+        apply_pragmas(conn, DEFAULT_PRAGMAS)
+        conn.close()
+    results = mp.Queue()
+    procs = [
+        mp.Process(target=worker, args=(role, path, tuned, args.seconds, args.batch, results))
+        for role in ["reader"] * args.readers + ["writer"] * args.writers
+    ]
+    for p in procs:
+        p.start()
+    totals = {"reader": [0, 0], "writer": [0, 0]}
+    for _ in procs:
+        role, ops, errors = results.get()
+        totals[role][0] += ops
+        totals[role][1] += errors
+    for p in procs:
+        p.join()
+    reads, read_errors = totals["reader"]
+    writes, write_errors = totals["writer"]
+    print(
+        f"{label:<8} reads {reads / args.seconds:>9,.0f}/s  writes {writes / args.seconds:>7,.0f} txn/s  "
+        f"locked errors {read_errors + write_errors}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--leads", type=int, default=20_000, help="Rows in the lead table readers aggregate")
+    parser.add_argument("--batch", type=int, default=20, help="Rows per write transaction")
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:.0f}s each")
+    run("default", False, args)
+    run("tuned", True, args)
+
+
+if __name__ == "__main__":
+    main()
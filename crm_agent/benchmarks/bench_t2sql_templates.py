@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark: rule-based T2SQL templates over a corpus of real question phrasings.
+
+Reports coverage (share of questions answered without the LLM), intent accuracy
+against the labels in t2sql_questions.tsv (including questions that must fall
+back to Vanna), and parse / execute latency percentiles. Queries run through
+SQLExecutor against a throwaway SQLite database filled with synthetic leads.
+
+Usage (from crm_agent directory):
+    python benchmarks/bench_t2sql_templates.py --leads 100000 --repeat 20
+    python benchmarks/bench_t2sql_templates.py --corpus my_questions.tsv
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+script_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(script_dir.parent.parent))
+sys.path.insert(0, str(script_dir.parent / "app"))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+# Never touch the real database
+os.environ['DATABASE_URL'] = f"sqlite:///{tempfile.mkdtemp()}/bench.sqlite3"
+
+import django
+django.setup()
+
+import numpy as np
+from django.core.management import call_command
+from coreapp.models import Lead
+from coreapp.normalization import project_key
+from crm_agent.agent.sql_executor import SQLExecutor
+from crm_agent.agent.sql_templates import known_projects, parse_question
+from crm_agent.core.index_eval import percentile, timed
+
+PROJECTS = ["Beachgate by Address", "DLF West Park", "Emaar Creek"]
+STATUSES = ["New", "Connected", "Qualified", "Disqualified", "FollowUp"]
+
+
+def load_corpus(path: Path):
+    rows = []
+    for line in path.read_text().splitlines():
+        if line.strip() and not line.startswith("#"):
+            question, intent = line.split("\t")
+            rows.append((question.strip(), None if intent.strip() == "-" else intent.strip()))
+    return rows
+
+
+def create_leads(count: int, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    projects = rng.choice(PROJECTS, size=count)
+    days = rng.integers(0, 730, size=count)
+    leads = [
+        Lead(
+            name=f"Lead {i}",
+            email=f"lead{i}@example.com",
+            status=str(rng.choice(STATUSES)),
+            project_enquired=str(projects[i]),
+            project_key=project_key(projects[i]),
+            last_conversation_date=date(2023, 1, 1) + timedelta(days=int(days[i])),
+        )
+        for i in range(count)
+    ]
+    Lead.objects.bulk_create(leads, batch_size=5000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="T2SQL template coverage and latency")
+    parser.add_argument("--corpus", type=Path, default=script_dir / "t2sql_questions.tsv")
+    parser.add_argument("--leads", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=10, help="timed runs per question")
+    args = parser.parse_args()
+
+    call_command("migrate", verbosity=0)
+    create_leads(args.leads)
+    corpus = load_corpus(args.corpus)
+    projects = known_projects()
+    executor = SQLExecutor()
+
+    parsed_count = correct = 0
+    parse_ms, execute_ms, misses = [], [], []
+    for question, expected in corpus:
+        parsed = parse_question(question, projects)
+        intent = parsed["intent"] if parsed else None
+        correct += intent == expected
+        if intent != expected:
+            misses.append((question, expected or "-", intent or "-"))
+        for _ in range(args.repeat):
+            _, elapsed = timed(parse_question, question, projects)
+            parse_ms.append(elapsed)
+        if parsed is None:
+            continue
+        parsed_count += 1
+        for _ in range(args.repeat):
+            result, elapsed = timed(executor.execute, parsed["sql"], parsed["params"] or None)
+            assert result["error"] is None, (question, result["error"])
+            execute_ms.append(elapsed)
+
+    expected_parsed = sum(1 for _, intent in corpus if intent)
+    print(f"Corpus: {len(corpus)} questions ({expected_parsed} template-shaped), {args.leads:,} leads")
+    print(f"Coverage: {parsed_count}/{len(corpus)} answered by templates ({parsed_count / len(corpus):.0%})")
+    print(f"Intent accuracy: {correct}/{len(corpus)} ({correct / len(corpus):.0%})")
+    print(f"Parse:   p50 {percentile(parse_ms, 50):.3f} ms, p99 {percentile(parse_ms, 99):.3f} ms")
+    print(f"Execute: p50 {percentile(execute_ms, 50):.2f} ms, p99 {percentile(execute_ms, 99):.2f} ms")
+    for question, expected, got in misses:
+        print(f"  mismatch: {question!r} expected {expected}, got {got}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Compact in-process vector index - an optional alternative to querying Chroma
+for large brochure corpora.
+
+Vectors are optionally projected with PCA fitted on the corpus and stored as
+float16 or int8 (per-dimension scalar quantization). A query is scored against
+the compact codes first, then the top `k * rescore` candidates are re-scored
+exactly against the original float32 vectors, which stay on disk (memory-mapped)
+when the index is loaded from a directory.
+"""
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+DTYPES = ("float32", "float16", "int8")
+_SCORE_BLOCK = 65536
+
+
+class CompactIndex:
+    def __init__(
+        self,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        full: np.ndarray,
+        codes: np.ndarray,
+        mean: Optional[np.ndarray],
+        components: Optional[np.ndarray],
+        scale: Optional[np.ndarray],
+        dtype: str,
+    ):
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.full = full
+        self.codes = codes
+        self.mean = mean
+        self.components = components
+        self.scale = scale
+        self.dtype = dtype
+        projects = [m.get("project_name") for m in metadatas]
+        self._project_names = sorted({p for p in projects if p})
+        lookup = {p: i for i, p in enumerate(self._project_names)}
+        self._project_codes = np.array([lookup.get(p, -1) for p in projects], dtype=np.int32)
+
+    @classmethod
+    def build(cls, data: Dict[str, Any], pca_dim: Optional[int] = None, dtype: str = "float16") -> "CompactIndex":
+        """Build from the dict returned by `index_snapshot.load_vectors` / `read_snapshot`."""
+        if dtype not in DTYPES:
+            raise ValueError(f"dtype must be one of {DTYPES}")
+        full = np.ascontiguousarray(data["embeddings"], dtype=np.float32)
+        mean = components = scale = None
+        reduced = full
+        if pca_dim and pca_dim < full.shape[1]:
+            mean = full.mean(axis=0)
+            # Rows of vt are the principal axes, sorted by explained variance
+            _, _, vt = np.linalg.svd(full - mean, full_matrices=False)
+            components = vt[:pca_dim].astype(np.float32)
+            reduced = (full - mean) @ components.T
+
+        if dtype == "int8":
+            scale = np.abs(reduced).max(axis=0) / 127.0
+            scale[scale == 0] = 1.0
+            codes = np.clip(np.rint(reduced / scale), -127, 127).astype(np.int8)
+            scale = scale.astype(np.float32)
+        else:
+            codes = reduced.astype(dtype)
+        return cls(data["ids"], data["documents"], data["metadatas"], full, codes, mean, components, scale, dtype)
+
+    def _approx_scores(self, query: np.ndarray) -> np.ndarray:
+        # Codes hold P(x - mean), and x·q ≈ P(x - mean)·Pq + mean·q. The last term is the
+        # same for every row, so the query is projected without centering.
+        q = query if self.components is None else self.components @ query
+        if self.scale is not None:
+            q = q * self.scale
+        q = q.astype(np.float32)
+        out = np.empty(self.codes.shape[0], dtype=np.float32)
+        for start in range(0, self.codes.shape[0], _SCORE_BLOCK):
+            block = self.codes[start:start + _SCORE_BLOCK]
+            out[start:start + len(block)] = block.astype(np.float32) @ q
+        return out
+
+    def search_by_embedding(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        project_name: Optional[str] = None,
+        rescore: int = 4,
+    ) -> List[Dict[str, Any]]:
+        """Same hit shape as ChromaStore.search; distance is squared L2 on unit vectors."""
+        query = np.asarray(embedding, dtype=np.float32)
+        scores = self._approx_scores(query)
+        if project_name:
+            if project_name not in self._project_names:
+                return []
+            scores[self._project_codes != self._project_names.index(project_name)] = -np.inf
+
+        n_candidates = min(len(scores), max(k, k * rescore))
+        if n_candidates == 0:
+            return []
+        candidates = np.argpartition(-scores, n_candidates - 1)[:n_candidates]
+        candidates = candidates[np.isfinite(scores[candidates])]
+
+        exact = self.full[np.sort(candidates)] @ query
+        order = np.argsort(-exact)[:k]
+        rows = np.sort(candidates)[order]
+        return [
+            {
+                "id": self.ids[r],
+                "text": self.documents[r],
+                "metadata": self.metadatas[r],
+                "distance": float(2.0 - 2.0 * exact[o]),
+            }
+            for r, o in zip(rows, order)
+        ]
+
+    @property
+    def nbytes(self) -> int:
+        """In-memory size of the compact codes (the part scanned per query)."""
+        return int(self.codes.nbytes)
+
+    def save(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "full.npy"), np.asarray(self.full, dtype=np.float32))
+        np.save(os.path.join(directory, "codes.npy"), self.codes)
+        extras = {n: v for n, v in (("mean", self.mean), ("components", self.components), ("scale", self.scale)) if v is not None}
+        np.savez(os.path.join(directory, "projection.npz"), **extras)
+        with open(os.path.join(directory, "records.json"), "w", encoding="utf-8") as f:
+            json.dump(
+                {"dtype": self.dtype, "ids": self.ids, "documents": self.documents, "metadatas": self.metadatas},
+                f,
+                ensure_ascii=False,
+            )
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "CompactIndex":
+        """Load a saved index; with mmap the float32 vectors stay on disk."""
+        full = np.load(os.path.join(directory, "full.npy"), mmap_mode="r" if mmap else None)
+        codes = np.load(os.path.join(directory, "codes.npy"))
+        with np.load(os.path.join(directory, "projection.npz")) as proj:
+            mean = proj["mean"] if "mean" in proj else None
+            components = proj["components"] if "components" in proj else None
+            scale = proj["scale"] if "scale" in proj else None
+        with open(os.path.join(directory, "records.json"), encoding="utf-8") as f:
+            records = json.load(f)
+        return cls(
+            records["ids"], records["documents"], records["metadatas"],
+            full, codes, mean, components, scale, records["dtype"],
+        )
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from sentence_transformers import SentenceTransformer
 
 class MiniLMEmbedder:
@@ -5,4 +7,10 @@ class MiniLMEmbedder:
         self.model = SentenceTransformer(model_name)
 
     def embed(self, texts: list[str]) -> list[list[float]]:
-        return self.model.encode(texts, normalize_embeddings=True).tolist()
\ No newline at end of file
+        return self.model.encode(texts, normalize_embeddings=True).tolist()
+
+
+@lru_cache(maxsize=None)
+def get_embedder(model_name: str = "all-MiniLM-L6-v2") -> MiniLMEmbedder:
+    """One loaded model per name, shared by the vector store, ingestion and the SQL cache."""
+    return MiniLMEmbedder(model_name=model_name)
@@ -0,0 +1,43 @@
+"""
+Helpers shared by the vector index tuning commands: exact ground truth,
+recall@k and latency percentiles.
+"""
+import time
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    return float(np.percentile(np.asarray(values, dtype=np.float64), q)) if len(values) else 0.0
+
+
+def recall_at_k(found: Sequence[str], expected: Sequence[str]) -> float:
+    """Fraction of the reference ids that were retrieved."""
+    if not expected:
+        return 1.0
+    return len(set(found) & set(expected)) / len(expected)
+
+
+def exact_top_k(embeddings: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Brute-force top-k row indices by inner product (cosine for normalized vectors)."""
+    scores = queries @ embeddings.T
+    k = min(k, embeddings.shape[0])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(scores, top, axis=1).argsort(axis=1)[:, ::-1]
+    return np.take_along_axis(top, order, axis=1)
+
+
+def timed(fn: Callable, *args, **kwargs):
+    """Call fn and return (result, elapsed milliseconds)."""
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - started) * 1000.0
+
+
+def summarize(recalls: List[float], latencies_ms: List[float]) -> Dict[str, float]:
+    return {
+        "recall": round(float(np.mean(recalls)) if recalls else 0.0, 4),
+        "p50_ms": round(percentile(latencies_ms, 50), 3),
+        "p99_ms": round(percentile(latencies_ms, 99), 3),
+    }
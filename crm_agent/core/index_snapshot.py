@@ -0,0 +1,111 @@
+"""
+Vector index snapshots - export a Chroma collection to a single compressed file
+and restore it without re-running OCR, chunking or embedding.
+
+File layout (numpy .npz, deflate-compressed):
+- header: JSON (format version, embedding model, dimension, count, collection)
+- embeddings: float32 matrix, one row per chunk
+- records: JSON with ids, chunk texts and metadata, aligned with the matrix rows
+"""
+import json
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from crm_agent.core.vector_store import ChromaStore
+
+SNAPSHOT_VERSION = 1
+
+
+def _json_blob(obj: Any) -> np.ndarray:
+    return np.frombuffer(json.dumps(obj, ensure_ascii=False).encode("utf-8"), dtype=np.uint8)
+
+
+def _from_blob(arr: np.ndarray) -> Any:
+    return json.loads(arr.tobytes().decode("utf-8"))
+
+
+def load_vectors(store: ChromaStore, batch_size: int = 1000) -> Dict[str, Any]:
+    """Read every chunk of `store` into {"embeddings", "ids", "documents", "metadatas"}."""
+    ids: List[str] = []
+    documents: List[str] = []
+    metadatas: List[Dict[str, Any]] = []
+    blocks: List[np.ndarray] = []
+    for page in store.iter_all(batch_size=batch_size):
+        ids.extend(page["ids"])
+        documents.extend(page["documents"])
+        metadatas.extend(page["metadatas"])
+        blocks.append(np.asarray(page["embeddings"], dtype=np.float32))
+    embeddings = np.vstack(blocks) if blocks else np.zeros((0, 0), dtype=np.float32)
+    return {"embeddings": embeddings, "ids": ids, "documents": documents, "metadatas": metadatas}
+
+
+def export_snapshot(store: ChromaStore, path: str, batch_size: int = 1000) -> Dict[str, Any]:
+    """Write every chunk of `store` to `path`. Returns the snapshot header."""
+    data = load_vectors(store, batch_size=batch_size)
+    embeddings = data["embeddings"]
+    header = {
+        "version": SNAPSHOT_VERSION,
+        "embed_model": store.embed_model,
+        "collection": store.collection_name,
+        "collection_metadata": store.collection.metadata,
+        "dim": int(embeddings.shape[1]) if embeddings.size else 0,
+        "count": len(data["ids"]),
+        "created_at": int(time.time()),
+    }
+    with open(path, "wb") as f:
+        np.savez_compressed(
+            f,
+            header=_json_blob(header),
+            embeddings=embeddings,
+            records=_json_blob({"ids": data["ids"], "documents": data["documents"], "metadatas": data["metadatas"]}),
+        )
+    return header
+
+
+def read_snapshot(path: str) -> Dict[str, Any]:
+    """Load a snapshot file into {"header", "embeddings", "ids", "documents", "metadatas"}."""
+    with np.load(path, allow_pickle=False) as data:
+        header = _from_blob(data["header"])
+        if header.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {header.get('version')} (expected {SNAPSHOT_VERSION})")
+        embeddings = data["embeddings"].astype(np.float32, copy=False)
+        records = _from_blob(data["records"])
+    if len(records["ids"]) != embeddings.shape[0]:
+        raise ValueError("Corrupt snapshot: record count does not match embedding rows")
+    return {"header": header, "embeddings": embeddings, **records}
+
+
+def import_snapshot(store: ChromaStore, path: str, batch_size: int = 1000, replace: bool = False, force: bool = False) -> Dict[str, Any]:
+    """Upsert every chunk of the snapshot at `path` into `store`.
+
+    Refuses snapshots built with a different embedding model unless `force`,
+    since their vectors would not be comparable with new query embeddings.
+    A replaced or still empty collection is recreated with the snapshot's
+    collection metadata, so the HNSW space the vectors were indexed with is kept.
+    """
+    snap = read_snapshot(path)
+    header = snap["header"]
+    if header["embed_model"] != store.embed_model and not force:
+        raise ValueError(
+            f"Snapshot was built with '{header['embed_model']}' but the store uses '{store.embed_model}'"
+        )
+    if replace or store.count() == 0:
+        store.reset(header.get("collection_metadata") or {})
+
+    inserted = 0
+    embeddings = snap["embeddings"]
+    for start in range(0, len(snap["ids"]), batch_size):
+        end = start + batch_size
+        chunks = [
+            {"id": i, "text": t, "metadata": m, "embedding": e}
+            for i, t, m, e in zip(
+                snap["ids"][start:end],
+                snap["documents"][start:end],
+                snap["metadatas"][start:end],
+                embeddings[start:end].tolist(),
+            )
+        ]
+        inserted += store.upsert(chunks)
+    return {"header": header, "inserted": inserted}
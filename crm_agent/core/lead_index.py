@@ -0,0 +1,238 @@
+"""
+In-process columnar lead index for interactive shortlisting.
+
+Lead attributes are held as NumPy arrays: budgets as float64 (NaN for NULL),
+status/project/unit type as dictionary-encoded int32 codes, and conversation
+dates as proleptic ordinals (-1 for NULL). `shortlist` evaluates the same
+filters as `crm_agent.core.services.shortlist_leads` as vectorized boolean
+masks and returns matching lead ids in ascending order.
+
+`refresh` compares the `ChangeCounter` revision with the one the index was built
+at and only re-reads leads written since. Writers bump the counter in the same
+transaction as the rows they stamp, so a revision is never visible before its
+rows. Deletes also bump `Lead.DELETE_COUNTER`, which triggers a full rebuild.
+Writes through `QuerySet.update()` or raw SQL bypass the counters; bump
+`Lead.REVISION_COUNTER` (or `Lead.DELETE_COUNTER` after deletes) in the same
+transaction.
+"""
+import os
+import threading
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from coreapp.models import ChangeCounter, Lead
+from coreapp.normalization import project_key, unit_type_key
+from crm_agent.core.services import BUDGET_BANDS, UNKNOWN, canonical_status, facet_counts
+
+_COLUMNS = (
+    "id", "budget_min", "budget_max", "status", "project_key",
+    "unit_type_key", "last_conversation_date",
+)
+_FETCH_CHUNK = 5000
+
+
+class _Dictionary:
+    """Value ↔ int32 code mapping that only grows."""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def encode(self, value) -> int:
+        value = value or ""
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, values: Iterable[str]) -> np.ndarray:
+        return np.array([self.codes[v] for v in values if v in self.codes], dtype=np.int32)
+
+
+class LeadIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.revision = -1
+        self.deletes = -1
+        self._reset()
+
+    def _reset(self):
+        self.ids = np.empty(0, dtype=np.int64)
+        self.budget_min = np.empty(0, dtype=np.float64)
+        self.budget_max = np.empty(0, dtype=np.float64)
+        self.status = np.empty(0, dtype=np.int32)
+        self.project = np.empty(0, dtype=np.int32)
+        self.unit_type = np.empty(0, dtype=np.int32)
+        self.conversation_date = np.empty(0, dtype=np.int64)
+        self._positions: Dict[int, int] = {}
+        self._status_dict = _Dictionary()
+        self._project_dict = _Dictionary()
+        self._unit_dict = _Dictionary()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def refresh(self) -> int:
+        """Bring the index up to date; returns the number of leads (re)loaded."""
+        with self._lock:
+            current = ChangeCounter.current(Lead.REVISION_COUNTER)
+            deletes = ChangeCounter.current(Lead.DELETE_COUNTER)
+            if current == self.revision and deletes == self.deletes:
+                return 0
+            # Read the counters before the rows: anything written meanwhile is
+            # fetched again on the next refresh, never missed
+            if self.revision >= 0 and deletes == self.deletes:
+                loaded = self._load(self._rows(Lead.objects.filter(revision__gt=self.revision)))
+            else:
+                # First build, or leads were deleted since the last refresh
+                self._reset()
+                loaded = self._load(self._rows(Lead.objects.all()))
+            self.revision, self.deletes = current, deletes
+            return loaded
+
+    @staticmethod
+    def _rows(qs):
+        return qs.order_by("id").values_list(*_COLUMNS).iterator(chunk_size=_FETCH_CHUNK)
+
+    def _load(self, rows) -> int:
+        loaded = 0
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= _FETCH_CHUNK:
+                self._merge(chunk)
+                loaded += len(chunk)
+                chunk = []
+        if chunk:
+            self._merge(chunk)
+            loaded += len(chunk)
+        return loaded
+
+    def _merge(self, rows):
+        n = len(rows)
+        ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=n)
+        budget_min = np.array([np.nan if r[1] is None else float(r[1]) for r in rows], dtype=np.float64)
+        budget_max = np.array([np.nan if r[2] is None else float(r[2]) for r in rows], dtype=np.float64)
+        status = np.fromiter((self._status_dict.encode(r[3]) for r in rows), dtype=np.int32, count=n)
+        project = np.fromiter((self._project_dict.encode(r[4]) for r in rows), dtype=np.int32, count=n)
+        unit_type = np.fromiter((self._unit_dict.encode(r[5]) for r in rows), dtype=np.int32, count=n)
+        dates = np.fromiter((r[6].toordinal() if r[6] else -1 for r in rows), dtype=np.int64, count=n)
+
+        positions = np.fromiter((self._positions.get(int(i), -1) for i in ids), dtype=np.int64, count=n)
+        known = positions >= 0
+        if known.any():
+            at = positions[known]
+            self.budget_min[at] = budget_min[known]
+            self.budget_max[at] = budget_max[known]
+            self.status[at] = status[known]
+            self.project[at] = project[known]
+            self.unit_type[at] = unit_type[known]
+            self.conversation_date[at] = dates[known]
+        new = ~known
+        if new.any():
+            start = len(self.ids)
+            self._positions.update((int(i), start + k) for k, i in enumerate(ids[new]))
+            self.ids = np.concatenate([self.ids, ids[new]])
+            self.budget_min = np.concatenate([self.budget_min, budget_min[new]])
+            self.budget_max = np.concatenate([self.budget_max, budget_max[new]])
+            self.status = np.concatenate([self.status, status[new]])
+            self.project = np.concatenate([self.project, project[new]])
+            self.unit_type = np.concatenate([self.unit_type, unit_type[new]])
+            self.conversation_date = np.concatenate([self.conversation_date, dates[new]])
+
+    def shortlist(
+        self,
+        project_enquired=None,
+        budget_min=None,
+        budget_max=None,
+        unit_types=None,
+        status=None,
+        date_from: date = None,
+        date_to: date = None,
+    ) -> np.ndarray:
+        """Ids of leads matching the filters, ascending (same semantics as shortlist_leads)."""
+        with self._lock:
+            mask = self._mask(project_enquired, budget_min, budget_max, unit_types, status, date_from, date_to)
+            return np.sort(self.ids[mask])
+
+    def facets(self, **filters) -> Dict:
+        """Same result as services.lead_facets, from one pass over the matching rows."""
+        with self._lock:
+            mask = self._mask(**filters)
+            bounds = np.array([lower for lower, _ in BUDGET_BANDS], dtype=np.float64)
+            budget_max = self.budget_max[mask]
+            # Band index per row; len(BUDGET_BANDS) marks NULL budgets
+            bands = np.where(
+                np.isnan(budget_max),
+                len(BUDGET_BANDS),
+                np.maximum(np.searchsorted(bounds, budget_max, side="right") - 1, 0),
+            )
+            combined = np.stack([self.status[mask], self.project[mask], self.unit_type[mask], bands], axis=1)
+            cells, counts = np.unique(combined, axis=0, return_counts=True) if len(combined) else ([], [])
+            band_labels = [label for _, label in BUDGET_BANDS] + [UNKNOWN]
+            return facet_counts(
+                (
+                    self._status_dict.values[st],
+                    self._project_dict.values[pr],
+                    self._unit_dict.values[ut],
+                    band_labels[band],
+                    int(n),
+                )
+                for (st, pr, ut, band), n in zip(cells, counts)
+            )
+
+    def _mask(
+        self,
+        project_enquired=None,
+        budget_min=None,
+        budget_max=None,
+        unit_types=None,
+        status=None,
+        date_from: date = None,
+        date_to: date = None,
+    ) -> np.ndarray:
+        mask = np.ones(len(self.ids), dtype=bool)
+        if project_enquired:
+            mask &= np.isin(self.project, self._project_dict.lookup([project_key(project_enquired)]))
+        # NaN comparisons are False, like NULL in SQL
+        if budget_min is not None:
+            mask &= self.budget_max >= float(budget_min)
+        if budget_max is not None:
+            mask &= self.budget_min <= float(budget_max)
+        if unit_types:
+            keys = {unit_type_key(u) for u in unit_types if u is not None}
+            keys.discard("")
+            if keys:
+                mask &= np.isin(self.unit_type, self._unit_dict.lookup(keys))
+        if status:
+            canonical = canonical_status(status)
+            if canonical:
+                wanted = [canonical]
+            else:
+                cleaned = str(status).strip().lower()
+                wanted = [v for v in self._status_dict.values if v.lower() == cleaned]
+            mask &= np.isin(self.status, self._status_dict.lookup(wanted))
+        if date_from:
+            mask &= self.conversation_date >= date_from.toordinal()
+        if date_to:
+            mask &= (self.conversation_date >= 0) & (self.conversation_date <= date_to.toordinal())
+        return mask
+
+
+_index: Optional[LeadIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_lead_index() -> Optional[LeadIndex]:
+    """Shared refreshed index when LEAD_INDEX=1, else None (shortlists go to the database)."""
+    global _index
+    if os.getenv("LEAD_INDEX", "0").lower() not in ("1", "true", "yes"):
+        return None
+    with _index_lock:
+        if _index is None:
+            _index = LeadIndex()
+    _index.refresh()
+    return _index
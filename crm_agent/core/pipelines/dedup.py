@@ -0,0 +1,89 @@
+from typing import Dict, List, Optional, Tuple
+import re
+import zlib
+
+import numpy as np
+
+_WORD = re.compile(r"\w+")
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def _lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """Pick (bands, rows) with bands * rows == num_perm.
+
+    Uses the largest S-curve midpoint (1/bands) ** (1/rows) that does not exceed
+    the threshold: candidates are cheap to verify, missed duplicates are not.
+    """
+    options = []
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows == 0:
+            bands = num_perm // rows
+            options.append(((1.0 / bands) ** (1.0 / rows), bands, rows))
+    below = [o for o in options if o[0] <= threshold]
+    _, bands, rows = max(below) if below else min(options)
+    return bands, rows
+
+
+class MinHashDeduper:
+    """MinHash + LSH index for near-duplicate text detection.
+
+    Texts are reduced to sets of word shingles; two texts are near-duplicates when
+    the Jaccard similarity of their shingle sets, estimated from `num_perm` MinHash
+    values, reaches `threshold`. LSH banding keeps lookups sub-linear: only texts
+    sharing at least one band bucket are compared.
+    """
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = _lsh_params(threshold, num_perm)
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64) % _MERSENNE_PRIME
+        self._b = rng.randint(0, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64) % _MERSENNE_PRIME
+
+        self._buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(self.bands)]
+        self._signatures: Dict[str, np.ndarray] = {}
+
+    def _shingles(self, text: str) -> np.ndarray:
+        words = _WORD.findall(text.lower())
+        n = self.shingle_size
+        grams = {" ".join(words[i:i + n]) for i in range(max(1, len(words) - n + 1))}
+        return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = self._shingles(text)
+        if hashes.size == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME
+        return np.bitwise_and(permuted, _MAX_HASH).min(axis=0)
+
+    def _band_keys(self, sig: np.ndarray) -> List[bytes]:
+        return [sig[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def add(self, key: str, text: str, sig: Optional[np.ndarray] = None) -> None:
+        sig = self.signature(text) if sig is None else sig
+        self._signatures[key] = sig
+        for bucket, band in zip(self._buckets, self._band_keys(sig)):
+            bucket.setdefault(band, []).append(key)
+
+    def query(self, text: str, sig: Optional[np.ndarray] = None) -> List[Tuple[str, float]]:
+        """Return (key, estimated Jaccard) for indexed texts at or above the threshold."""
+        sig = self.signature(text) if sig is None else sig
+        candidates = set()
+        for bucket, band in zip(self._buckets, self._band_keys(sig)):
+            candidates.update(bucket.get(band, ()))
+        matches = []
+        for key in candidates:
+            jaccard = float(np.mean(self._signatures[key] == sig))
+            if jaccard >= self.threshold:
+                matches.append((key, jaccard))
+        return sorted(matches, key=lambda m: -m[1])
+
+    def __len__(self) -> int:
+        return len(self._signatures)
@@ -1,10 +1,11 @@
 import os
 import hashlib
-from typing import Dict
+from typing import Dict, List, Optional
 
 from crm_agent.core.pipelines.extractors import PdfExtractor
 from crm_agent.core.pipelines.chunking import TextChunker
-from crm_agent.core.embeddings import MiniLMEmbedder
+from crm_agent.core.pipelines.dedup import MinHashDeduper
+from crm_agent.core.embeddings import get_embedder
 from crm_agent.core.vector_store import ChromaStore
 
 
@@ -13,12 +14,48 @@ def _make_id(text: str, meta: Dict) -> str:
     return hashlib.md5(key.encode("utf-8")).hexdigest()
 
 
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.9"))
+
+
 class DocumentIngestor:
-    def __init__(self, persist_dir: str, embed_model: str = "all-MiniLM-L6-v2", ocr_lang: str = "eng"):
+    def __init__(
+        self,
+        persist_dir: str,
+        embed_model: str = "all-MiniLM-L6-v2",
+        ocr_lang: str = "eng",
+        near_dup_threshold: Optional[float] = NEAR_DUP_THRESHOLD,
+    ):
+        """near_dup_threshold: Jaccard similarity at which a chunk counts as a near-duplicate
+        of one already in the project (or earlier in the same file); None or 0 disables."""
         self.extractor = PdfExtractor(ocr_lang=ocr_lang)
         self.chunker = TextChunker()
-        self.embedder = MiniLMEmbedder(model_name=embed_model)
+        self.embedder = get_embedder(embed_model)
         self.store = ChromaStore(persist_dir=persist_dir, collection="brochures", embed_model=embed_model)
+        self.near_dup_threshold = near_dup_threshold
+
+    def _project_deduper(self, project_name: str) -> Optional[MinHashDeduper]:
+        """MinHash index over every chunk already stored for the project."""
+        if not self.near_dup_threshold:
+            return None
+        deduper = MinHashDeduper(threshold=self.near_dup_threshold)
+        for page in self.store.iter_all(include=["documents"], project_name=project_name):
+            for chunk_id, text in zip(page["ids"], page["documents"]):
+                deduper.add(chunk_id, text or "")
+        return deduper
+
+    def _drop_near_duplicates(self, chunks: List[Dict], project_name: str) -> List[Dict]:
+        deduper = self._project_deduper(project_name)
+        if deduper is None:
+            return chunks
+        kept = []
+        for c in chunks:
+            sig = deduper.signature(c["text"])
+            # A match on the chunk's own id is a re-ingest of the same chunk: keep it (upsert).
+            if any(key != c["id"] for key, _ in deduper.query(c["text"], sig=sig)):
+                continue
+            deduper.add(c["id"], c["text"], sig=sig)
+            kept.append(c)
+        return kept
 
     def ingest_pdf(self, pdf_path: str, project_name: str) -> Dict:
         pages = self.extractor.extract_pages(pdf_path)
@@ -35,12 +72,22 @@ class DocumentIngestor:
             c["id"] = h
             uniq.append(c)
 
-        embeddings = self.embedder.embed([c["text"] for c in uniq])
+        # drop chunks that nearly repeat ones already indexed for this project
+        # (re-issued brochure versions, shared disclaimer/footer pages)
+        exact_unique = len(uniq)
+        uniq = self._drop_near_duplicates(uniq, project_name)
+
+        embeddings = self.embedder.embed([c["text"] for c in uniq]) if uniq else []
         for c, emb in zip(uniq, embeddings):
             c["embedding"] = emb
 
         inserted = self.store.upsert(uniq)
         ocr_pages = sum(1 for p in pages if p.get("has_ocr"))
-        return {"inserted_chunks": inserted, "pages_processed": len(pages), "ocr_pages": ocr_pages}
+        return {
+            "inserted_chunks": inserted,
+            "pages_processed": len(pages),
+            "ocr_pages": ocr_pages,
+            "near_duplicates_skipped": exact_unique - len(uniq),
+        }
 
 
@@ -9,6 +9,8 @@ class LeadOut(BaseModel):
 
 class ImportResult(BaseModel):
     inserted: int
+    updated: int = 0
+    unchanged: int = 0
 
 class ShortlistFilters(BaseModel):
     project_enquired: Optional[str] = None
@@ -18,11 +20,25 @@ class ShortlistFilters(BaseModel):
     status: Optional[str] = None
     date_from: Optional[date] = None
     date_to: Optional[date] = None
+    summary_query: Optional[str] = Field(default=None, description="Words the last conversation summary must contain, e.g. 'sea view'")
+    # Paging/output options (not filters)
+    after_id: Optional[int] = Field(default=None, ge=0, description="Return leads with id greater than this (next_after_id of the previous page)")
+    limit: int = Field(500, ge=1, le=5000, description="Page size")
+    stream: bool = Field(False, description="Stream every match as NDJSON instead of one page")
+    count_only: bool = Field(False, description="Only return the number of matches")
 
 class SearchQuery(BaseModel):
     q: str = Field(..., description="Search query string")
     k: int = Field(4, ge=1, le=20, description="Number of results to return")
     project: str = Field("", description="Filter by project name (empty = no filter)")
 
+class BatchSearchQuery(BaseModel):
+    items: List[SearchQuery] = Field(..., min_length=1, max_length=50, description="Searches to run, answered in order")
+    fields: Optional[List[str]] = Field(default=None, description="Subset of text, metadata, distance to return (default: all)")
+    snippet_chars: int = Field(0, ge=0, le=1000, description="If > 0, add a snippet of up to this many characters")
+
 class T2SQLQuery(BaseModel):
-    question: str = Field(..., description="Natural language question to convert to SQL")
\ No newline at end of file
+    question: str = Field(..., description="Natural language question to convert to SQL")
+
+class T2SQLPage(BaseModel):
+    cursor: str = Field(..., description="next_cursor from a truncated /t2sql/query or /t2sql/next response")
\ No newline at end of file
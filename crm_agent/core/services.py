@@ -1,8 +1,22 @@
-from typing import Iterable, Tuple
+from typing import Dict, Iterable, Tuple
+from collections import Counter
 from datetime import date
-from functools import reduce
-from django.db.models import Q, QuerySet
+from django.db.models import Case, CharField, Count, QuerySet, Value, When
 from coreapp.models import Lead
+from coreapp.normalization import canonical_status, project_key, unit_type_key
+from crm_agent.core.summary_search import filter_summary
+
+# Facet bands over budget_max (what the lead can afford): (lower bound, label), ascending
+BUDGET_BANDS = [
+    (0, "<1M"),
+    (1_000_000, "1M-2M"),
+    (2_000_000, "2M-3M"),
+    (3_000_000, "3M-5M"),
+    (5_000_000, "5M+"),
+]
+UNKNOWN = "unknown"
+FACETS = ("status", "project", "unit_type", "budget_band")
+
 
 def shortlist_leads(
     project_enquired=None,
@@ -12,23 +26,68 @@ def shortlist_leads(
     status=None,
     date_from: date = None,
     date_to: date = None,
+    summary_query: str = None,
 ) -> QuerySet:
     qs = Lead.objects.all()
     if project_enquired:
-        qs = qs.filter(project_enquired__icontains=project_enquired)
+        qs = qs.filter(project_key=project_key(project_enquired))
     if budget_min is not None:
         qs = qs.filter(budget_max__gte=budget_min)  # lead can afford at least min
     if budget_max is not None:
         qs = qs.filter(budget_min__lte=budget_max)
     if unit_types:
-        cleaned = [str(u).strip() for u in unit_types if u is not None and str(u).strip() != ""]
-        if cleaned:
-            # OR across variants, case-insensitive substring
-            qs = qs.filter(reduce(lambda a, b: a | b, [Q(unit_type__icontains=u) for u in cleaned]))
+        keys = {unit_type_key(u) for u in unit_types if u is not None}
+        keys.discard("")
+        if keys:
+            # "2 bed", "2BR" and "2 Bedroom" all share one key
+            qs = qs.filter(unit_type_key__in=sorted(keys))
     if status:
-        qs = qs.filter(status__iexact=str(status).strip())
+        # Statuses are stored canonical (Lead.save, imports), so an exact match can use the
+        # status index; iexact cannot. Unknown statuses fall back to a case-insensitive match
+        cleaned = str(status).strip()
+        canonical = canonical_status(cleaned)
+        qs = qs.filter(status=canonical) if canonical else qs.filter(status__iexact=cleaned)
     if date_from:
         qs = qs.filter(last_conversation_date__gte=date_from)
     if date_to:
         qs = qs.filter(last_conversation_date__lte=date_to)
-    return qs
\ No newline at end of file
+    if summary_query:
+        qs = filter_summary(qs, summary_query)
+    return qs
+
+
+def _budget_band_expression() -> Case:
+    # Highest band first so each row lands in exactly one When; below the second
+    # bound (including negative budgets) is the first band
+    whens = [When(budget_max__gte=lower, then=Value(label)) for lower, label in reversed(BUDGET_BANDS[1:])]
+    whens.append(When(budget_max__isnull=False, then=Value(BUDGET_BANDS[0][1])))
+    return Case(*whens, default=Value(UNKNOWN), output_field=CharField())
+
+
+def _histogram(counter: Counter) -> Dict[str, int]:
+    return dict(sorted(counter.items(), key=lambda item: (-item[1], item[0])))
+
+
+def facet_counts(cells: Iterable[Tuple[str, str, str, str, int]]) -> Dict:
+    """Marginalize (status, project, unit_type, budget_band, count) cells into one histogram per facet."""
+    facets = {name: Counter() for name in FACETS}
+    total = 0
+    for *values, n in cells:
+        total += n
+        for name, value in zip(FACETS, values):
+            facets[name][value or UNKNOWN] += n
+    return {"total": total, "facets": {name: _histogram(c) for name, c in facets.items()}}
+
+
+def lead_facets(qs: QuerySet) -> Dict:
+    """Status/project/unit type/budget band histograms for `qs` from a single GROUP BY query.
+
+    Projects and unit types are reported by their normalized keys (the values shortlist matches on).
+    """
+    cells = (
+        qs.annotate(budget_band=_budget_band_expression())
+        .values_list("status", "project_key", "unit_type_key", "budget_band")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    return facet_counts(cells)
\ No newline at end of file
@@ -0,0 +1,55 @@
+import re
+from typing import List
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+_WORD = re.compile(r"[a-z0-9]+")
+ELLIPSIS = "..."
+_STOPWORDS = {
+    "the", "and", "for", "are", "with", "what", "does", "have", "has", "any", "about",
+    "this", "that", "from", "there", "which", "how", "can", "you", "your", "its",
+}
+
+
+def _terms(text: str) -> List[str]:
+    return [w for w in _WORD.findall(text.lower()) if len(w) > 2 and w not in _STOPWORDS]
+
+
+def extract_snippet(text: str, query: str, max_chars: int = 240) -> str:
+    """Return the sentence of `text` that best matches `query`, trimmed to `max_chars`.
+
+    Sentences are scored by how many distinct query terms they contain. The best
+    sentence is padded with the following ones while it fits; an over-long sentence
+    is cut to a window around its first matching term, with "..." on the cut sides
+    counted within `max_chars`.
+    """
+    text = (text or "").strip()
+    if not text or max_chars <= 0:
+        return ""
+    if len(text) <= max_chars:
+        return text
+
+    sentences = [s.strip() for s in _SENTENCE_SPLIT.split(text) if s.strip()]
+    terms = set(_terms(query))
+
+    def score(sentence: str) -> int:
+        return len(terms.intersection(_terms(sentence)))
+
+    best = max(range(len(sentences)), key=lambda i: (score(sentences[i]), -i)) if sentences else 0
+    snippet = sentences[best] if sentences else text
+
+    if len(snippet) > max_chars:
+        lowered = snippet.lower()
+        hits = [lowered.find(t) for t in terms if t in lowered]
+        center = min(hits) if hits else 0
+        width = max_chars - 2 * len(ELLIPSIS)
+        if width <= 0:
+            return snippet[:max_chars]
+        start = max(0, min(center - width // 3, len(snippet) - width))
+        cut = snippet[start:start + width].strip()
+        return (ELLIPSIS if start > 0 else "") + cut + (ELLIPSIS if start + width < len(snippet) else "")
+
+    for nxt in sentences[best + 1:]:
+        if len(snippet) + 1 + len(nxt) > max_chars:
+            break
+        snippet = f"{snippet} {nxt}"
+    return snippet
@@ -0,0 +1,73 @@
+"""
+Per-connection SQLite pragmas for the Django database and the LangGraph
+checkpoint database.
+
+Defaults favour concurrent readers and writers: WAL journal (readers never block
+the writer), synchronous=NORMAL (safe with WAL, fsync only at checkpoints),
+a memory-mapped read path, a larger page cache, temp tables in memory and a
+busy timeout so writers queue instead of failing with "database is locked".
+
+Each pragma is configurable with SQLITE_<NAME> (e.g. SQLITE_MMAP_SIZE=0);
+an empty value leaves SQLite's default. SQLITE_TUNING=0 disables all of them.
+"""
+import os
+import re
+from typing import Dict, List, Optional
+
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": "5000",       # ms
+    "cache_size": "-65536",       # negative = KiB, i.e. 64 MiB per connection
+    "mmap_size": "268435456",     # 256 MiB
+    "temp_store": "MEMORY",
+}
+
+_VALUE = re.compile(r"^-?\d+$|^[A-Za-z_]+$")
+
+
+def pragmas_from_env() -> Dict[str, str]:
+    if os.getenv("SQLITE_TUNING", "1").lower() in ("0", "false", "no"):
+        return {}
+    pragmas = {}
+    for name, default in DEFAULT_PRAGMAS.items():
+        value = os.getenv(f"SQLITE_{name.upper()}", default).strip()
+        if not value:
+            continue
+        if not _VALUE.match(value):
+            raise ValueError(f"Invalid value for SQLITE_{name.upper()}: {value!r}")
+        pragmas[name] = value
+    return pragmas
+
+
+def pragma_statements(pragmas: Optional[Dict[str, str]] = None) -> List[str]:
+    pragmas = pragmas_from_env() if pragmas is None else pragmas
+    # busy_timeout first so switching the journal mode can wait for other connections
+    order = sorted(pragmas, key=lambda name: name != "busy_timeout")
+    return [f"PRAGMA {name}={pragmas[name]}" for name in order]
+
+
+def apply_pragmas(conn, pragmas: Optional[Dict[str, str]] = None) -> None:
+    """Run the pragmas on a DB-API sqlite3 connection."""
+    cursor = conn.cursor()
+    try:
+        for statement in pragma_statements(pragmas):
+            cursor.execute(statement)
+    finally:
+        cursor.close()
+
+
+def configure_connection(sender, connection, **kwargs) -> None:
+    """`connection_created` receiver: tune every new Django SQLite connection.
+
+    Aliases marked READ_ONLY (opened with mode=ro) keep the file's journal mode
+    and additionally refuse writes with query_only.
+    """
+    if connection.vendor != "sqlite":
+        return
+    if connection.settings_dict.get("READ_ONLY"):
+        pragmas = {k: v for k, v in pragmas_from_env().items() if k != "journal_mode"}
+        pragmas["query_only"] = "ON"
+        apply_pragmas(connection.connection, pragmas)
+    else:
+        apply_pragmas(connection.connection)
@@ -0,0 +1,162 @@
+"""
+Full-text search over Lead.last_conversation_summary.
+
+On SQLite this queries the FTS5 table created by migration 0008 (ranked by
+bm25); on PostgreSQL it uses to_tsvector/ts_rank over the GIN expression index
+from migration 0009. Other databases fall back to AND-ed icontains matching
+ordered by recency.
+
+SQLite rebuilds coreapp_lead for most later AlterField/RemoveField operations,
+which drops the table's triggers. coreapp runs `ensure_fts_triggers` after every
+migrate (post_migrate), so any migration touching Lead gets them back.
+"""
+import logging
+import re
+from typing import Dict, List
+
+from django.db import connection, connections
+from django.db.models import Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "coreapp_lead_fts"
+# Must match the indexed expression in migration 0009 for PostgreSQL to use the index
+PG_TSVECTOR = "to_tsvector('english', coreapp_lead.last_conversation_summary)"
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+logger = logging.getLogger(__name__)
+
+# Keep coreapp_lead_fts in sync with coreapp_lead (same statements as migration 0008)
+FTS_TRIGGERS = {
+    "coreapp_lead_fts_ai": f"""
+        CREATE TRIGGER IF NOT EXISTS coreapp_lead_fts_ai AFTER INSERT ON coreapp_lead BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, last_conversation_summary)
+            VALUES (new.id, new.last_conversation_summary);
+        END
+    """,
+    "coreapp_lead_fts_ad": f"""
+        CREATE TRIGGER IF NOT EXISTS coreapp_lead_fts_ad AFTER DELETE ON coreapp_lead BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, last_conversation_summary)
+            VALUES ('delete', old.id, old.last_conversation_summary);
+        END
+    """,
+    "coreapp_lead_fts_au": f"""
+        CREATE TRIGGER IF NOT EXISTS coreapp_lead_fts_au AFTER UPDATE OF last_conversation_summary ON coreapp_lead BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, last_conversation_summary)
+            VALUES ('delete', old.id, old.last_conversation_summary);
+            INSERT INTO {FTS_TABLE}(rowid, last_conversation_summary)
+            VALUES (new.id, new.last_conversation_summary);
+        END
+    """,
+}
+
+
+def query_terms(text: str) -> List[str]:
+    return [t.lower() for t in _TOKEN.findall(text or "")]
+
+
+def to_fts_query(text: str) -> str:
+    """'sea-view, payment plan?' → '"sea" "view" "payment" "plan"' (every term required).
+
+    Terms are quoted so user input can never be parsed as FTS5 operators.
+    """
+    return " ".join(f'"{term}"' for term in query_terms(text))
+
+
+def fts_enabled() -> bool:
+    return connection.vendor == "sqlite"
+
+
+def _pg_tsquery(text: str) -> str:
+    """Every term required, stemmed with the english config (same as the FTS5 porter tokenizer)."""
+    return " & ".join(query_terms(text))
+
+
+def filter_summary(qs: QuerySet, text: str) -> QuerySet:
+    """Restrict `qs` to leads whose summary contains every term of `text`."""
+    terms = query_terms(text)
+    if not terms:
+        return qs
+    if fts_enabled():
+        matches = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [to_fts_query(text)])
+        return qs.filter(id__in=matches)
+    if connection.vendor == "postgresql":
+        return qs.extra(where=[f"{PG_TSVECTOR} @@ to_tsquery('english', %s)"], params=[_pg_tsquery(text)])
+    condition = Q()
+    for term in terms:
+        condition &= Q(last_conversation_summary__icontains=term)
+    return qs.filter(condition)
+
+
+def search_summaries(text: str, limit: int = 20, offset: int = 0, snippet_tokens: int = 12) -> List[Dict]:
+    """Leads whose summary matches `text`, best match first.
+
+    Each hit has id, name, email, status, project_enquired, score (higher is
+    better) and a snippet with matches wrapped in [brackets].
+    """
+    from coreapp.models import Lead
+
+    terms = query_terms(text)
+    if not terms:
+        return []
+    if connection.vendor == "postgresql":
+        sql = f"""
+            SELECT id, name, email, status, project_enquired,
+                   ts_rank({PG_TSVECTOR}, query) AS score,
+                   ts_headline('english', last_conversation_summary, query,
+                               'StartSel=[, StopSel=], MaxWords=' || %s || ', MinWords=3') AS snippet
+            FROM coreapp_lead, to_tsquery('english', %s) AS query
+            WHERE {PG_TSVECTOR} @@ query
+            ORDER BY score DESC, id
+            LIMIT %s OFFSET %s
+        """
+        return _fetch(sql, [snippet_tokens, _pg_tsquery(text), limit, offset])
+    if not fts_enabled():
+        qs = filter_summary(Lead.objects.all(), text).order_by("-last_conversation_date", "-id")
+        hits = []
+        for row in qs.values("id", "name", "email", "status", "project_enquired", "last_conversation_summary")[offset:offset + limit]:
+            summary = row.pop("last_conversation_summary")
+            hits.append({**row, "score": None, "snippet": summary[:200]})
+        return hits
+
+    sql = f"""
+        SELECT l.id, l.name, l.email, l.status, l.project_enquired,
+               -bm25({FTS_TABLE}) AS score,
+               snippet({FTS_TABLE}, 0, '[', ']', '…', %s) AS snippet
+        FROM {FTS_TABLE}
+        JOIN coreapp_lead l ON l.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH %s
+        ORDER BY bm25({FTS_TABLE}), l.id
+        LIMIT %s OFFSET %s
+    """
+    return _fetch(sql, [snippet_tokens, to_fts_query(text), limit, offset])
+
+
+def ensure_fts_triggers(using: str = "default") -> List[str]:
+    """Recreate FTS sync triggers a table rebuild dropped; returns their names.
+
+    Rows written while they were missing never reached the index, so it is
+    rebuilt from coreapp_lead when any had to be recreated. No-op off SQLite or
+    before migration 0008 has created the FTS table.
+    """
+    conn = connections[using]
+    if conn.vendor != "sqlite":
+        return []
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT type, name FROM sqlite_master WHERE name = %s OR type = 'trigger'", [FTS_TABLE])
+        existing = {name for _, name in cursor.fetchall()}
+        if FTS_TABLE not in existing:
+            return []
+        missing = [name for name in FTS_TRIGGERS if name not in existing]
+        for name in missing:
+            cursor.execute(FTS_TRIGGERS[name])
+        if missing:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+            logger.warning(f"Recreated FTS triggers dropped by a coreapp_lead rebuild: {', '.join(missing)}")
+    return missing
+
+
+def _fetch(sql: str, params: list) -> List[Dict]:
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = [col[0] for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
@@ -1,12 +1,64 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
 import logging
+import os
 import chromadb
 from chromadb.config import Settings
-from crm_agent.core.embeddings import MiniLMEmbedder
+from crm_agent.core.embeddings import get_embedder
+from crm_agent.core.snippets import extract_snippet
+
+# Search result fields → Chroma `include` entries. "id" is always returned.
+FIELD_INCLUDE = {"text": "documents", "metadata": "metadatas", "distance": "distances"}
+
+logger = logging.getLogger(__name__)
+
+
+def hnsw_metadata(
+    space: Optional[str] = None,
+    m: Optional[int] = None,
+    construction_ef: Optional[int] = None,
+    search_ef: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Chroma collection metadata for the HNSW index; unset values keep Chroma defaults."""
+    meta = {
+        "hnsw:space": space,
+        "hnsw:M": m,
+        "hnsw:construction_ef": construction_ef,
+        "hnsw:search_ef": search_ef,
+    }
+    return {key: value for key, value in meta.items() if value not in (None, "")}
+
+
+def hnsw_metadata_from_env() -> Dict[str, Any]:
+    """HNSW settings from CHROMA_HNSW_SPACE / _M / _CONSTRUCTION_EF / _SEARCH_EF."""
+    def _int(name: str) -> Optional[int]:
+        value = os.getenv(name)
+        return int(value) if value else None
+    return hnsw_metadata(
+        space=os.getenv("CHROMA_HNSW_SPACE") or None,
+        m=_int("CHROMA_HNSW_M"),
+        construction_ef=_int("CHROMA_HNSW_CONSTRUCTION_EF"),
+        search_ef=_int("CHROMA_HNSW_SEARCH_EF"),
+    )
 
 
 class ChromaStore:
-    def __init__(self, persist_dir: str, collection: str = "brochures", embed_model: str = "all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        persist_dir: str,
+        collection: str = "brochures",
+        embed_model: str = "all-MiniLM-L6-v2",
+        hnsw: Optional[Dict[str, Any]] = None,
+    ):
+        """hnsw: collection metadata from `hnsw_metadata()`; defaults to the CHROMA_HNSW_* env vars.
+
+        Chroma fixes every HNSW setting when the collection is created. A configured
+        search ef that differs from an existing collection's triggers `rebuild()`;
+        space, M and construction ef are kept (export_index, then import_index
+        --replace to change them).
+        """
         # Silence noisy telemetry warnings from Chroma/posthog in dev
         logging.getLogger("chromadb.telemetry").setLevel(logging.CRITICAL)
         logging.getLogger("posthog").setLevel(logging.CRITICAL)
@@ -15,8 +67,67 @@ class ChromaStore:
             path=persist_dir,
             settings=Settings(anonymized_telemetry=False)
         )
-        self.collection = self.client.get_or_create_collection(collection)
-        self.embedder = MiniLMEmbedder(model_name=embed_model)
+        self.collection_name = collection
+        self.hnsw = hnsw_metadata_from_env() if hnsw is None else hnsw
+        try:
+            # Existing collections keep their build-time HNSW settings
+            self.collection = self.client.get_collection(collection)
+        except Exception:
+            self.collection = self.client.get_or_create_collection(collection, metadata=self.hnsw or None)
+        self._apply_search_ef()
+        self.embed_model = embed_model
+        self.embedder = get_embedder(embed_model)
+
+    def _apply_search_ef(self) -> None:
+        """Rebuild an existing collection whose search ef differs from the configured one.
+
+        modify() only changes the collection metadata; the HNSW segment keeps the
+        search ef it was created with, so the chunks are copied into a new collection.
+        """
+        current = dict(self.collection.metadata or {})
+        for key in ("hnsw:space", "hnsw:M", "hnsw:construction_ef"):
+            if key in self.hnsw and current.get(key, self.hnsw[key]) != self.hnsw[key]:
+                logger.warning(
+                    f"Collection '{self.collection_name}' was built with {key}={current.get(key)}; "
+                    f"configured {self.hnsw[key]} only applies to a newly built collection"
+                )
+        search_ef = self.hnsw.get("hnsw:search_ef")
+        if search_ef is not None and current.get("hnsw:search_ef") != search_ef:
+            logger.info(
+                f"Rebuilding '{self.collection_name}' ({self.collection.count()} chunks) "
+                f"to apply hnsw:search_ef={search_ef}"
+            )
+            self.rebuild()
+
+    def rebuild(self, batch_size: int = 1000) -> int:
+        """Recreate the collection with its build-time HNSW settings and the configured
+        search ef, and copy every chunk back. Returns the number of chunks copied."""
+        pages = list(self.iter_all(batch_size=batch_size))
+        self.reset(self.collection.metadata or {})
+        copied = 0
+        for page in pages:
+            self.collection.add(
+                ids=page["ids"], embeddings=page["embeddings"],
+                documents=page["documents"], metadatas=page["metadatas"],
+            )
+            copied += len(page["ids"])
+        return copied
+
+    @property
+    def space(self) -> str:
+        """Distance function of the collection ("l2" is Chroma's default)."""
+        metadata = self.collection.metadata or {}
+        return metadata.get("hnsw:space") or "l2"
+
+    def similarity(self, distance: Optional[float]) -> float:
+        """Convert a Chroma distance to a 0-1 similarity for unit-normalized embeddings.
+
+        l2 distances are squared (2 - 2cos), cosine and ip distances are 1 - cos.
+        """
+        if distance is None:
+            return 0.0
+        cos = 1.0 - distance / 2.0 if self.space == "l2" else 1.0 - distance
+        return max(0.0, min(1.0, cos))
 
     def upsert(self, chunks: List[Dict[str, Any]]) -> int:
         ids, docs, metas, embeds = [], [], [], []
@@ -29,21 +140,226 @@ class ChromaStore:
             self.collection.upsert(ids=ids, documents=docs, embeddings=embeds, metadatas=metas)
         return len(ids)
 
-    def search(self, query: str, k: int = 4, project_name: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Search using manual embedding since we provide embeddings in upsert."""
-        where = {"project_name": project_name} if project_name else None
-        query_embedding = self.embedder.embed([query])[0]
-        res = self.collection.query(query_embeddings=[query_embedding], n_results=k, where=where)
+    @staticmethod
+    def _unpack(res: Dict[str, Any], row: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Turn one row of a Chroma query result into a list of hit dicts."""
+        ids = res.get("ids", [[]])[row]
+        docs, metas, dists = res.get("documents"), res.get("metadatas"), res.get("distances")
+        n = len(ids) if limit is None else min(limit, len(ids))
         out = []
-        for i in range(len(res.get("ids", [[]])[0])):
-            out.append({
-                "id": res["ids"][0][i],
-                "text": res["documents"][0][i],
-                "metadata": res["metadatas"][0][i],
-                "distance": res["distances"][0][i] if "distances" in res else None
-            })
+        for i in range(n):
+            hit = {"id": ids[i]}
+            if docs is not None:
+                hit["text"] = docs[row][i]
+            if metas is not None:
+                hit["metadata"] = metas[row][i]
+            hit["distance"] = dists[row][i] if dists is not None else None
+            out.append(hit)
         return out
 
+    @staticmethod
+    def _include(fields: Optional[List[str]], snippet_chars: int) -> List[str]:
+        """Map requested result fields to Chroma's `include` (None = everything)."""
+        if fields is None:
+            return ["documents", "metadatas", "distances"]
+        unknown = set(fields) - set(FIELD_INCLUDE) - {"id"}
+        if unknown:
+            raise ValueError(f"Unknown search fields: {sorted(unknown)}")
+        include = [FIELD_INCLUDE[f] for f in FIELD_INCLUDE if f in fields]
+        if snippet_chars and "documents" not in include:
+            include.append("documents")  # snippets are cut from the chunk text
+        return include
+
+    @staticmethod
+    def _project(hits: List[Dict[str, Any]], query: str, fields: Optional[List[str]], snippet_chars: int) -> List[Dict[str, Any]]:
+        """Add snippets and drop fields that were only fetched to build them."""
+        for hit in hits:
+            if snippet_chars:
+                hit["snippet"] = extract_snippet(hit.get("text", ""), query, max_chars=snippet_chars)
+            if fields is not None:
+                if "text" not in fields:
+                    hit.pop("text", None)
+                if "distance" not in fields:
+                    hit.pop("distance", None)
+        return hits
+
+    def search(
+        self,
+        query: str,
+        k: int = 4,
+        project_name: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        snippet_chars: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """Search using manual embedding since we provide embeddings in upsert.
+
+        fields: subset of "text", "metadata", "distance" to fetch (None = all).
+        snippet_chars: if > 0, add a "snippet" around the best-matching sentence.
+        """
+        query_embedding = self.embedder.embed([query])[0]
+        return self.search_by_embedding(
+            query_embedding, k=k, project_name=project_name,
+            fields=fields, snippet_chars=snippet_chars, query_text=query,
+        )
+
+    def search_by_embedding(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        project_name: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        snippet_chars: int = 0,
+        query_text: str = "",
+    ) -> List[Dict[str, Any]]:
+        """Search with a precomputed query embedding."""
+        where = {"project_name": project_name} if project_name else None
+        res = self.collection.query(
+            query_embeddings=[embedding], n_results=k, where=where,
+            include=self._include(fields, snippet_chars),
+        )
+        return self._project(self._unpack(res), query_text, fields, snippet_chars)
+
+    def search_batch(
+        self,
+        queries: List[Dict[str, Any]],
+        fields: Optional[List[str]] = None,
+        snippet_chars: int = 0,
+    ) -> List[List[Dict[str, Any]]]:
+        """Run several searches with a single embedder call.
+
+        Each query is a dict with "q", optional "k" (default 4) and optional "project".
+        Queries sharing a project filter go to Chroma in one call (with the largest k
+        of the group, trimmed per query afterwards). Results come back in input order.
+        """
+        if not queries:
+            return []
+        embeddings = self.embedder.embed([q["q"] for q in queries])
+        return self.search_batch_by_embedding(queries, embeddings, fields=fields, snippet_chars=snippet_chars)
+
+    def search_batch_by_embedding(
+        self,
+        queries: List[Dict[str, Any]],
+        embeddings: List[List[float]],
+        fields: Optional[List[str]] = None,
+        snippet_chars: int = 0,
+    ) -> List[List[Dict[str, Any]]]:
+        """Batch search with precomputed embeddings (one per query, same order)."""
+        include = self._include(fields, snippet_chars)
+        groups: Dict[Optional[str], List[int]] = {}
+        for i, q in enumerate(queries):
+            groups.setdefault(q.get("project") or None, []).append(i)
+
+        results: List[List[Dict[str, Any]]] = [[] for _ in queries]
+        for project_name, idxs in groups.items():
+            where = {"project_name": project_name} if project_name else None
+            n_results = max(queries[i].get("k", 4) for i in idxs)
+            res = self.collection.query(
+                query_embeddings=[embeddings[i] for i in idxs],
+                n_results=n_results,
+                where=where,
+                include=include,
+            )
+            for row, i in enumerate(idxs):
+                hits = self._unpack(res, row=row, limit=queries[i].get("k", 4))
+                results[i] = self._project(hits, queries[i]["q"], fields, snippet_chars)
+        return results
+
     def count(self) -> int:
         """Return total number of chunks in collection."""
-        return self.collection.count()
\ No newline at end of file
+        return self.collection.count()
+
+    def iter_all(
+        self,
+        batch_size: int = 1000,
+        include: Optional[List[str]] = None,
+        project_name: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield the whole collection (or one project) page by page (raw Chroma `get` results)."""
+        include = include or ["embeddings", "documents", "metadatas"]
+        where = {"project_name": project_name} if project_name else None
+        offset = 0
+        while True:
+            page = self.collection.get(limit=batch_size, offset=offset, include=include, where=where)
+            if not page["ids"]:
+                return
+            yield page
+            offset += len(page["ids"])
+
+    def reset(self, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """Drop and recreate the collection.
+
+        metadata: collection metadata to recreate it with (e.g. a snapshot's, so its
+        HNSW space is kept); defaults to the current metadata with the configured HNSW
+        settings applied. A configured search ef applies either way.
+        """
+        if metadata is None:
+            metadata = {**(self.collection.metadata or {}), **self.hnsw}
+        else:
+            metadata = dict(metadata)
+            if "hnsw:search_ef" in self.hnsw:
+                metadata["hnsw:search_ef"] = self.hnsw["hnsw:search_ef"]
+        self.client.delete_collection(self.collection_name)
+        self.collection = self.client.get_or_create_collection(self.collection_name, metadata=metadata or None)
+
+
+class AsyncChromaStore:
+    """Awaitable facade over ChromaStore for async (ASGI) views.
+
+    Blocking work runs on two dedicated thread pools so the event loop stays free:
+    query embedding (CPU-bound model inference) on a small embedding pool, and
+    Chroma reads/writes on a separate bounded store pool, so a burst of retrievals
+    cannot starve embedding or vice versa. Cancelling an awaiting caller cancels
+    its pending executor job; a job already running finishes in the background.
+    """
+
+    def __init__(self, store: ChromaStore, max_workers: int = 4, embed_workers: int = 1):
+        self.store = store
+        self._store_pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chroma-store")
+        self._embed_pool = ThreadPoolExecutor(max_workers=embed_workers, thread_name_prefix="chroma-embed")
+
+    @staticmethod
+    async def _run(pool: ThreadPoolExecutor, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, functools.partial(fn, *args, **kwargs))
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        return await self._run(self._embed_pool, self.store.embedder.embed, texts)
+
+    async def search(
+        self,
+        query: str,
+        k: int = 4,
+        project_name: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        snippet_chars: int = 0,
+    ) -> List[Dict[str, Any]]:
+        embedding = (await self.embed([query]))[0]
+        return await self._run(
+            self._store_pool, self.store.search_by_embedding, embedding, k=k, project_name=project_name,
+            fields=fields, snippet_chars=snippet_chars, query_text=query,
+        )
+
+    async def search_batch(
+        self,
+        queries: List[Dict[str, Any]],
+        fields: Optional[List[str]] = None,
+        snippet_chars: int = 0,
+    ) -> List[List[Dict[str, Any]]]:
+        if not queries:
+            return []
+        embeddings = await self.embed([q["q"] for q in queries])
+        return await self._run(
+            self._store_pool, self.store.search_batch_by_embedding, queries, embeddings,
+            fields=fields, snippet_chars=snippet_chars,
+        )
+
+    async def upsert(self, chunks: List[Dict[str, Any]]) -> int:
+        return await self._run(self._store_pool, self.store.upsert, chunks)
+
+    async def count(self) -> int:
+        return await self._run(self._store_pool, self.store.count)
+
+    def close(self) -> None:
+        """Stop both executors, dropping jobs that have not started yet."""
+        self._store_pool.shutdown(wait=False, cancel_futures=True)
+        self._embed_pool.shutdown(wait=False, cancel_futures=True)
@@ -1,6 +1,17 @@
-from typing import Optional
+from typing import Callable, Dict, Iterator, List, Optional
+import csv
+import logging
+import os
 import pandas as pd
-from coreapp.models import Lead
+from openpyxl import load_workbook
+from django.db import transaction
+from coreapp.models import ChangeCounter, Lead
+from coreapp.normalization import canonical_status, project_key, unit_type_key
+
+logger = logging.getLogger(__name__)
+
+# Rows per transformed batch / per INSERT transaction
+DEFAULT_BATCH_SIZE = 5000
 
 # Excel headers → Lead model fields
 HEADER_MAP = {
@@ -18,52 +29,322 @@ HEADER_MAP = {
     "Last conversation summary": "last_conversation_summary",
 }
 
-def _to_number(v):
-    try:
-        if pd.isna(v):
-            return None
-        return float(str(v).replace(",", "").strip())
-    except Exception:
-        return None
+NUMBER_FIELDS = ("budget_min", "budget_max")
+DATE_FIELDS = ("last_conversation_date",)
 
-def _to_date(v):
-    try:
-        if pd.isna(v) or v == "":
-            return None
-        return pd.to_datetime(v, errors="coerce").date()
-    except Exception:
-        return None
-
-def load_excel_to_db(path: str) -> int:
-    # Force openpyxl engine for .xlsx and provide clearer errors for wrong file types
+# Source field → derived lookup key (bulk_create skips Lead.save, so fill them here)
+KEY_FIELDS = {
+    "project_enquired": ("project_key", project_key),
+    "unit_type": ("unit_type_key", unit_type_key),
+}
+
+
+def _to_number_column(s: pd.Series) -> pd.Series:
+    """Column-wise budget parsing: '1,200,000' / ' 950000 ' / 1.2e6 → float, else NaN."""
+    if pd.api.types.is_numeric_dtype(s):
+        return s.astype("float64")
+    text = s.astype("string").str.replace(",", "", regex=False).str.strip()
+    return pd.to_numeric(text, errors="coerce").astype("float64")
+
+
+def _to_date_column(s: pd.Series) -> pd.Series:
+    """Column-wise date parsing; unparseable cells become NaT."""
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    blank = s.astype("string").str.strip().eq("").fillna(False)
+    return pd.to_datetime(s.mask(blank), errors="coerce", format="mixed")
+
+
+def _text_column(s: pd.Series) -> pd.Series:
+    """Strip string cells; numbers Excel stored as floats (phones, ids) become digit strings."""
+    if pd.api.types.is_float_dtype(s):
+        whole = s.notna() & (s % 1 == 0)
+        if whole[s.notna()].all():
+            return s.astype("Int64").astype("string").astype(object)
+    if pd.api.types.is_numeric_dtype(s):
+        return s.astype("string").astype(object)
+    if s.dtype != object:
+        return s
+    stripped = s.str.strip()
+    return stripped.where(stripped.notna(), s)
+
+
+def frame_to_payloads(df: pd.DataFrame) -> List[Dict]:
+    """Transform a CRM export frame into Lead field dicts, column by column.
+
+    Rows missing the name or email columns are dropped (same as the per-row loader).
+    """
+    df = df.rename(columns={c: c.strip() for c in df.columns if isinstance(c, str)})
+    cols: Dict[str, pd.Series] = {}
+    for src, dst in HEADER_MAP.items():
+        if src not in df.columns:
+            continue
+        s = df[src]
+        if dst in NUMBER_FIELDS:
+            s = _to_number_column(s)
+        elif dst in DATE_FIELDS:
+            s = _to_date_column(s).dt.date
+        else:
+            s = _text_column(s)
+        cols[dst] = s
+    if "name" not in cols or "email" not in cols:
+        return []
+
+    out = pd.DataFrame(cols, index=df.index)
+    for dst in out.columns:
+        # Missing cells take the model default: None for nullable fields, "" for text, "New" for status
+        field = Lead._meta.get_field(dst)
+        missing = out[dst].isna()
+        if field.null and out[dst].dtype == object:
+            missing |= out[dst].eq("")  # blank crm_id → NULL so it never hits the unique constraint
+        if missing.any():
+            out[dst] = out[dst].astype(object).where(~missing, field.get_default())
+
+    if "status" in out.columns:
+        # Same canonical spelling Lead.save stores; unknown statuses are kept as typed
+        statuses = {value: canonical_status(value) or value for value in out["status"].unique()}
+        out["status"] = out["status"].map(statuses)
+
+    for src, (key, normalize) in KEY_FIELDS.items():
+        if src in out.columns:
+            # Few distinct projects/unit types per file: normalize each value once
+            keys = {value: normalize(value) for value in out[src].unique()}
+            out[key] = out[src].map(keys)
+
+    fields = list(out.columns)
+    return [dict(zip(fields, values)) for values in zip(*(out[f].tolist() for f in fields))]
+
+
+def iter_excel_frames(path: str, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[pd.DataFrame]:
+    """Stream the first sheet of an .xlsx as DataFrames of at most `batch_size` rows.
+
+    openpyxl read-only mode parses the sheet XML lazily, so memory depends on the
+    batch size, not the file size.
+    """
     try:
-        df = pd.read_excel(path, engine="openpyxl")
+        wb = load_workbook(path, read_only=True, data_only=True)
     except Exception as exc:
         raise ValueError(f"Failed to read Excel file. Ensure it's a valid .xlsx: {exc}")
-    # Normalize headers by stripping spaces
-    df = df.rename(columns={c: c.strip() for c in df.columns})
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(h).strip() if h is not None else f"column_{i}" for i, h in enumerate(header)]
+        batch = []
+        for row in rows:
+            if all(v is None for v in row):
+                continue
+            batch.append(row[:len(columns)])
+            if len(batch) >= batch_size:
+                yield pd.DataFrame.from_records(batch, columns=columns)
+                batch = []
+        if batch:
+            yield pd.DataFrame.from_records(batch, columns=columns)
+    finally:
+        wb.close()
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ValueError("pyarrow is required for CSV/Parquet lead imports (pip install pyarrow)")
+
+
+def _slices(table_batch, batch_size: int) -> Iterator[pd.DataFrame]:
+    for offset in range(0, table_batch.num_rows, batch_size):
+        yield table_batch.slice(offset, batch_size).to_pandas()
+
+
+def iter_csv_frames(path: str, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[pd.DataFrame]:
+    """Stream a CSV export through pyarrow's multi-threaded block reader.
 
+    Every column is read as text; frame_to_payloads does the typing, so a column
+    that changes shape halfway through a large file cannot break inference.
+    """
+    _require_pyarrow()
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        header = next(csv.reader(f), None)
+    if not header:
+        return
+    try:
+        reader = pacsv.open_csv(
+            path,
+            read_options=pacsv.ReadOptions(use_threads=True, block_size=16 << 20),
+            convert_options=pacsv.ConvertOptions(
+                column_types={name: pa.string() for name in header},
+                strings_can_be_null=True,
+            ),
+        )
+        for record_batch in reader:
+            yield from _slices(record_batch, batch_size)
+    except pa.ArrowInvalid as exc:
+        raise ValueError(f"Failed to read CSV file: {exc}")
+
+
+def iter_parquet_frames(path: str, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[pd.DataFrame]:
+    """Stream a Parquet export row group by row group, decoding columns in parallel."""
+    _require_pyarrow()
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    try:
+        parquet = pq.ParquetFile(path)
+        for record_batch in parquet.iter_batches(batch_size=batch_size, use_threads=True):
+            yield record_batch.to_pandas()
+    except (pa.ArrowInvalid, OSError) as exc:
+        raise ValueError(f"Failed to read Parquet file: {exc}")
+
+
+# File extension → streaming reader
+READERS = {
+    ".xlsx": iter_excel_frames,
+    ".csv": iter_csv_frames,
+    ".parquet": iter_parquet_frames,
+}
+
+
+def iter_lead_frames(path: str, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[pd.DataFrame]:
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in READERS:
+        raise ValueError(f"Unsupported lead file type '{ext}'. Use one of: {', '.join(READERS)}")
+    return READERS[ext](path, batch_size=batch_size)
+
+
+def _same(current, new) -> bool:
+    """Compare a stored value with an imported one (Decimal vs float, None vs "")."""
+    if current is None or new is None:
+        return (current in (None, "")) and (new in (None, ""))
+    if hasattr(current, "as_tuple"):  # Decimal budgets
+        return round(float(current), 2) == round(float(new), 2)
+    return current == new
+
+
+def _stamp(payloads: List[Dict]) -> None:
+    """Give the batch one new revision (bulk_create skips Lead.save).
+
+    Call inside the batch's transaction: the counter and the rows commit together.
+    """
+    revision = ChangeCounter.bump(Lead.REVISION_COUNTER)
+    for payload in payloads:
+        payload["revision"] = revision
+
+
+def _upsert_batch(payloads: List[Dict], batch_size: int) -> Dict[str, int]:
+    """Insert new leads, update changed ones (matched on crm_id), skip unchanged ones."""
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    keyed: Dict[str, Dict] = {}
+    unkeyed: List[Dict] = []
+    for p in payloads:
+        if p.get("crm_id"):
+            keyed[p["crm_id"]] = p  # a repeated id within the file: last row wins
+        else:
+            unkeyed.append(p)
+
+    compared = sorted({f for p in payloads for f in p} - {"crm_id"})
+    fields = compared + ["revision"]
+    existing = {
+        row["crm_id"]: row
+        for row in Lead.objects.filter(crm_id__in=list(keyed)).values("crm_id", *compared)
+    }
+    to_write = []
+    for crm_id, p in keyed.items():
+        current = existing.get(crm_id)
+        if current is None:
+            counts["inserted"] += 1
+        elif all(_same(current[f], p.get(f)) for f in compared):
+            counts["unchanged"] += 1
+            continue
+        else:
+            counts["updated"] += 1
+        to_write.append(p)
+    counts["inserted"] += len(unkeyed)
+
+    with transaction.atomic():
+        if to_write or unkeyed:
+            _stamp(to_write + unkeyed)
+        if to_write:
+            # INSERT ... ON CONFLICT(crm_id) DO UPDATE
+            Lead.objects.bulk_create(
+                [Lead(**p) for p in to_write],
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=["crm_id"],
+                update_fields=fields,
+            )
+        if unkeyed:
+            Lead.objects.bulk_create([Lead(**p) for p in unkeyed], batch_size=batch_size)
+    return counts
+
+
+def _insert_batch(payloads: List[Dict], batch_size: int) -> Dict[str, int]:
+    """Insert leads whose crm_id is not stored yet; the others are left unchanged."""
+    seen = set()
     rows = []
-    for _, r in df.iterrows():
-        payload = {}
-        for src, dst in HEADER_MAP.items():
-            if src not in df.columns:
-                continue
-            val = r.get(src)
-
-            if dst in ("budget_min", "budget_max"):
-                val = _to_number(val)
-            elif dst == "last_conversation_date":
-                val = _to_date(val)
-            elif dst == "status" and isinstance(val, str):
-                val = val.strip()
-            elif isinstance(val, str):
-                val = val.strip()
-
-            payload[dst] = val
-        if "name" in payload and "email" in payload:
-            rows.append(Lead(**payload))
-
-    if rows:
-        Lead.objects.bulk_create(rows, ignore_conflicts=True)
-    return len(rows)
\ No newline at end of file
+    with transaction.atomic():
+        keys = [p["crm_id"] for p in payloads if p.get("crm_id")]
+        existing = set(Lead.objects.filter(crm_id__in=keys).values_list("crm_id", flat=True))
+        for p in payloads:
+            crm_id = p.get("crm_id")
+            if crm_id:
+                if crm_id in existing or crm_id in seen:
+                    continue  # ignore_conflicts would drop it; a repeated id: first row wins
+                seen.add(crm_id)
+            rows.append(p)
+        if rows:
+            _stamp(rows)
+            Lead.objects.bulk_create([Lead(**p) for p in rows], batch_size=batch_size, ignore_conflicts=True)
+    return {"inserted": len(rows), "unchanged": len(payloads) - len(rows)}
+
+
+def insert_frames(
+    frames: Iterator[pd.DataFrame],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: Optional[Callable[[int], None]] = None,
+    upsert: bool = False,
+) -> Dict[str, int]:
+    """Transform and write each frame in its own transaction.
+
+    Plain mode inserts rows and skips crm_ids already present (counted as
+    unchanged); upsert mode also updates leads whose imported fields changed.
+    Returns inserted/updated/unchanged counts; progress(rows_so_far) is called
+    after every committed batch.
+    """
+    totals = {"inserted": 0, "updated": 0, "unchanged": 0}
+    processed = 0
+    for frame in frames:
+        payloads = frame_to_payloads(frame)
+        if upsert:
+            counts = _upsert_batch(payloads, batch_size)
+        else:
+            counts = _insert_batch(payloads, batch_size)
+        for key, n in counts.items():
+            totals[key] += n
+        processed += len(payloads)
+        logger.info(f"Lead import: {processed} rows processed ({totals})")
+        if progress:
+            progress(processed)
+    return totals
+
+
+def load_leads_file(
+    path: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: Optional[Callable[[int], None]] = None,
+    upsert: bool = False,
+) -> Dict[str, int]:
+    """Stream a CRM export (.xlsx, .csv or .parquet) into the Lead table in fixed-size batches."""
+    return insert_frames(
+        iter_lead_frames(path, batch_size=batch_size),
+        batch_size=batch_size,
+        progress=progress,
+        upsert=upsert,
+    )
+
+
+# Backwards-compatible name from when only Excel was supported
+load_excel_to_db = load_leads_file
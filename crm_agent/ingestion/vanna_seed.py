@@ -1,6 +1,8 @@
 from django.apps import apps
 from django.db import connection
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
+import hashlib
+import json
 import logging
 
 from crm_agent.agent.vanna_client import VannaClient
@@ -8,11 +10,39 @@ from crm_agent.agent.vanna_client import VannaClient
 logger = logging.getLogger(__name__)
 
 
+# SQL that differs between backends, keyed by connection.vendor
+DIALECTS = {
+    "sqlite": {
+        "name": "SQLite",
+        "primary_key": "id INTEGER PRIMARY KEY AUTOINCREMENT",
+        "last_30_days": "datetime('now', '-30 days')",
+        "contains": "LIKE",
+        "notes": "Use date('now') / datetime('now', '-N days') for relative dates and strftime('%Y-%m', col) for months. LIKE is case-insensitive for ASCII.",
+    },
+    "postgresql": {
+        "name": "PostgreSQL",
+        "primary_key": "id BIGSERIAL PRIMARY KEY",
+        "last_30_days": "NOW() - INTERVAL '30 days'",
+        "contains": "ILIKE",
+        "notes": "Use CURRENT_DATE / NOW() - INTERVAL 'N days' for relative dates and date_trunc('month', col) for months. Use ILIKE for case-insensitive matching.",
+    },
+}
+
+
 class VannaSeeder:
     """Seed Vanna with DDL and NL→SQL examples."""
     
-    def __init__(self, vanna_client: VannaClient):
+    def __init__(self, vanna_client: Optional[VannaClient] = None):
+        # No client is needed to read the corpus (get_* / schema_version), only to seed it
         self.vanna = vanna_client
+
+    @property
+    def dialect(self) -> Dict[str, str]:
+        """SQL fragments for the active database backend (SQLite unless DATABASE_URL says otherwise)."""
+        return DIALECTS.get(connection.vendor, DIALECTS["sqlite"])
+
+    def get_dialect_documentation(self) -> str:
+        return f"The database is {self.dialect['name']}. {self.dialect['notes']}"
     
     def get_lead_ddl(self) -> str:
         """
@@ -28,7 +58,7 @@ class VannaSeeder:
         fields = []
         for field in model._meta.get_fields():
             if field.name == 'id':
-                fields.append('id INTEGER PRIMARY KEY AUTOINCREMENT')
+                fields.append(self.dialect['primary_key'])
             elif hasattr(field, 'db_type'):
                 field_type = field.db_type(connection)
                 nullable = 'NULL' if field.null else 'NOT NULL'
@@ -97,7 +127,7 @@ class VannaSeeder:
             ),
             (
                 "Leads enquired about Beachgate project",
-                f"SELECT * FROM {table_name} WHERE project_enquired LIKE '%Beachgate%'"
+                f"SELECT * FROM {table_name} WHERE project_enquired {self.dialect['contains']} '%Beachgate%'"
             ),
             (
                 "Count leads with email addresses",
@@ -105,18 +135,28 @@ class VannaSeeder:
             ),
             (
                 "Show leads created in the last 30 days",
-                f"SELECT * FROM {table_name} WHERE created_at >= datetime('now', '-30 days')"
+                f"SELECT * FROM {table_name} WHERE created_at >= {self.dialect['last_30_days']}"
             )
         ]
         
         return examples
     
+    def schema_version(self) -> str:
+        """
+        Short hash of everything seed() trains on (DDL, dialect notes, examples).
+
+        Changes whenever a migration alters the Lead table or the examples are edited,
+        so SQL cached against an older corpus is never reused.
+        """
+        corpus = [self.get_lead_ddl(), self.get_dialect_documentation(), self.get_training_examples()]
+        return hashlib.sha256(json.dumps(corpus).encode()).hexdigest()[:16]
+
     def seed(self) -> Dict[str, int]:
         """
         Seed Vanna with DDL and examples.
         
         Returns:
-            {"ddl_items": 1, "sql_examples": N}
+            {"ddl_items": 1, "sql_examples": N, "documentation_items": 1}
         """
         ddl_count = 0
         sql_count = 0
@@ -127,6 +167,8 @@ class VannaSeeder:
             self.vanna.add_training_item("ddl", ddl)
             ddl_count = 1
             logger.info("Seeded DDL for Lead model")
+
+            self.vanna.add_training_item("documentation", self.get_dialect_documentation())
             
             # Seed SQL examples
             examples = self.get_training_examples()
@@ -138,7 +180,8 @@ class VannaSeeder:
             
             return {
                 "ddl_items": ddl_count,
-                "sql_examples": sql_count
+                "sql_examples": sql_count,
+                "documentation_items": 1
             }
             
         except Exception as e: